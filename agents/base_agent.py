@@ -1,9 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any
-from langchain_openai import ChatOpenAI
 from langchain.memory import ConversationBufferMemory
 from langchain.tools import BaseTool
-from config.settings import OPENAI_API_KEY, MODEL_NAME, TEMPERATURE
+from config.settings import TEMPERATURE
+from utils.llm import get_agent_model, get_gateway
 
 
 class BaseYogaAgent(ABC):
@@ -11,11 +11,7 @@ class BaseYogaAgent(ABC):
     
     def __init__(self, name: str):
         self.name = name
-        self.llm = ChatOpenAI(
-            api_key=OPENAI_API_KEY,
-            model_name=MODEL_NAME,
-            temperature=TEMPERATURE
-        )
+        self.llm = get_agent_model("playlist", TEMPERATURE)
         self.memory = ConversationBufferMemory(return_messages=True)
         self.tools = self._setup_tools()
         
@@ -34,5 +30,6 @@ class BaseYogaAgent(ABC):
         return {
             "name": self.name,
             "tools": [tool.name for tool in self.tools],
-            "model": MODEL_NAME
+            # The model the route asks first (the rest are fallbacks)
+            "model": get_gateway().targets("playlist")[0]['model']
         }
\ No newline at end of file
@@ -4,7 +4,6 @@ from typing import List
 from langchain.tools import BaseTool
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.agents import create_openai_functions_agent, AgentExecutor
-from langchain_openai import ChatOpenAI
 from langchain.memory import ConversationBufferMemory
 from dotenv import load_dotenv
 
@@ -12,7 +11,8 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tools.class_storage_tool import ClassStorageTool
-from config.settings import OPENAI_API_KEY, MODEL_NAME, TEMPERATURE
+from utils.llm import get_agent_model
+from agents.tracing import trace_config
 
 load_dotenv()
 
@@ -21,10 +21,8 @@ class ClassManagementAgent:
     
     def __init__(self):
             self.name = "ClassManagement"
-            self.llm = ChatOpenAI(
-                api_key=OPENAI_API_KEY,
-                model_name=MODEL_NAME
-            )
+            # Class lookups are simple - the small model answers them
+            self.llm = get_agent_model("cheap")
             self.tools = [ClassStorageTool()]
             self.agent_executor = self._create_agent_executor()
 
@@ -55,7 +53,7 @@ class ClassManagementAgent:
         ])
         
         agent = create_openai_functions_agent(self.llm, self.tools, prompt)
-        return AgentExecutor(agent=agent, tools=self.tools, verbose=True)
+        return AgentExecutor(agent=agent, tools=self.tools, verbose=False)
     
     def process_request(self, user_input: str) -> str:
         """Process a user request using the agent"""
@@ -63,7 +61,7 @@ class ClassManagementAgent:
             result = self.agent_executor.invoke({
                 "input": user_input,
                 "chat_history": []
-            })
+            }, config=trace_config(self.name))
             return result["output"]
         except Exception as e:
             return f"Error processing request: {str(e)}"
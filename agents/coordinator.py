@@ -4,7 +4,6 @@ from typing import List, Dict
 from langchain.tools import BaseTool
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.agents import create_openai_functions_agent, AgentExecutor
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 # Add parent directory to path for imports
@@ -12,26 +11,25 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.class_management import ClassManagementAgent
 from agents.music_curation import MusicCurationAgent
-from config.settings import OPENAI_API_KEY
+from utils.llm import get_agent_model
+from utils.log import get_logger
 
 load_dotenv()
 
+log = get_logger("agents.coordinator")
+
 class CoordinatorAgent:
     """Orchestrates multiple agents to generate complete yoga playlists"""
     
     def __init__(self):
         self.name = "Coordinator"
-        self.llm = ChatOpenAI(
-            api_key=OPENAI_API_KEY,
-            model="gpt-3.5-turbo",
-            temperature=0.7
-        )
+        self.llm = get_agent_model("cheap")
         
         # Initialize sub-agents
         self.class_manager = ClassManagementAgent()
         self.music_curator = MusicCurationAgent()
         
-        print(f"✅ Coordinator initialized with {len(self._get_sub_agents())} sub-agents")
+        log.info("Coordinator initialized", extra={"sub_agents": len(self._get_sub_agents())})
     
     def _get_sub_agents(self) -> Dict[str, object]:
         """Return dictionary of available sub-agents"""
@@ -43,20 +41,21 @@ class CoordinatorAgent:
     def generate_playlist(self, class_name: str, music_preferences: str, duration: int = 60) -> Dict:
         """Main coordination method - generates complete playlist"""
         
-        print(f"🎯 Coordinator: Starting playlist generation")
-        print(f"   Class: {class_name}")
-        print(f"   Music Style: {music_preferences}")
-        print(f"   Duration: {duration} minutes")
+        log.info("Starting playlist generation", extra={
+            "class_name": class_name,
+            "music_preferences": music_preferences,
+            "duration": duration
+        })
         
         try:
             # Step 1: Get class information
-            print("\n📚 Step 1: Getting class information...")
+            log.debug("Getting class information")
             class_info = self.class_manager.process_request(
                 f"Tell me about the '{class_name}' yoga class type. What are its characteristics?"
             )
             
             # Step 2: Generate music playlist
-            print("\n🎵 Step 2: Creating music playlist...")
+            log.debug("Creating music playlist")
             playlist = self.music_curator.recommend_music(
                 class_info=class_info,
                 music_preferences=music_preferences,
@@ -74,11 +73,11 @@ class CoordinatorAgent:
                 "generated_by": "Coordinator Agent"
             }
             
-            print("\n✅ Coordinator: Playlist generation complete!")
+            log.info("Playlist generation complete")
             return result
             
         except Exception as e:
-            print(f"\n❌ Coordinator: Error during generation: {e}")
+            log.error("Playlist generation failed", extra={"error": str(e)})
             return {
                 "success": False,
                 "error": str(e),
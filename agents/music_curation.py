@@ -4,14 +4,14 @@ from typing import List
 from langchain.tools import BaseTool
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.agents import create_openai_functions_agent, AgentExecutor
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tools.yoga_tools import YogaKnowledgeTool
-from config.settings import OPENAI_API_KEY
+from utils.llm import get_agent_model
+from agents.tracing import trace_config
 
 load_dotenv()
 
@@ -20,11 +20,7 @@ class MusicCurationAgent:
     
     def __init__(self):
         self.name = "MusicCuration"
-        self.llm = ChatOpenAI(
-            api_key=OPENAI_API_KEY,
-            model="gpt-3.5-turbo",
-            temperature=0.7
-        )
+        self.llm = get_agent_model("playlist")
         self.tools = [YogaKnowledgeTool()]
         self.agent_executor = self._create_agent_executor()
     
@@ -76,7 +72,7 @@ class MusicCurationAgent:
         ])
         
         agent = create_openai_functions_agent(self.llm, self.tools, prompt)
-        return AgentExecutor(agent=agent, tools=self.tools, verbose=True)
+        return AgentExecutor(agent=agent, tools=self.tools, verbose=False)
     
     def recommend_music(self, class_info: str, music_preferences: str, duration_minutes: int = 60) -> str:
         """Get a structured playlist for a specific class"""
@@ -112,7 +108,7 @@ class MusicCurationAgent:
             result = self.agent_executor.invoke({
                 "input": request,
                 "chat_history": []
-            })
+            }, config=trace_config(self.name))
             return result["output"]
         except Exception as e:
             return f"Error creating playlist: {str(e)}"
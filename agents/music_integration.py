@@ -5,27 +5,27 @@ from typing import List, Dict
 from langchain.tools import BaseTool
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.agents import create_openai_functions_agent, AgentExecutor
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tools.spotify_tool import SpotifyTool
-from config.settings import OPENAI_API_KEY
+from utils.llm import get_agent_model
+from agents.tracing import trace_config
+from utils.log import get_logger
 
 load_dotenv()
 
+log = get_logger("agents.integration")
+
 class MusicIntegrationAgent:
     """Integrates with Spotify to find real tracks and create playlists"""
     
     def __init__(self):
         self.name = "MusicIntegration"
-        self.llm = ChatOpenAI(
-            api_key=OPENAI_API_KEY,
-            model="gpt-3.5-turbo",
-            temperature=0.7
-        )
+        # Track lookups and replacement suggestions go to the small model
+        self.llm = get_agent_model("cheap")
         self.tools = [SpotifyTool()]
         self.agent_executor = self._create_agent_executor()
     
@@ -54,7 +54,7 @@ class MusicIntegrationAgent:
         ])
         
         agent = create_openai_functions_agent(self.llm, self.tools, prompt)
-        return AgentExecutor(agent=agent, tools=self.tools, verbose=True)
+        return AgentExecutor(agent=agent, tools=self.tools, verbose=False)
     
     def search_playlist_tracks(self, playlist_text: str) -> Dict:
         """Parse playlist text and search for tracks on Spotify"""
@@ -68,8 +68,7 @@ class MusicIntegrationAgent:
                 "error": "No tracks found in playlist text"
             }
         
-        print(f"🔍 Extracted tracks: {tracks}")  # Debug line
-        print(f"🔍 Searching for {len(tracks)} tracks on Spotify...")
+        log.debug("Searching Spotify for extracted tracks", extra={"tracks": tracks})
         
         # Use Spotify tool to search for each track
         spotify_tool = SpotifyTool()
@@ -135,7 +134,7 @@ class MusicIntegrationAgent:
     def process_full_playlist(self, class_name: str, playlist_text: str) -> Dict:
         """Complete workflow: search tracks and create playlist"""
         
-        print(f"🎵 Processing playlist for {class_name}")
+        log.debug("Processing playlist", extra={"class_name": class_name})
         
         # Step 1: Search for tracks
         search_results = self.search_playlist_tracks(playlist_text)
@@ -147,12 +146,10 @@ class MusicIntegrationAgent:
         successful_tracks = search_results["successful_tracks"]
         track_ids = [track["spotify_data"]["spotify_id"] for track in successful_tracks]
         
-        print(f"✅ Found {len(track_ids)} tracks on Spotify")
-        
-        if search_results["failed_count"] > 0:
-            print(f"⚠️  {search_results['failed_count']} tracks not found:")
-            for failed in search_results["failed_tracks"]:
-                print(f"   • {failed['original_query']}")
+        log.info("Resolved playlist tracks", extra={
+            "found": len(track_ids),
+            "not_found": [failed['original_query'] for failed in search_results["failed_tracks"]]
+        })
         
         # Step 3: Create playlist (optional - can be done separately)
         playlist_name = f"{class_name} - Yoga Playlist"
@@ -174,7 +171,7 @@ class MusicIntegrationAgent:
             result = self.agent_executor.invoke({
                 "input": request,
                 "chat_history": []
-            })
+            }, config=trace_config(self.name))
             return result["output"]
         except Exception as e:
             return f"Error testing connection: {str(e)}"
@@ -0,0 +1,110 @@
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from utils.health import get_health
+from utils.log import get_logger, trace_enabled
+from utils.metrics import LLM_CALLS, LLM_TOKENS
+
+log = get_logger("agents.trace")
+
+# Tool inputs/outputs and LLM text are cut to this many characters
+MAX_FIELD_CHARS = 500
+
+
+def _clip(value: Any) -> str:
+    text = str(value)
+    return text if len(text) <= MAX_FIELD_CHARS else text[:MAX_FIELD_CHARS] + "..."
+
+
+class AgentTraceHandler(BaseCallbackHandler):
+    """Logs an agent run step by step (what verbose=True used to print)
+
+    One handler per invoke: it is only attached when tracing is on for the
+    request, so untraced runs pay nothing.
+    """
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self._started: Dict[UUID, float] = {}
+
+    def _elapsed(self, run_id: UUID) -> Optional[float]:
+        started = self._started.pop(run_id, None)
+        return round(time.perf_counter() - started, 3) if started is not None else None
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._started[run_id] = time.perf_counter()
+            log.info("Agent run started", extra={"agent": self.agent, "input": _clip(inputs.get("input", inputs))})
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            log.info("Agent run finished", extra={"agent": self.agent, "seconds": self._elapsed(run_id)})
+
+    def on_chain_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            log.warning("Agent run failed", extra={"agent": self.agent, "error": str(error), "seconds": self._elapsed(run_id)})
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        text = response.generations[0][0].text if response.generations and response.generations[0] else ""
+        log.info("LLM call", extra={"agent": self.agent, "output": _clip(text), "seconds": self._elapsed(run_id)})
+
+    def on_agent_action(self, action, **kwargs):
+        log.info("Agent action", extra={"agent": self.agent, "tool": action.tool, "tool_input": _clip(action.tool_input)})
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        log.info("Tool result", extra={"agent": self.agent, "output": _clip(output), "seconds": self._elapsed(run_id)})
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        log.warning("Tool failed", extra={"agent": self.agent, "error": str(error), "seconds": self._elapsed(run_id)})
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Records an agent model's calls like LLMGateway._attempt does
+
+    Agent executors call the chat model directly, bypassing the gateway, so
+    this handler (attached to every agent model, see get_agent_model)
+    counts LLM_CALLS and LLM_TOKENS and feeds the provider's health.
+    """
+
+    def __init__(self, model: str, provider: str):
+        self.model = model
+        self.provider = provider
+        self._started: Dict[UUID, float] = {}
+
+    def _elapsed(self, run_id: UUID) -> float:
+        started = self._started.pop(run_id, None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        get_health().record(self.provider, True, self._elapsed(run_id))
+        LLM_CALLS.labels(model=self.model, outcome="ok").inc()
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        for kind, key in (("prompt", "prompt_tokens"), ("completion", "completion_tokens")):
+            if usage.get(key) is not None:
+                LLM_TOKENS.labels(model=self.model, kind=kind).observe(usage[key])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        get_health().record(self.provider, False, self._elapsed(run_id), str(error))
+        LLM_CALLS.labels(model=self.model, outcome="error").inc()
+
+
+def trace_config(agent: str) -> Dict:
+    """invoke() config for an agent run: traced only when the request asked for it"""
+    if not trace_enabled():
+        return {}
+    return {"callbacks": [AgentTraceHandler(agent)]}
@@ -1,52 +1,111 @@
 from http.server import BaseHTTPRequestHandler
 import json
+import sys
 import os
-from supabase import create_client
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import get_supabase_client
+from utils.pagination import decode_cursor, encode_cursor, escape_like, keyset_after, parse_limit
+from utils.responses import send_json, send_error
+from utils.health import track
+from utils.log import get_logger
+
+log = get_logger("api.classes")
+
+CLASS_COLUMNS = "id, name, description, user_id, is_public, created_at"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
 
 class handler(BaseHTTPRequestHandler):
     def _get_supabase_client(self):
-        """Get Supabase client"""
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-        return create_client(supabase_url, supabase_key)
+        """Get the shared Supabase client"""
+        return get_supabase_client()
+
+    def _fetch_class_page(self, supabase, user_id, query, limit, cursor):
+        """Fetch one page of classes using keyset pagination
+
+        Public classes come first, then the user's private classes, each
+        ordered by (created_at, id). The cursor records which of the two
+        segments we are in and the last row returned. A page that ends with
+        the public segment peeks at the custom one, so a cursor is only
+        returned when another row exists.
+        """
+        position = decode_cursor(cursor) or {"segment": "public"}
+        segments = ["public", "custom"] if user_id else ["public"]
+        if position.get("segment") not in segments:
+            return [], None
+        
+        rows = []
+        next_position = None
+        for segment in segments[segments.index(position["segment"]):]:
+            remaining = limit - len(rows)
+            request = supabase.table("yoga_class_types").select(CLASS_COLUMNS)
+            if segment == "public":
+                request = request.eq("is_public", True)
+            else:
+                request = request.eq("user_id", user_id).eq("is_public", False)
+            if query:
+                # Prefix match - served by the trigram index on name
+                request = request.ilike("name", f"{escape_like(query)}%")
+            if position.get("segment") == segment and "created_at" in position:
+                request = request.or_(keyset_after("created_at", position["created_at"], position["id"]))
+            
+            # Ask for one extra row to know whether this segment has more
+            with track("supabase"):
+                result = request.order("created_at").order("id").limit(remaining + 1).execute()
+            segment_rows = result.data or []
+            
+            if len(segment_rows) > remaining:
+                rows.extend(segment_rows[:remaining])
+                if remaining:
+                    last = rows[-1]
+                    next_position = {"segment": segment, "created_at": last["created_at"], "id": last["id"]}
+                else:
+                    # The previous segment filled the page and this one has
+                    # rows, so the next request starts at its beginning
+                    next_position = {"segment": segment}
+                break
+            
+            rows.extend(segment_rows)
+        
+        return rows, encode_cursor(next_position) if next_position else None
 
     def do_GET(self):
         try:
-            # Get user_id from query parameters
+            # Get user_id, paging and search parameters from the query string
             from urllib.parse import urlparse, parse_qs
             parsed_url = urlparse(self.path)
             query_params = parse_qs(parsed_url.query)
             user_id = query_params.get('user_id', [None])[0]
+            query = query_params.get('q', [''])[0].strip()
+            cursor = query_params.get('cursor', [None])[0]
+            limit = parse_limit(query_params.get('limit', [None])[0], DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
             
-            print(f"[DEBUG] Fetching classes for user_id: {user_id}")
+            log.debug("Fetching classes", extra={"user_id": user_id, "query": query})
             
             # Get real data from Supabase
             supabase = self._get_supabase_client()
-            
-            # Build query: public classes OR user's private classes
-            if user_id:
-                # Get public classes AND user's private classes
-                result = supabase.table("yoga_class_types").select("name, description, user_id, is_public").or_(f"is_public.eq.true,user_id.eq.{user_id}").order("is_public", desc=True).order("created_at", desc=False).execute()
-            else:
-                # Only get public classes if no user_id provided
-                result = supabase.table("yoga_class_types").select("name, description, user_id, is_public").eq("is_public", True).order("created_at", desc=False).execute()
+            rows, next_cursor = self._fetch_class_page(supabase, user_id, query, limit, cursor)
             
             classes = []
-            if result.data:
-                for row in result.data:
-                    classes.append({
-                        "name": row["name"],
-                        "description": row["description"],
-                        "is_custom": not row.get("is_public", False),
-                        "user_id": row.get("user_id")
-                    })
+            for row in rows:
+                classes.append({
+                    "name": row["name"],
+                    "description": row["description"],
+                    "is_custom": not row.get("is_public", False),
+                    "user_id": row.get("user_id")
+                })
             
-            print(f"[DEBUG] Found {len(classes)} classes")
+            log.debug("Found classes", extra={"count": len(classes)})
             
             response = {
                 "success": True,
                 "classes": classes,
-                "total": len(classes)
+                "total": len(classes),
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None
             }
             
         except Exception as e:
@@ -73,12 +132,7 @@ class handler(BaseHTTPRequestHandler):
                 "note": f"Using fallback data due to: {str(e)}"
             }
         
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        self.wfile.write(json.dumps(response).encode())
+        send_json(self, response)
         return
 
     def do_POST(self):
@@ -100,7 +154,7 @@ class handler(BaseHTTPRequestHandler):
         # Get user_id - for custom classes, this should be provided
         user_id = data.get('user_id')
         
-        print(f"[DEBUG] Creating class '{data['name']}' for user_id: {user_id}")
+        log.info("Creating class", extra={"class_name": data['name'], "user_id": user_id})
         
         try:
             # Add to real Supabase database
@@ -116,7 +170,8 @@ class handler(BaseHTTPRequestHandler):
                 "is_public": data.get('is_public', False)  # Default to private
             }
             
-            result = supabase.table("yoga_class_types").insert(insert_data).execute()
+            with track("supabase"):
+                result = supabase.table("yoga_class_types").insert(insert_data).execute()
             
             response = {
                 "success": True,
@@ -131,12 +186,7 @@ class handler(BaseHTTPRequestHandler):
             self._send_error(f"Database error: {str(e)}", 500)
             return
         
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        self.wfile.write(json.dumps(response).encode())
+        send_json(self, response)
         return
 
     def do_OPTIONS(self):
@@ -149,14 +199,4 @@ class handler(BaseHTTPRequestHandler):
 
     def _send_error(self, message, status_code):
         """Helper to send error responses"""
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        response = {
-            "success": False,
-            "error": message
-        }
-        
-        self.wfile.write(json.dumps(response).encode())
\ No newline at end of file
+        send_error(self, message, status_code)
\ No newline at end of file
@@ -1,10 +1,26 @@
 from http.server import BaseHTTPRequestHandler
 import json
+import sys
 import os
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 import urllib.parse
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.playlist_exporter import PlaylistExporter, PlaylistExportError
+from utils.responses import send_json, send_error
+from utils.sessions import SessionStore, needs_refresh, session_from_token
+from utils.jobs import jobs_enabled, get_job_queue
+from tools.jobs import EXPORT_PLAYLIST
+from utils.log import get_logger
+
+log = get_logger("api.export")
+
+# Encrypted cookie sessions - enabled when SESSION_SECRET is set
+SESSIONS = SessionStore()
+
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
         # Get POST data
@@ -20,7 +36,7 @@ class handler(BaseHTTPRequestHandler):
         # Check if this is an auth callback or playlist creation
         action = data.get('action', 'create_playlist')
         
-        print(f"[DEBUG] Received action: {action}")
+        log.debug("Received action", extra={"action": action})
         
         if action == 'get_auth_url':
             self._handle_get_auth_url()
@@ -32,36 +48,66 @@ class handler(BaseHTTPRequestHandler):
                     self._send_error(f"Missing required field: {field}", 400)
                     return
             self._handle_create_playlist(data)
+        elif action == 'create_playlists':
+            # Several playlists (e.g. a full class schedule) in one authorization
+            playlists = data.get('playlists')
+            if not playlists or not isinstance(playlists, list):
+                self._send_error("Missing required field: playlists", 400)
+                return
+            for entry in playlists:
+                if not entry.get('playlist_name') or 'track_ids' not in entry:
+                    self._send_error("Each playlist needs playlist_name and track_ids", 400)
+                    return
+            self._handle_create_playlist(data)
         else:
             self._send_error("Unknown action", 400)
 
+    def _get_redirect_uri(self):
+        """Redirect URI from env, else derived from the request's origin"""
+        redirect_uri = os.getenv("SPOTIFY_REDIRECT_URI")
+        
+        # If no redirect URI in env, determine from request headers
+        if not redirect_uri:
+            # Try to get the origin from the request
+            origin = self.headers.get('Origin', '')
+            referer = self.headers.get('Referer', '')
+            
+            if origin and origin.startswith('https://'):
+                redirect_uri = origin + '/'
+            elif referer and referer.startswith('https://'):
+                # Extract base URL from referer
+                from urllib.parse import urlparse
+                parsed = urlparse(referer)
+                redirect_uri = f"{parsed.scheme}://{parsed.netloc}/"
+            else:
+                # Fallback to default
+                redirect_uri = "https://yoga-playlist-app.vercel.app/"
+        
+        return redirect_uri
+
+    def _get_oauth(self, redirect_uri, show_dialog=False):
+        """SpotifyOAuth helper for the playlist scopes"""
+        return SpotifyOAuth(
+            client_id=os.getenv("SPOTIFY_CLIENT_ID"),
+            client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
+            redirect_uri=redirect_uri,
+            scope="playlist-modify-public playlist-modify-private",
+            cache_path=None,  # Don't cache in serverless - tokens live in the session cookie
+            show_dialog=show_dialog
+        )
+
     def _handle_get_auth_url(self):
         """Generate Spotify authorization URL"""
         try:
             client_id = os.getenv("SPOTIFY_CLIENT_ID")
             client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
-            redirect_uri = os.getenv("SPOTIFY_REDIRECT_URI")
-            
-            # If no redirect URI in env, determine from request headers
-            if not redirect_uri:
-                # Try to get the origin from the request
-                origin = self.headers.get('Origin', '')
-                referer = self.headers.get('Referer', '')
-                
-                if origin and origin.startswith('https://'):
-                    redirect_uri = origin + '/'
-                elif referer and referer.startswith('https://'):
-                    # Extract base URL from referer
-                    from urllib.parse import urlparse
-                    parsed = urlparse(referer)
-                    redirect_uri = f"{parsed.scheme}://{parsed.netloc}/"
-                else:
-                    # Fallback to default
-                    redirect_uri = "https://yoga-playlist-app.vercel.app/"
+            redirect_uri = self._get_redirect_uri()
             
-            print(f"[DEBUG] Using redirect URI: {redirect_uri}")
-            print(f"[DEBUG] Origin header: {self.headers.get('Origin', 'None')}")
-            print(f"[DEBUG] Referer header: {self.headers.get('Referer', 'None')}")
+            log.debug("Building auth URL", extra={
+                "redirect_uri": redirect_uri,
+                "origin": self.headers.get('Origin'),
+                "referer": self.headers.get('Referer')
+            })
             
             if not client_id or not client_secret:
                 response = {
@@ -69,16 +115,8 @@ class handler(BaseHTTPRequestHandler):
                     "error": "Spotify credentials not configured"
                 }
             else:
-                scope = "playlist-modify-public playlist-modify-private"
-                
-                sp_oauth = SpotifyOAuth(
-                    client_id=client_id,
-                    client_secret=client_secret,
-                    redirect_uri=redirect_uri,
-                    scope=scope,
-                    cache_path=None,  # Don't cache in serverless
-                    show_dialog=True  # Always show auth dialog
-                )
+                # Always show auth dialog
+                sp_oauth = self._get_oauth(redirect_uri, show_dialog=True)
                 
                 auth_url = sp_oauth.get_authorize_url()
                 
@@ -94,123 +132,150 @@ class handler(BaseHTTPRequestHandler):
                 "error": f"Failed to generate auth URL: {str(e)}"
             }
             
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        self.wfile.write(json.dumps(response).encode())
+        send_json(self, response)
+
+    def _send_needs_auth(self, headers=None):
+        log.debug("No auth code or session, requesting authorization")
+        send_json(self, {
+            "success": False,
+            "needs_auth": True,
+            "message": "Spotify authorization required. Please authorize first."
+        }, headers=headers)
 
     def _handle_create_playlist(self, data):
-        """Create playlist with authorization code"""
+        """Create playlist with an authorization code or a stored session"""
         try:
-            playlist_name = data['playlist_name']
-            track_ids = data['track_ids']
+            playlist_name = data.get('playlist_name')
+            track_ids = data.get('track_ids', [])
             auth_code = data.get('auth_code')
+            session = SESSIONS.load(self.headers.get('Cookie'))
+            session_cookie = None
             
-            print(f"[DEBUG] Create playlist request - Name: {playlist_name}, Tracks: {len(track_ids)}, Has auth code: {bool(auth_code)}")
+            log.info("Create playlist request", extra={
+                "playlist_name": playlist_name,
+                "tracks": len(track_ids),
+                "has_auth_code": bool(auth_code),
+                "has_session": bool(session)
+            })
             
-            if not auth_code:
-                # No auth code - need to get authorization first
-                print("[DEBUG] No auth code provided, requesting authorization")
-                response = {
-                    "success": False,
-                    "needs_auth": True,
-                    "message": "Spotify authorization required. Please authorize first."
-                }
+            if auth_code:
+                redirect_uri = self._get_redirect_uri()
+                log.debug("Exchanging auth code", extra={"redirect_uri": redirect_uri})
                 
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
+                sp_oauth = self._get_oauth(redirect_uri)
                 
-                self.wfile.write(json.dumps(response).encode())
-                return
-            
-            # Create playlist with auth code
-            client_id = os.getenv("SPOTIFY_CLIENT_ID")
-            client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
-            redirect_uri = os.getenv("SPOTIFY_REDIRECT_URI")
-            
-            # If no redirect URI in env, determine from request headers (same logic as auth URL)
-            if not redirect_uri:
-                origin = self.headers.get('Origin', '')
-                referer = self.headers.get('Referer', '')
+                # Get access token from auth code
+                try:
+                    token_info = sp_oauth.get_access_token(auth_code, check_cache=False)
+                except Exception as token_error:
+                    log.error("Failed to get access token", extra={"error": str(token_error)})
+                    self._send_error(f"Failed to get access token: {str(token_error)}", 400)
+                    return
                 
-                if origin and origin.startswith('https://'):
-                    redirect_uri = origin + '/'
-                elif referer and referer.startswith('https://'):
-                    from urllib.parse import urlparse
-                    parsed = urlparse(referer)
-                    redirect_uri = f"{parsed.scheme}://{parsed.netloc}/"
-                else:
-                    redirect_uri = "https://yoga-playlist-app.vercel.app/"
-            
-            print(f"[DEBUG] Token exchange using redirect URI: {redirect_uri}")
-            
-            sp_oauth = SpotifyOAuth(
-                client_id=client_id,
-                client_secret=client_secret,
-                redirect_uri=redirect_uri,
-                scope="playlist-modify-public playlist-modify-private",
-                cache_path=None
-            )
-            
-            # Get access token from auth code
-            print(f"[DEBUG] Attempting to get access token with auth code: {auth_code[:10]}...")
-            try:
-                token_info = sp_oauth.get_access_token(auth_code)
-                print(f"[DEBUG] Token info received: {bool(token_info)}")
-            except Exception as token_error:
-                print(f"[ERROR] Failed to get access token: {str(token_error)}")
-                self._send_error(f"Failed to get access token: {str(token_error)}", 400)
-                return
-            
-            if not token_info:
-                print("[ERROR] Token info is None")
-                self._send_error("Failed to get access token", 400)
+                if not token_info:
+                    log.error("Failed to get access token", extra={"error": "no token info"})
+                    self._send_error("Failed to get access token", 400)
+                    return
+                
+                # Create Spotify client with access token
+                access_token = token_info['access_token']
+                sp = spotipy.Spotify(auth=access_token)
+                user_id = sp.current_user()['id']
+                
+                # Remember tokens and user so later exports skip the auth dance
+                if SESSIONS.enabled:
+                    session_cookie = SESSIONS.dump(session_from_token(token_info, user_id))
+            elif session:
+                if needs_refresh(session):
+                    if not session.get('refresh_token'):
+                        self._send_needs_auth({'Set-Cookie': SESSIONS.clear()})
+                        return
+                    try:
+                        token_info = self._get_oauth(self._get_redirect_uri()).refresh_access_token(session['refresh_token'])
+                    except Exception as refresh_error:
+                        log.warning("Failed to refresh access token", extra={"error": str(refresh_error)})
+                        self._send_needs_auth({'Set-Cookie': SESSIONS.clear()})
+                        return
+                    # Spotify only sometimes rotates the refresh token
+                    token_info.setdefault('refresh_token', session['refresh_token'])
+                    session = session_from_token(token_info, session['user_id'])
+                    session_cookie = SESSIONS.dump(session)
+                
+                access_token = session['access_token']
+                sp = spotipy.Spotify(auth=access_token)
+                user_id = session['user_id']
+            else:
+                # No auth code or session - need to get authorization first
+                self._send_needs_auth()
                 return
             
-            # Create Spotify client with access token
-            sp = spotipy.Spotify(auth=token_info['access_token'])
-            
-            # Get user info
-            user_info = sp.current_user()
-            user_id = user_info['id']
+            headers = {'Set-Cookie': session_cookie} if session_cookie else None
             
-            # Create playlist
-            playlist = sp.user_playlist_create(
-                user=user_id,
-                name=playlist_name,
-                description="Generated by Yoga Playlist AI",
-                public=False
-            )
+            if data.get('async') and jobs_enabled():
+                # Authorization is done - the worker only needs the token and user
+                job_id = get_job_queue().enqueue(EXPORT_PLAYLIST, {
+                    "access_token": access_token,
+                    "user_id": user_id,
+                    "playlist_name": playlist_name,
+                    "track_ids": track_ids,
+                    "playlist_id": data.get('playlist_id'),
+                    "playlists": data.get('playlists')
+                })
+                send_json(self, {
+                    "success": True,
+                    "job_id": job_id,
+                    "status": "queued",
+                    "status_url": f"/api/jobs?id={job_id}"
+                }, 202, headers=headers)
+                return
             
-            # Add tracks to playlist
-            if track_ids and len(track_ids) > 0:
-                # Spotify API accepts max 100 tracks at once
-                for i in range(0, len(track_ids), 100):
-                    batch = track_ids[i:i+100]
-                    sp.playlist_add_items(playlist['id'], batch)
+            exporter = PlaylistExporter(sp, user_id=user_id)
             
-            response = {
-                "success": True,
-                "message": f"✅ Created playlist '{playlist_name}' with {len(track_ids)} tracks",
-                "playlist_created": True,
-                "playlist_url": playlist['external_urls']['spotify'],
-                "playlist_id": playlist['id']
-            }
+            if data.get('playlists'):
+                # Bulk export - every playlist shares this one authorization
+                results = exporter.export_many(data['playlists'])
+                created = sum(1 for result in results if result['success'])
+                
+                response = {
+                    "success": created == len(results),
+                    "message": f"✅ Created {created} of {len(results)} playlists",
+                    "playlist_created": created > 0,
+                    "results": results
+                }
+            else:
+                try:
+                    # Batches at the API maximum, retries failed chunks and,
+                    # given a playlist_id, resumes a partially written playlist
+                    result = exporter.export(
+                        playlist_name,
+                        track_ids,
+                        playlist_id=data.get('playlist_id')
+                    )
+                except PlaylistExportError as export_error:
+                    send_json(self, {
+                        "success": False,
+                        "error": f"Failed to create playlist: {str(export_error)}",
+                        "resumable": export_error.playlist_id is not None,
+                        "playlist_id": export_error.playlist_id,
+                        "playlist_url": export_error.playlist_url,
+                        "added": export_error.added,
+                        "track_ids": export_error.track_ids
+                    }, 500, headers=headers)
+                    return
+                
+                response = {
+                    "success": True,
+                    "message": f"✅ Created playlist '{playlist_name}' with {len(track_ids)} tracks",
+                    "playlist_created": True,
+                    "playlist_url": result['playlist_url'],
+                    "playlist_id": result['playlist_id']
+                }
             
         except Exception as e:
             self._send_error(f"Failed to create playlist: {str(e)}", 500)
             return
             
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        self.wfile.write(json.dumps(response).encode())
+        send_json(self, response, headers=headers)
 
     def do_OPTIONS(self):
         # Handle CORS preflight requests
@@ -222,14 +287,4 @@ class handler(BaseHTTPRequestHandler):
 
     def _send_error(self, message, status_code):
         """Helper to send error responses"""
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        response = {
-            "success": False,
-            "error": message
-        }
-        
-        self.wfile.write(json.dumps(response).encode())
\ No newline at end of file
+        send_error(self, message, status_code)
\ No newline at end of file
@@ -1,9 +1,16 @@
 from http.server import BaseHTTPRequestHandler
 import json
+import sys
 import os
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-import re
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.responses import send_json, send_error, wants_compact, compact_playlist_response
+from utils.jobs import jobs_enabled, get_job_queue
+from tools.playlist_generator import validate_request, generate_playlist
+from tools.playlist_history import flush_after_response
+from tools.jobs import GENERATE_PLAYLIST
 
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
@@ -18,264 +25,33 @@ class handler(BaseHTTPRequestHandler):
             return
         
         # Validate required fields
-        required_fields = ['class_name', 'duration']
-        for field in required_fields:
-            if field not in data:
-                self._send_error(f"Missing required field: {field}", 400)
-                return
-
-        class_name = data['class_name']
-        class_description = data.get('class_description', '')
-        music_preferences = data.get('music_preferences', '')
-        duration = int(data['duration'])
+        error = validate_request(data)
+        if error:
+            self._send_error(error, 400)
+            return
         
-        # Handle empty music preferences
-        if not music_preferences.strip():
-            music_preferences = "music appropriate for yoga"
-            
-        try:
-            # Handle empty music preferences
-            if not music_preferences.strip():
-                music_preferences = "music appropriate for yoga"
-
-            # Generate playlist
-            playlist = self._generate_real_playlist(class_name, class_description, music_preferences, duration)
-            
-            # Search for real Spotify tracks
-            spotify_results = self._search_spotify_tracks(playlist)
-            
-            response = {
+        if data.get('async') and jobs_enabled():
+            # Hand off to the job queue and let the client poll /api/jobs
+            job_id = get_job_queue().enqueue(GENERATE_PLAYLIST, dict(data, compact=wants_compact(self, data)))
+            send_json(self, {
                 "success": True,
-                "playlist": playlist,
-                "spotify_integration": spotify_results,
-                "ready_for_export": len(spotify_results.get("track_ids", [])) > 0,
-                "source": "langchain_agent_with_spotify"
-            }
-            
-        except Exception as e:
-            # Fallback to mock
-            # Handle empty music preferences
-            if not music_preferences.strip():
-                music_preferences = "music appropriate for yoga"
-
-            playlist = self._generate_mock_playlist(class_name, music_preferences, duration)
-            
-            response = {
-                "success": True,
-                "playlist": playlist,
-                "spotify_integration": {
-                    "search_results": {
-                        "found_count": 0,
-                        "total_tracks": 0,
-                        "error": str(e)
-                    },
-                    "track_ids": []
-                },
-                "ready_for_export": False,
-                "source": f"fallback_due_to: {str(e)}"
-            }
-        
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        self.wfile.write(json.dumps(response).encode())
-        return
-
-    def _generate_real_playlist(self, class_name, class_description, music_preferences, duration):
-        """Generate playlist using real LangChain agent"""
-        from langchain_openai import ChatOpenAI
-        from langchain_core.prompts import ChatPromptTemplate
-        
-        llm = ChatOpenAI(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            model="gpt-3.5-turbo",
-            temperature=0.9
-        )
-        
-        prompt = ChatPromptTemplate.from_template("""
-        Create a structured playlist for this yoga class that matches the following criteria:
-        
-        Class Name: {class_name}
-        Class Description: {class_description}
-        Duration: {duration} minutes
-        Music Preferences: {music_preferences}
-        
-        Ensure the playlist contains enough tracks to cover the entire class duration, with appropriate BPM and energy levels for each section.
-        
-        IMPORTANT: Use ONLY dashes (-) for track listings, NEVER use numbers (1., 2., 3., etc.).
-                                                  
-        Format (use this exact format):
-        WARMUP (X minutes)
-        - Artist - Song Title
-        - Artist - Song Title
-        
-        FLOW/ACTIVE (X minutes)
-        - Artist - Song Title
-        - Artist - Song Title
-        
-        COOLDOWN/SAVASANA (X minutes)
-        - Artist - Song Title
-        - Artist - Song Title
-        """)
-        
-        chain = prompt | llm
-        result = chain.invoke({
-            "class_name": class_name,
-            "class_description": class_description,
-            "duration": duration,
-            "music_preferences": music_preferences
-        })
-        
-        # Clean up any numbered lists that slip through
-        playlist_content = result.content.strip()
-        playlist_content = self._convert_numbers_to_dashes(playlist_content)
-        
-        return playlist_content
-    
-    def _convert_numbers_to_dashes(self, text):
-        """Convert numbered lists to dashed lists"""
-        import re
-        
-        # Pattern to match "1. Artist - Song" or "10. Artist - Song" etc.
-        # and replace with "- Artist - Song"
-        pattern = r'^\s*\d+\.\s+'
-        
-        lines = text.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            # If line starts with number followed by period, replace with dash
-            if re.match(pattern, line):
-                cleaned_line = re.sub(pattern, '- ', line)
-                cleaned_lines.append(cleaned_line)
-            else:
-                cleaned_lines.append(line)
-        
-        return '\n'.join(cleaned_lines)
-
-    def _search_spotify_tracks(self, playlist_text):
-        """Search Spotify for tracks mentioned in the playlist"""
-        try:
-            # Setup Spotify client
-            client_id = os.getenv("SPOTIFY_CLIENT_ID")
-            client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
-            
-            if not client_id or not client_secret:
-                return {
-                    "search_results": {
-                        "found_count": 0,
-                        "total_tracks": 0,
-                        "error": "Spotify credentials not configured"
-                    },
-                    "track_ids": []
-                }
-            
-            client_credentials_manager = SpotifyClientCredentials(
-                client_id=client_id,
-                client_secret=client_secret
-            )
-            sp = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
-            
-            # Extract tracks from playlist text
-            tracks = self._extract_tracks_from_text(playlist_text)
-            
-            if not tracks:
-                return {
-                    "search_results": {
-                        "found_count": 0,
-                        "total_tracks": 0,
-                        "error": "No tracks found in playlist text"
-                    },
-                    "track_ids": []
-                }
-            
-            # Search for each track
-            found_tracks = []
-            track_ids = []
-            
-            for track_query in tracks:
-                try:
-                    # Search Spotify
-                    results = sp.search(q=track_query, type='track', limit=1)
-                    
-                    if results['tracks']['items']:
-                        track = results['tracks']['items'][0]
-                        found_tracks.append({
-                            'original_query': track_query,
-                            'spotify_data': {
-                                'spotify_id': track['id'],
-                                'name': track['name'],
-                                'artists': [artist['name'] for artist in track['artists']],
-                                'uri': track['uri']
-                            }
-                        })
-                        track_ids.append(track['id'])
-                    
-                except Exception as search_error:
-                    print(f"Error searching for track '{track_query}': {search_error}")
-                    continue
-            
-            return {
-                "search_results": {
-                    "found_count": len(found_tracks),
-                    "total_tracks": len(tracks),
-                    "successful_tracks": found_tracks
-                },
-                "track_ids": track_ids
-            }
-            
-        except Exception as e:
-            return {
-                "search_results": {
-                    "found_count": 0,
-                    "total_tracks": 0,
-                    "error": f"Spotify search failed: {str(e)}"
-                },
-                "track_ids": []
-            }
-
-    def _extract_tracks_from_text(self, playlist_text):
-        """Extract track names from playlist text (same logic as your MusicIntegrationAgent)"""
-        tracks = []
-        lines = playlist_text.split('\n')
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"/api/jobs?id={job_id}"
+            }, 202)
+            return
         
-        for line in lines:
-            line = line.strip()
-            # Look for lines that start with • OR - and contain track info
-            if (line.startswith('•') or line.startswith('-')) and ' - ' in line:
-                # Remove the bullet point or dash and clean up
-                if line.startswith('•'):
-                    track_info = line[1:].strip()
-                elif line.startswith('-'):
-                    track_info = line[1:].strip()
-                tracks.append(track_info)
+        # Generate playlist text, then search for real Spotify tracks
+        response = generate_playlist(data)
         
-        return tracks
-
-    def _generate_mock_playlist(self, class_name, music_preferences, duration):
-        """Fallback mock playlist"""
-        warmup_duration = int(duration * 0.15)
-        flow_duration = int(duration * 0.45)
-        peak_duration = int(duration * 0.25)
-        cooldown_duration = int(duration * 0.15)
+        if wants_compact(self, data):
+            response = compact_playlist_response(response)
         
-        return f"""**WARMUP ({warmup_duration} minutes)**
-BPM: 70-85 | Energy: Building, welcoming
-- Sample Artist - Sample Song 1
-
-**FLOW/ACTIVE ({flow_duration} minutes)**
-BPM: 90-110 | Energy: Sustained, rhythmic
-- Sample Artist - Sample Song 2
-
-**PEAK ({peak_duration} minutes)**
-BPM: 100-120 | Energy: High intensity
-- Sample Artist - Sample Song 3
-
-**COOLDOWN/SAVASANA ({cooldown_duration} minutes)**
-BPM: 60-75 | Energy: Peaceful
-- Sample Artist - Sample Song 4"""
+        send_json(self, response)
+        # The client has its response; write the history row before the instance can be frozen
+        self.wfile.flush()
+        flush_after_response()
+        return
 
     def do_OPTIONS(self):
         self.send_response(200)
@@ -285,10 +61,4 @@ BPM: 60-75 | Energy: Peaceful
         self.end_headers()
 
     def _send_error(self, message, status_code):
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        response = {"success": False, "error": message}
-        self.wfile.write(json.dumps(response).encode())
\ No newline at end of file
+        send_error(self, message, status_code)
\ No newline at end of file
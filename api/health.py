@@ -1,18 +1,18 @@
 from http.server import BaseHTTPRequestHandler
-import json
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.health import get_health
+from utils.responses import send_json
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        response = {
-            "status": "healthy",
-            "message": "API is working",
-            "timestamp": "2024-01-01T00:00:00Z"
-        }
+        # Built from recent real upstream calls - never calls upstream itself
+        readiness = get_health().readiness()
+        response = dict(readiness, message="API is working")
         
-        self.wfile.write(json.dumps(response).encode())
+        send_json(self, response, headers={'Cache-Control': 'public, max-age=10'})
         return
\ No newline at end of file
@@ -1,13 +1,14 @@
 from http.server import BaseHTTPRequestHandler
-import json
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.responses import send_json
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
         response = {
             "message": "Hello from Python!",
             "status": "working",
@@ -15,15 +16,10 @@ class handler(BaseHTTPRequestHandler):
             "path": self.path
         }
         
-        self.wfile.write(json.dumps(response).encode())
+        send_json(self, response)
         return
 
     def do_POST(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
         response = {
             "message": "Hello from Python!",
             "status": "working", 
@@ -31,5 +27,5 @@ class handler(BaseHTTPRequestHandler):
             "path": self.path
         }
         
-        self.wfile.write(json.dumps(response).encode())
+        send_json(self, response)
         return
\ No newline at end of file
@@ -0,0 +1,47 @@
+from http.server import BaseHTTPRequestHandler
+import sys
+import os
+from urllib.parse import urlparse, parse_qs
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.responses import send_json, send_error
+from utils.jobs import jobs_enabled, get_job_queue
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        """Status, progress and (once finished) result of a background job"""
+        if not jobs_enabled():
+            self._send_error("Background jobs are not enabled", 404)
+            return
+        
+        job_id = parse_qs(urlparse(self.path).query).get('id', [None])[0]
+        if not job_id:
+            self._send_error("Missing required parameter: id", 400)
+            return
+        
+        job = get_job_queue().get(job_id)
+        if job is None:
+            self._send_error("Job not found", 404)
+            return
+        
+        finished = job['status'] in ('succeeded', 'failed')
+        # Finished jobs never change; running ones must not be cached
+        headers = {'Cache-Control': 'private, max-age=3600' if finished else 'no-store'}
+        if not finished:
+            # Hint for client poll interval in seconds
+            headers['Retry-After'] = '1'
+        
+        send_json(self, dict(job, success=True), headers=headers)
+        return
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+
+    def _send_error(self, message, status_code):
+        send_error(self, message, status_code)
\ No newline at end of file
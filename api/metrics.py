@@ -0,0 +1,21 @@
+from http.server import BaseHTTPRequestHandler
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import CONTENT_TYPE, render
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # Prometheus text format - numbers are per warm instance
+        body = render().encode('utf-8')
+        
+        self.send_response(200)
+        self.send_header('Content-type', CONTENT_TYPE)
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return
\ No newline at end of file
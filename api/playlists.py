@@ -0,0 +1,60 @@
+from http.server import BaseHTTPRequestHandler
+import sys
+import os
+from urllib.parse import urlparse, parse_qs
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pagination import parse_limit
+from utils.responses import send_json, send_error, compact_playlist_response
+from utils.log import get_logger
+from tools.playlist_history import get_playlist_history
+
+log = get_logger("api.playlists")
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        """A user's generated playlists, newest first"""
+        history = get_playlist_history()
+        if history is None:
+            self._send_error("Playlist history is not enabled", 404)
+            return
+        
+        query_params = parse_qs(urlparse(self.path).query)
+        user_id = query_params.get('user_id', [None])[0]
+        if not user_id:
+            self._send_error("Missing required parameter: user_id", 400)
+            return
+        cursor = query_params.get('cursor', [None])[0]
+        limit = parse_limit(query_params.get('limit', [None])[0], DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        
+        try:
+            rows, next_cursor = history.user_history(user_id, limit, cursor)
+        except Exception as e:
+            log.warning("Playlist history read failed", extra={"user_id": user_id, "error": str(e)})
+            self._send_error(f"Failed to load playlist history: {str(e)}", 500)
+            return
+        
+        playlists = [dict(row, response=compact_playlist_response(row['response'])) for row in rows]
+        send_json(self, {
+            "success": True,
+            "playlists": playlists,
+            "total": len(playlists),
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }, headers={'Cache-Control': 'private, no-store'})
+        return
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+
+    def _send_error(self, message, status_code):
+        send_error(self, message, status_code)
@@ -0,0 +1,54 @@
+from http.server import BaseHTTPRequestHandler
+import json
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.responses import send_json, send_error, wants_compact, compact_playlist_response
+from utils.llm import LLMError
+from tools.playlist_sections import SectionNotFoundError, regenerate_section, validate_section_request
+
+class handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        """Regenerate one section of an existing playlist, keeping the others"""
+        content_length = int(self.headers.get('Content-Length', 0))
+        post_data = self.rfile.read(content_length)
+        
+        try:
+            data = json.loads(post_data.decode('utf-8')) if post_data else {}
+        except json.JSONDecodeError:
+            self._send_error("Invalid JSON in request body", 400)
+            return
+        
+        error = validate_section_request(data)
+        if error:
+            self._send_error(error, 400)
+            return
+        
+        try:
+            response = regenerate_section(data)
+        except SectionNotFoundError as e:
+            self._send_error(str(e), 404)
+            return
+        except LLMError as e:
+            # The caller keeps its current playlist - nothing is degraded here
+            self._send_error(f"Could not regenerate the section: {e}", 503)
+            return
+        
+        if wants_compact(self, data):
+            response = compact_playlist_response(response)
+        
+        send_json(self, response)
+        return
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+
+    def _send_error(self, message, status_code):
+        send_error(self, message, status_code)
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import sys
 import os
@@ -11,34 +11,64 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from agents.coordinator import CoordinatorAgent
 from agents.music_integration import MusicIntegrationAgent
 from tools.spotify_tool import SpotifyTool
+from tools.playlist_generator import request_fingerprint
+from tools.playlist_sections import SectionNotFoundError, regenerate_section, validate_section_request
+from utils.singleflight import SingleFlight
+from utils.health import get_health
+from utils.llm import LLMError
+from utils.log import REQUEST_ID_HEADER, context_from_headers, current_request_id, get_logger
+from utils import metrics
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend requests
+log = get_logger("api")
 
 # Initialize agents
 coordinator = None
 music_integration = None
 
+# Concurrent identical generate requests share one agent run
+generations = SingleFlight()
+
 def initialize_agents():
     """Initialize agents when the server starts"""
     global coordinator, music_integration
     try:
         coordinator = CoordinatorAgent()
         music_integration = MusicIntegrationAgent()
-        print("✅ Agents initialized successfully")
+        log.info("Agents initialized")
         return True
     except Exception as e:
-        print(f"❌ Failed to initialize agents: {e}")
+        log.error("Failed to initialize agents", extra={"error": str(e)})
         return False
 
+@app.before_request
+def enter_request_context():
+    """Tag this request's log records with its request ID (X-Request-ID or a new one)"""
+    g.log_context = context_from_headers(request.headers)
+    g.log_context.__enter__()
+
+@app.after_request
+def add_request_id(response):
+    response.headers[REQUEST_ID_HEADER] = current_request_id() or ""
+    return response
+
+@app.teardown_request
+def exit_request_context(exc):
+    context = g.pop('log_context', None)
+    if context is not None:
+        context.__exit__(None, None, None)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "agents_initialized": coordinator is not None,
-        "timestamp": "2024-01-01T00:00:00Z"
-    })
+    """Health check endpoint - summarises recent upstream calls, never calls upstream"""
+    readiness = get_health().readiness()
+    return jsonify(dict(readiness, agents_initialized=coordinator is not None))
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text metrics for this process"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE, headers={'Cache-Control': 'no-store'})
 
 @app.route('/api/classes', methods=['GET'])
 def get_classes():
@@ -107,30 +137,11 @@ def generate_playlist():
         if not music_integration:
             return jsonify({"error": "Music integration not initialized"}), 500
         
-        # Create a simple class description
-        class_info = f"{class_name} class ({duration} minutes)"
-        
-        # Generate playlist using music curation agent directly
-        playlist = coordinator.music_curator.recommend_music(
-            class_info=class_info,
-            music_preferences=music_preferences,
-            duration_minutes=duration
-        )
-        
-        # Process with music integration to find Spotify tracks
-        playlist_result = music_integration.process_full_playlist(
-            class_name=class_name,
-            playlist_text=playlist
+        response = generations.do(
+            request_fingerprint(data),
+            _run_generation, class_name, music_preferences, duration
         )
         
-        # Combine results
-        response = {
-            "success": True,
-            "playlist": playlist,
-            "spotify_integration": playlist_result,
-            "ready_for_export": playlist_result.get("ready_for_spotify", False)
-        }
-        
         return jsonify(response)
         
     except Exception as e:
@@ -139,6 +150,50 @@ def generate_playlist():
             "error": str(e)
         }), 500
 
+def _run_generation(class_name, music_preferences, duration):
+    """Curate a playlist with the agents and resolve it on Spotify"""
+    with metrics.GENERATION_SECONDS.labels(source="agents").time():
+        return _curate_and_resolve(class_name, music_preferences, duration)
+
+def _curate_and_resolve(class_name, music_preferences, duration):
+    # Create a simple class description
+    class_info = f"{class_name} class ({duration} minutes)"
+    
+    # Generate playlist using music curation agent directly
+    playlist = coordinator.music_curator.recommend_music(
+        class_info=class_info,
+        music_preferences=music_preferences,
+        duration_minutes=duration
+    )
+    
+    # Process with music integration to find Spotify tracks
+    playlist_result = music_integration.process_full_playlist(
+        class_name=class_name,
+        playlist_text=playlist
+    )
+    
+    # Combine results
+    return {
+        "success": True,
+        "playlist": playlist,
+        "spotify_integration": playlist_result,
+        "ready_for_export": playlist_result.get("ready_for_spotify", False)
+    }
+
+@app.route('/api/regenerate-section', methods=['POST'])
+def regenerate_playlist_section():
+    """Regenerate one section of an existing playlist, keeping the others"""
+    data = request.get_json() or {}
+    error = validate_section_request(data)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    try:
+        return jsonify(regenerate_section(data))
+    except SectionNotFoundError as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+    except LLMError as e:
+        return jsonify({"success": False, "error": f"Could not regenerate the section: {e}"}), 503
+
 @app.route('/api/create-spotify-playlist', methods=['POST'])
 def create_spotify_playlist():
     """Create actual Spotify playlist"""
@@ -186,30 +241,16 @@ def create_spotify_playlist():
 
 @app.route('/api/test-spotify', methods=['GET'])
 def test_spotify():
-    """Test Spotify connection"""
-    try:
-        spotify_tool = SpotifyTool()
-        result = spotify_tool.run("action:test")
-        
-        if result.startswith("✅"):
-            return jsonify({
-                "success": True,
-                "message": result,
-                "connected": True
-            })
-        else:
-            return jsonify({
-                "success": False,
-                "message": result,
-                "connected": False
-            })
-            
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e),
-            "connected": False
-        }), 500
+    """Spotify status from recent searches (probed in the background, not per request)"""
+    spotify = get_health().ensure_known("spotify")
+    connected = spotify['status'] in ("up", "degraded")
+    error = (spotify.get('last_error') or {}).get('message', 'no recent successful calls')
+    return jsonify({
+        "success": connected,
+        "message": "✅ Connected to Spotify API successfully" if connected else f"❌ Spotify connection failed: {error}",
+        "connected": connected,
+        "health": spotify
+    })
 
 @app.route('/api/classes', methods=['POST'])
 def add_class():
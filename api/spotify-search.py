@@ -1,26 +1,20 @@
 from http.server import BaseHTTPRequestHandler
 import json
+import sys
 import os
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 import re
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.clients import get_spotify_client
+from utils.responses import send_json, send_error
+
 class handler(BaseHTTPRequestHandler):
     def _get_spotify_client(self):
-        """Get Spotify client using Client Credentials flow"""
+        """Get the shared Spotify client using Client Credentials flow"""
         try:
-            client_id = os.getenv("SPOTIFY_CLIENT_ID")
-            client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
-            
-            if not client_id or not client_secret:
-                return None
-                
-            client_credentials_manager = SpotifyClientCredentials(
-                client_id=client_id,
-                client_secret=client_secret
-            )
-            
-            return spotipy.Spotify(client_credentials_manager=client_credentials_manager)
+            return get_spotify_client()
         except Exception as e:
             return None
 
@@ -44,12 +38,7 @@ class handler(BaseHTTPRequestHandler):
             # Extract tracks from playlist text and search Spotify
             result = self._search_playlist_tracks(playlist_text)
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            self.wfile.write(json.dumps(result).encode())
+            send_json(self, result)
             return
             
         except Exception as e:
@@ -145,14 +134,4 @@ class handler(BaseHTTPRequestHandler):
 
     def _send_error(self, message, status_code):
         """Helper to send error responses"""
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        response = {
-            "success": False,
-            "error": message
-        }
-        
-        self.wfile.write(json.dumps(response).encode())
\ No newline at end of file
+        send_error(self, message, status_code)
\ No newline at end of file
@@ -1,61 +1,35 @@
 from http.server import BaseHTTPRequestHandler
-import json
+import sys
 import os
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 
-class handler(BaseHTTPRequestHandler):
-    def _get_spotify_client(self):
-        """Get Spotify client using Client Credentials flow"""
-        try:
-            client_id = os.getenv("SPOTIFY_CLIENT_ID")
-            client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
-            
-            if not client_id or not client_secret:
-                return None
-                
-            client_credentials_manager = SpotifyClientCredentials(
-                client_id=client_id,
-                client_secret=client_secret
-            )
-            
-            return spotipy.Spotify(client_credentials_manager=client_credentials_manager)
-        except Exception as e:
-            return None
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.health import get_health
+from utils.responses import send_json
 
+class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        try:
-            # Test real Spotify connection
-            sp = self._get_spotify_client()
-            
-            if not sp:
-                response = {
-                    "success": False,
-                    "message": "❌ Spotify credentials not configured",
-                    "connected": False
-                }
-            else:
-                # Test with a simple search
-                results = sp.search(q="test", type='track', limit=1)
-                
-                response = {
-                    "success": True,
-                    "message": "✅ Connected to Spotify API successfully",
-                    "connected": True,
-                    "test_results": f"Found {len(results['tracks']['items'])} test tracks"
-                }
-                
-        except Exception as e:
+        # Status from recent Spotify searches; a cold instance probes once,
+        # after that probes run in the background on a fixed interval
+        spotify = get_health().ensure_known("spotify")
+        connected = spotify['status'] in ("up", "degraded")
+        
+        if connected:
+            response = {
+                "success": True,
+                "message": "✅ Connected to Spotify API successfully",
+                "connected": True,
+                "health": spotify
+            }
+        else:
+            error = (spotify.get('last_error') or {}).get('message', 'no recent successful calls')
             response = {
                 "success": False,
-                "message": f"❌ Spotify connection failed: {str(e)}",
-                "connected": False
+                "message": f"❌ Spotify connection failed: {error}",
+                "connected": False,
+                "health": spotify
             }
         
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        self.wfile.write(json.dumps(response).encode())
+        send_json(self, response, headers={'Cache-Control': 'public, max-age=10'})
         return
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""Bulk playlist generation from a studio schedule
+
+Reads a CSV/JSON schedule (columns: id, class_name, class_description,
+music_preferences, duration, playlist_name), generates and resolves a
+playlist per row and optionally exports each one to Spotify. Results are
+appended to a JSON Lines file as rows finish; running the same command
+again resumes after an interruption.
+
+Usage:
+    python batch.py schedule.csv --output playlists.jsonl --workers 8
+    python batch.py schedule.json --export          # also create the Spotify playlists
+"""
+import argparse
+import json
+import os
+
+from dotenv import load_dotenv
+
+from tools.schedule_runner import ScheduleRunner, load_schedule
+
+load_dotenv()
+
+
+def build_exporter(cache_path):
+    """Exporter for the user who authorizes once in the browser (token cached on disk)"""
+    import spotipy
+    from spotipy.oauth2 import SpotifyOAuth
+    from tools.playlist_exporter import PlaylistExporter
+
+    auth_manager = SpotifyOAuth(
+        client_id=os.getenv("SPOTIFY_CLIENT_ID"),
+        client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
+        redirect_uri=os.getenv("SPOTIFY_REDIRECT_URI"),
+        scope="playlist-modify-public playlist-modify-private",
+        cache_path=cache_path
+    )
+    exporter = PlaylistExporter(spotipy.Spotify(auth_manager=auth_manager))
+    print(f"🔐 Exporting as Spotify user {exporter.get_user_id()}")
+    return exporter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate playlists for a whole class schedule")
+    parser.add_argument('schedule', help='.csv, .json or .jsonl schedule')
+    parser.add_argument('--output', default='playlists.jsonl', help='JSON Lines results (also the resume state)')
+    parser.add_argument('--workers', type=int, default=4, help='rows processed in parallel')
+    parser.add_argument('--export', action='store_true', help='create a Spotify playlist per row')
+    parser.add_argument('--spotify-cache', default='.spotify_cache', help='token cache for --export')
+    parser.add_argument('--fresh', action='store_true', help='skip caches and precomputed pools')
+    args = parser.parse_args()
+
+    rows = load_schedule(args.schedule)
+    exporter = build_exporter(args.spotify_cache) if args.export else None
+    runner = ScheduleRunner(args.output, workers=args.workers, exporter=exporter, fresh=args.fresh)
+
+    try:
+        stats = runner.run(rows)
+    except KeyboardInterrupt:
+        print(f"\n🛑 Interrupted - run the same command again to resume from {args.output}")
+        return
+
+    print(f"📊 {json.dumps(stats, indent=2)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Reproducible latency benchmark of the generation pipeline
+
+Record a run once against the live services, then replay it anywhere with
+no network: every OpenAI, Spotify and Supabase response comes from the
+recording, with its original latency scaled by --speed.
+
+Usage:
+    python benchmarks/pipeline_replay.py --record runs/vinyasa.jsonl.gz
+    python benchmarks/pipeline_replay.py --replay runs/vinyasa.jsonl.gz --speed 1.0
+    python benchmarks/pipeline_replay.py --replay runs/agents.jsonl.gz --pipeline agents
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+# Caches and precomputed pools would hide the upstream calls being measured
+os.environ.setdefault("SEMANTIC_CACHE", "off")
+os.environ.setdefault("TRACK_CATALOG", "off")
+os.environ.setdefault("PLAYLIST_TEMPLATES", "off")
+
+from utils.recorder import recording, replaying
+
+REQUESTS = [
+    {"class_name": "Vinyasa Flow", "class_description": "Dynamic flow linking breath with movement",
+     "music_preferences": "lofi hip hop", "duration": 60},
+    {"class_name": "Yin Yoga", "class_description": "Long passive holds",
+     "music_preferences": "ambient", "duration": 75},
+    {"class_name": "Power Yoga", "class_description": "Vigorous, fitness-based vinyasa",
+     "music_preferences": "electronic", "duration": 45},
+]
+
+# Replays need no real credentials, only values the clients accept
+PLACEHOLDER_ENV = {
+    "OPENAI_API_KEY": "sk-replay",
+    "SPOTIFY_CLIENT_ID": "replay",
+    "SPOTIFY_CLIENT_SECRET": "replay",
+    "SUPABASE_URL": "https://replay.supabase.co",
+    "SUPABASE_KEY": "replay",
+}
+
+
+def run_api(request):
+    from tools.playlist_generator import generate_playlist
+    return generate_playlist(dict(request, fresh=True))
+
+
+def run_agents(request):
+    from agents.coordinator import CoordinatorAgent
+    from agents.music_integration import MusicIntegrationAgent
+
+    result = CoordinatorAgent().generate_playlist(request['class_name'], request['music_preferences'],
+                                                  request['duration'])
+    if result.get('success'):
+        result['spotify'] = MusicIntegrationAgent().search_playlist_tracks(result['playlist'])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay the generation pipeline")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--record', metavar='PATH', help='run against live services and save the traffic')
+    mode.add_argument('--replay', metavar='PATH', help='serve the traffic from an earlier recording')
+    parser.add_argument('--speed', type=float, default=1.0, help='latency scale for replay (0 = instant)')
+    parser.add_argument('--pipeline', choices=['api', 'agents'], default='api',
+                        help='tools/playlist_generator.py (api) or CoordinatorAgent + MusicIntegrationAgent')
+    parser.add_argument('--rounds', type=int, default=1, help='times each request is run')
+    args = parser.parse_args()
+
+    if args.replay:
+        for name, value in PLACEHOLDER_ENV.items():
+            os.environ.setdefault(name, value)
+        session = replaying(args.replay, speed=args.speed)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(args.record)), exist_ok=True)
+        session = recording(args.record)
+
+    run = run_agents if args.pipeline == 'agents' else run_api
+    timings = []
+    with session as cassette:
+        for _ in range(args.rounds):
+            for request in REQUESTS:
+                started = time.perf_counter()
+                result = run(request)
+                timings.append(time.perf_counter() - started)
+                print(f"{request['class_name']:<14} {timings[-1] * 1000:8.0f} ms  "
+                      f"source={result.get('source', result.get('generated_by'))}")
+
+    print(f"\n{args.pipeline} pipeline, {len(timings)} runs: "
+          f"median {statistics.median(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms")
+    print(f"Recorder: {cassette.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Compare the single-router layout (api/index.py) with the split layout.
+
+Cold starts are modelled from a synthetic request trace: in the split layout
+every endpoint file is its own serverless function with its own idle timeout,
+while in the router layout all traffic keeps one function warm. Cold start
+cost is measured by importing each endpoint in a fresh interpreter, and warm
+dispatch latency is measured in-process against /api/health and /api/hello.
+
+Usage:
+    python benchmarks/router_cold_start.py --requests 2000 --rate 0.2 --idle-timeout 300
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'api'))
+
+# Rough share of traffic per route, taken from a page view:
+# classes + health + test-spotify on load, then generate and sometimes export
+TRAFFIC_MIX = {
+    'classes': 0.30,
+    'health': 0.25,
+    'test-spotify': 0.25,
+    'generate-playlist': 0.15,
+    'create-spotify-playlist': 0.05,
+}
+
+IMPORT_SNIPPET = """
+import importlib.util, os, sys, time
+root = sys.argv[1]
+sys.path.append(root)
+start = time.perf_counter()
+for name in sys.argv[2:]:
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), os.path.join(root, 'api', name + '.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+class FakeSocket:
+    """Just enough of a socket for BaseHTTPRequestHandler"""
+
+    def __init__(self, raw_request):
+        self._rfile = io.BytesIO(raw_request)
+        self.output = io.BytesIO()
+
+    def makefile(self, mode, *args, **kwargs):
+        return self._rfile
+
+    def sendall(self, data):
+        self.output.write(data)
+
+
+def measure_import_ms(names, repeats):
+    """Median time to import the given endpoint files in a fresh interpreter"""
+    samples = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, '-c', IMPORT_SNIPPET, ROOT] + list(names),
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        samples.append(float(result.stdout.strip()))
+    return statistics.median(samples)
+
+
+def build_trace(count, rate, seed):
+    """Poisson arrivals (rate = requests/second) with routes drawn from TRAFFIC_MIX"""
+    rng = random.Random(seed)
+    routes = list(TRAFFIC_MIX)
+    weights = [TRAFFIC_MIX[r] for r in routes]
+
+    now = 0.0
+    trace = []
+    for _ in range(count):
+        now += rng.expovariate(rate)
+        trace.append((now, rng.choices(routes, weights)[0]))
+    return trace
+
+
+def simulate(trace, idle_timeout, cold_cost_ms, function_for):
+    """Count cold starts and the latency they add for a given layout"""
+    last_seen = {}
+    cold_starts = 0
+    added = []
+    for timestamp, route in trace:
+        function = function_for(route)
+        previous = last_seen.get(function)
+        if previous is None or timestamp - previous > idle_timeout:
+            cold_starts += 1
+            added.append(cold_cost_ms[function])
+        else:
+            added.append(0.0)
+        last_seen[function] = timestamp
+    return cold_starts, added
+
+
+def measure_warm_dispatch(handler_class, path, repeats):
+    """Mean in-process latency of a GET request through a handler class"""
+    raw = f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode()
+    start = time.perf_counter()
+    # Silence the per-request access log BaseHTTPRequestHandler writes to stderr
+    with contextlib.redirect_stderr(io.StringIO()):
+        for _ in range(repeats):
+            handler_class(FakeSocket(raw), ('127.0.0.1', 0), None)
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=0.2, help='requests per second')
+    parser.add_argument('--idle-timeout', type=float, default=300, help='seconds before an idle function is recycled')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("Measuring cold import cost per function...")
+    cold_cost_ms = {name: measure_import_ms([name], args.repeats) for name in TRAFFIC_MIX}
+    # The router imports index.py plus the endpoint it is asked for; later
+    # endpoints are loaded lazily inside the warm process.
+    cold_cost_ms['index'] = measure_import_ms(['index', 'classes'], args.repeats)
+    for name, cost in cold_cost_ms.items():
+        print(f"  {name:<25} {cost:8.1f} ms")
+
+    trace = build_trace(args.requests, args.rate, args.seed)
+    layouts = {
+        'split': lambda route: route,
+        'router': lambda route: 'index',
+    }
+
+    print(f"\nTrace: {args.requests} requests at {args.rate}/s, idle timeout {args.idle_timeout}s")
+    for layout, function_for in layouts.items():
+        cold_starts, added = simulate(trace, args.idle_timeout, cold_cost_ms, function_for)
+        print(f"  {layout:<7} cold starts: {cold_starts:5d}  "
+              f"added latency mean {statistics.mean(added):7.2f} ms  "
+              f"p95 {percentile(added, 0.95):7.1f} ms  p99 {percentile(added, 0.99):7.1f} ms")
+
+    import index
+    from health import handler as health_handler
+    from hello import handler as hello_handler
+
+    print("\nWarm in-process dispatch:")
+    for label, handler_class, path in (
+        ('split  /api/health', health_handler, '/api/health'),
+        ('router /api/health', index.handler, '/api/health'),
+        ('split  /api/hello', hello_handler, '/api/hello'),
+        ('router /api/hello', index.handler, '/api/hello'),
+    ):
+        print(f"  {label:<20} {measure_warm_dispatch(handler_class, path, 2000) * 1000:8.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
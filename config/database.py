@@ -1,4 +1,5 @@
 import os
+import threading
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
@@ -8,9 +9,24 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+# One client per process - its HTTP connection pool is reused by every query
+_client = None
+_client_lock = threading.Lock()
+
 def get_supabase_client() -> Client:
-    """Create and return Supabase client"""
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    """Return the shared Supabase client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _client
+
+def reset_supabase_client():
+    """Drop the shared client so the next call builds a fresh one"""
+    global _client
+    with _client_lock:
+        _client = None
 
 # Test connection
 if __name__ == "__main__":
@@ -1,15 +1,26 @@
 import os
-from supabase import create_client
+import sys
 from dotenv import load_dotenv
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import get_supabase_client
+
 # Load environment variables
 load_dotenv()
 
-def get_supabase_client():
-    """Create and return Supabase client"""
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_KEY")
-    return create_client(supabase_url, supabase_key)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+def list_migrations():
+    """Return the checked-in SQL migration files in apply order"""
+    if not os.path.isdir(MIGRATIONS_DIR):
+        return []
+    return sorted(
+        os.path.join(MIGRATIONS_DIR, name)
+        for name in os.listdir(MIGRATIONS_DIR)
+        if name.endswith(".sql")
+    )
 
 def create_yoga_class_types_table():
     """Create the yoga_class_types table using insert/upsert approach"""
@@ -41,10 +52,57 @@ def create_yoga_class_types_table():
             print(f"❌ Error creating table: {e}")
             return False
 
+def check_search_index():
+    """Check whether the full-text search migration has been applied"""
+    supabase = get_supabase_client()
+    
+    try:
+        supabase.table("yoga_class_types").select("id").limit(1).text_search("search_vector", "yoga").execute()
+        print("✅ Search index is available")
+        return True
+    except Exception:
+        print("⚠️  Search index missing - apply these migrations in the Supabase SQL editor:")
+        for path in list_migrations():
+            print(f"   • {os.path.relpath(path)}")
+        return False
+
+def check_playlist_templates_table():
+    """Check whether the precomputed playlist pools table exists"""
+    supabase = get_supabase_client()
+    
+    try:
+        supabase.table("playlist_templates").select("id").limit(1).execute()
+        print("✅ Table 'playlist_templates' is available - fill it with config/precompute_playlists.py")
+        return True
+    except Exception:
+        print("⚠️  Table 'playlist_templates' missing - apply config/migrations/002_playlist_templates.sql")
+        return False
+
+def check_generated_playlists_table():
+    """Check whether the generated playlist history table exists"""
+    supabase = get_supabase_client()
+    
+    try:
+        supabase.table("generated_playlists").select("id").limit(1).execute()
+    except Exception:
+        print("⚠️  Table 'generated_playlists' missing - apply config/migrations/003_generated_playlists.sql")
+        return False
+
+    try:
+        supabase.table("generated_playlists").select("reusable").limit(1).execute()
+        print("✅ Table 'generated_playlists' is available")
+        return True
+    except Exception:
+        print("⚠️  Column 'generated_playlists.reusable' missing - apply config/migrations/004_generated_playlists_reusable.sql")
+        return False
+
 def setup_database():
     """Set up all required database tables"""
     print("Setting up database tables...")
     create_yoga_class_types_table()
+    check_search_index()
+    check_playlist_templates_table()
+    check_generated_playlists_table()
     print("Database setup complete!")
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+-- Indexes for listing and searching yoga_class_types at catalog scale.
+-- Run in the Supabase SQL editor (or psql) once per project.
+
+create extension if not exists pg_trgm;
+
+-- Full-text search over name (weighted higher) and description
+alter table yoga_class_types
+    add column if not exists search_vector tsvector
+    generated always as (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) stored;
+
+create index if not exists yoga_class_types_search_idx
+    on yoga_class_types using gin (search_vector);
+
+-- Trigram index so name ilike filters (substring and prefix) use an index
+create index if not exists yoga_class_types_name_trgm_idx
+    on yoga_class_types using gin (name gin_trgm_ops);
+
+-- Listing paths: public catalog and a user's private classes, both by created_at
+create index if not exists yoga_class_types_public_created_idx
+    on yoga_class_types (is_public, created_at, id);
+
+create index if not exists yoga_class_types_user_created_idx
+    on yoga_class_types (user_id, created_at, id)
+    where user_id is not null;
+
+create index if not exists yoga_class_types_created_idx
+    on yoga_class_types (created_at desc);
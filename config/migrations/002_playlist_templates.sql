@@ -0,0 +1,16 @@
+-- Precomputed playlist pools served by /api/generate-playlist.
+-- Filled and refreshed by `python config/precompute_playlists.py`.
+
+create table if not exists playlist_templates (
+    id uuid primary key default gen_random_uuid(),
+    template_key text not null,
+    class_name text not null,
+    music_preferences text not null,
+    duration integer not null,
+    response jsonb not null,
+    created_at timestamptz not null default now()
+);
+
+-- Request path: all entries of one pool; refresh: newest entry per pool
+create index if not exists playlist_templates_key_created_idx
+    on playlist_templates (template_key, created_at desc);
@@ -0,0 +1,39 @@
+-- Every playlist served by /api/generate-playlist, for history, reuse and
+-- warming the semantic cache of new instances.
+-- Written in batches off the request path by tools/playlist_history.py.
+
+create table if not exists generated_playlists (
+    id uuid primary key default gen_random_uuid(),
+    user_id text,
+    class_name text not null,
+    -- Normalized class name (lowercase, single spaces) for per-class lookups
+    class_key text not null,
+    class_description text not null default '',
+    music_preferences text not null,
+    duration integer not null,
+    -- tools.playlist_generator.request_fingerprint of the request
+    fingerprint text not null,
+    source text not null,
+    degraded boolean not null default false,
+    track_count integer not null default 0,
+    response jsonb not null,
+    created_at timestamptz not null default now()
+);
+
+-- A user's history, newest first (keyset pagination on created_at, id)
+create index if not exists generated_playlists_user_created_idx
+    on generated_playlists (user_id, created_at desc, id desc)
+    where user_id is not null;
+
+-- Recent playlists for a class
+create index if not exists generated_playlists_class_created_idx
+    on generated_playlists (class_key, created_at desc);
+
+-- Reuse: the newest playlist for an identical request
+create index if not exists generated_playlists_fingerprint_created_idx
+    on generated_playlists (fingerprint, created_at desc);
+
+-- Cache warm-up: newest real (non-degraded) playlists
+create index if not exists generated_playlists_created_idx
+    on generated_playlists (created_at desc)
+    where not degraded;
@@ -0,0 +1,12 @@
+-- Rows written for requests that shared another request's generation
+-- (coalesced) keep the user's history complete but are never reused or
+-- loaded into the semantic cache - the original row already is.
+
+alter table generated_playlists
+    add column if not exists reusable boolean not null default true;
+
+-- Reuse: the newest reusable playlist for an identical request
+drop index if exists generated_playlists_fingerprint_created_idx;
+create index if not exists generated_playlists_fingerprint_created_idx
+    on generated_playlists (fingerprint, created_at desc)
+    where reusable;
@@ -0,0 +1,127 @@
+"""Precompute playlist pools for popular requests
+
+Generates and resolves POOL_SIZE playlists for every public class x popular
+preference x common duration and stores them in the playlist_templates
+table (config/migrations/002_playlist_templates.sql). /api/generate-playlist
+then serves those requests instantly, rotating randomly through each pool.
+
+Usage:
+    python config/precompute_playlists.py --workers 4
+    python config/precompute_playlists.py --stale-after 24 --every 6   # keep pools fresh
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import get_supabase_client
+from tools.playlist_cache import is_cacheable
+from tools.playlist_generator import generate_playlist, normalize_request
+from tools.playlist_templates import (
+    COMMON_DURATIONS, POOL_SIZE, POPULAR_PREFERENCES, PlaylistTemplateStore, template_key
+)
+
+# Load environment variables
+load_dotenv()
+
+
+def fetch_public_classes(names=None):
+    """Public classes from yoga_class_types, optionally only the given names"""
+    supabase = get_supabase_client()
+    request = supabase.table("yoga_class_types").select("name, description").eq("is_public", True)
+    if names:
+        request = request.in_("name", names)
+    return request.order("name").execute().data or []
+
+
+def build_requests(classes, preferences, durations):
+    return [normalize_request({
+        "class_name": yoga_class['name'],
+        "class_description": yoga_class.get('description') or '',
+        "music_preferences": preference,
+        "duration": duration
+    }) for yoga_class in classes for preference in preferences for duration in durations]
+
+
+def refresh_pool(store, request, pool_size):
+    """Generate one pool and store it; returns the number of playlists kept
+
+    Generations run one after another on purpose: identical requests in
+    flight at the same time are coalesced into a single generation.
+    """
+    responses = []
+    for _ in range(pool_size):
+        response = generate_playlist(dict(request, fresh=True))
+        if is_cacheable(response):
+            responses.append(response)
+    return store.replace_pool(request, responses)
+
+
+def precompute(args):
+    store = PlaylistTemplateStore(client=get_supabase_client())
+    classes = fetch_public_classes(args.classes)
+    requests = build_requests(classes, args.preferences, args.durations)
+    print(f"📋 {len(classes)} public classes x {len(args.preferences)} preferences x "
+          f"{len(args.durations)} durations = {len(requests)} pools")
+
+    if args.stale_after:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=args.stale_after)
+        requests = [r for r in requests if (store.newest(template_key(r)) or cutoff) <= cutoff]
+        print(f"🕒 {len(requests)} pools older than {args.stale_after}h")
+
+    if args.dry_run:
+        for request in requests:
+            print(f"   • {request['class_name']} / {request['music_preferences']} / {request['duration']} min")
+        return
+
+    started = time.monotonic()
+    stored = failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(refresh_pool, store, request, args.pool_size): request for request in requests}
+        for future in as_completed(futures):
+            request = futures[future]
+            label = f"{request['class_name']} / {request['music_preferences']} / {request['duration']} min"
+            try:
+                count = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ {label}: {e}")
+                continue
+            stored += count
+            if count:
+                print(f"✅ {label}: {count} playlists")
+            else:
+                failed += 1
+                print(f"⚠️  {label}: no usable playlists, keeping the old pool")
+
+    print(f"🎉 Stored {stored} playlists in {time.monotonic() - started:.0f}s ({failed} pools failed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute playlist pools for popular requests")
+    parser.add_argument('--classes', nargs='*', help='only these public class names (default: all)')
+    parser.add_argument('--preferences', nargs='*', default=POPULAR_PREFERENCES, help='music preferences to cover')
+    parser.add_argument('--durations', nargs='*', type=int, default=COMMON_DURATIONS, help='class lengths in minutes')
+    parser.add_argument('--pool-size', type=int, default=POOL_SIZE, help='playlists kept per pool')
+    parser.add_argument('--workers', type=int, default=4, help='pools generated in parallel')
+    parser.add_argument('--stale-after', type=float, default=0, help='only refresh pools older than this many hours')
+    parser.add_argument('--every', type=float, default=0, help='keep running, refreshing every this many hours')
+    parser.add_argument('--dry-run', action='store_true', help='list the pools that would be refreshed')
+    args = parser.parse_args()
+
+    while True:
+        precompute(args)
+        if not args.every or args.dry_run:
+            break
+        print(f"💤 Next refresh in {args.every}h")
+        time.sleep(args.every * 3600)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("langchain")
+postgrest = pytest.importorskip("postgrest")
+
+from tools.class_storage_tool import search_query
+
+
+def test_search_uses_websearch_full_text_query():
+    client = postgrest.SyncPostgrestClient("http://localhost:3000")
+    query = search_query(client, "slow flow", limit=5)
+
+    assert query.params.get("search_vector") == "wfts(english).slow flow"
+    assert query.params.get("limit") == "5"
@@ -0,0 +1,79 @@
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+from tools import playlist_generator
+from utils.health import UpstreamHealth
+from utils.llm import LLMTimeoutError
+from tests.test_track_catalog import make_catalog
+
+REQUEST = {"class_name": "Slow Flow", "class_description": "", "music_preferences": "indie folk", "duration": 60}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Generator with no caches, a fresh health tracker and an LLM that times out"""
+    calls = []
+
+    def slow_llm(*args, **kwargs):
+        calls.append(kwargs.get('deadline'))
+        raise LLMTimeoutError("No LLM answer within 12s")
+
+    state = {"catalog": None, "health": UpstreamHealth(), "llm_calls": calls}
+    monkeypatch.setattr(playlist_generator, "generate_playlist_text", slow_llm)
+    monkeypatch.setattr(playlist_generator, "get_playlist_cache", lambda: None)
+    monkeypatch.setattr(playlist_generator, "get_template_store", lambda: None)
+    monkeypatch.setattr(playlist_generator, "get_track_catalog", lambda: state["catalog"])
+    monkeypatch.setattr(playlist_generator, "get_health", lambda: state["health"])
+    return state
+
+
+def test_llm_timeout_serves_real_tracks_from_the_catalog(pipeline):
+    # Tagged differently from the request: degraded mode takes any track in range
+    pipeline["catalog"] = make_catalog(per_section=4, tags=("ambient",))
+
+    response = playlist_generator.generate_playlist(dict(REQUEST, fresh=True))
+
+    assert pipeline["llm_calls"] == [playlist_generator.DEGRADE_AFTER]
+    assert response["degraded"] is True
+    assert response["degraded_reason"] == "llm_timeout"
+    assert response["source"] == "degraded_catalog"
+    assert response["ready_for_export"] is True
+    assert "Sample Artist" not in response["playlist"]
+    # Too few tracks to cover 60 minutes - short sections are accepted when degrading
+    track_ids = response["spotify_integration"]["track_ids"]
+    assert 8 <= len(track_ids) <= 16
+    assert len(set(track_ids)) == len(track_ids)
+
+
+def test_mock_playlist_only_when_nothing_is_resolved(pipeline):
+    response = playlist_generator.generate_playlist(dict(REQUEST, fresh=True))
+
+    assert response["degraded"] is True
+    assert response["source"] == "fallback_due_to: llm_timeout"
+    assert response["ready_for_export"] is False
+
+
+def test_llm_marked_down_is_not_called(pipeline):
+    pipeline["catalog"] = make_catalog(per_section=4)
+    pipeline["health"].record("openai", False, 12.0, "timeout")
+
+    # One failure doesn't stop the next request from trying
+    playlist_generator.generate_playlist(dict(REQUEST, fresh=True))
+    assert len(pipeline["llm_calls"]) == 1
+
+    for _ in range(5):
+        pipeline["health"].record("openai", False, 12.0, "timeout")
+    # Down: the first request is the breaker's trial call, the next one skips the LLM
+    playlist_generator.generate_playlist(dict(REQUEST, fresh=True))
+    response = playlist_generator.generate_playlist(dict(REQUEST, fresh=True))
+
+    assert len(pipeline["llm_calls"]) == 2
+    assert response["degraded_reason"] == "llm_down"
+    assert response["source"] == "degraded_catalog"
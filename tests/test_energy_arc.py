@@ -0,0 +1,56 @@
+import sys
+import os
+import itertools
+import time
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+
+from tools.track_catalog import SECTION_PROFILES
+from tools.energy_arc import (
+    order_tracks, order_cost, target_curve, sections_by_share
+)
+
+
+def random_tracks(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(55, 125, count), rng.uniform(0, 1, count)
+
+
+def cost(order, tempo, energy, section_of, sections):
+    targets = target_curve(np.asarray(section_of)[np.asarray(order)], sections)
+    return order_cost(order, tempo, energy, *targets)
+
+
+def test_order_keeps_tracks_in_their_sections():
+    tempo, energy = random_tracks(25)
+    section_of = sections_by_share(25)
+    order = order_tracks(list(tempo), list(energy), section_of, SECTION_PROFILES)
+
+    assert sorted(order) == list(range(25))
+    assert [section_of[i] for i in order] == sorted(section_of)
+    assert cost(order, tempo, energy, section_of, SECTION_PROFILES) < \
+        cost(list(range(25)), tempo, energy, section_of, SECTION_PROFILES)
+
+
+def test_small_section_reaches_exhaustive_optimum():
+    sections = [{"bpm": (60, 80), "energy": (0.2, 0.5)}]
+    tempo, energy = random_tracks(7, seed=3)
+    order = order_tracks(list(tempo), list(energy), [0] * 7, sections)
+
+    best = min(cost(p, tempo, energy, [0] * 7, sections) for p in itertools.permutations(range(7)))
+    assert cost(order, tempo, energy, [0] * 7, sections) == pytest.approx(best)
+
+
+def test_two_hundred_tracks_stay_fast():
+    tempo, energy = random_tracks(200, seed=1)
+    section_of = sections_by_share(200)
+    start = time.perf_counter()
+    order = order_tracks(list(tempo), list(energy), section_of, SECTION_PROFILES)
+    assert time.perf_counter() - start < 2.0
+    assert sorted(order) == list(range(200))
+
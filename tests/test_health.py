@@ -0,0 +1,87 @@
+import sys
+import os
+import time
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.health import UpstreamHealth
+
+
+def test_status_comes_from_recent_calls():
+    health = UpstreamHealth()
+    assert health.status("spotify")["status"] == "unknown"
+
+    for _ in range(9):
+        with health.track("spotify"):
+            pass
+    with pytest.raises(RuntimeError):
+        with health.track("spotify"):
+            raise RuntimeError("429 Too Many Requests")
+
+    status = health.status("spotify")
+    assert status["status"] == "up"
+    assert status["calls"] == 10
+    assert status["success_rate"] == 0.9
+    assert status["last_error"]["message"] == "429 Too Many Requests"
+
+    for _ in range(20):
+        health.record("spotify", False, 0.5, "down")
+    assert health.status("spotify")["status"] == "down"
+    assert health.readiness()["status"] == "degraded"
+
+
+def test_readiness_is_cached_and_probes_only_quiet_upstreams():
+    calls = []
+    health = UpstreamHealth(probe_interval=60)
+    health.register_probe("spotify", lambda: calls.append("spotify"))
+    health.register_probe("supabase", lambda: calls.append("supabase"))
+    health.record("supabase", True, 0.01)
+
+    first = health.readiness()
+    assert health.readiness() is first
+    for _ in range(100):
+        if calls:
+            break
+        time.sleep(0.01)
+    # Supabase had real traffic just now; Spotify was quiet and got one probe
+    assert calls == ["spotify"]
+
+    health._summary = None
+    health.readiness()
+    time.sleep(0.05)
+    assert calls == ["spotify"]
+
+
+def test_ensure_known_probes_a_cold_upstream_once():
+    calls = []
+    health = UpstreamHealth(probe_interval=60)
+
+    def failing_probe():
+        calls.append(1)
+        raise RuntimeError("Spotify credentials not configured")
+
+    health.register_probe("spotify", failing_probe)
+    assert health.ensure_known("spotify")["status"] == "down"
+    assert health.ensure_known("spotify")["status"] == "down"
+    assert calls == [1]
+
+
+def test_breaker_needs_several_failures_and_lets_trials_through():
+    health = UpstreamHealth(breaker_min_calls=5, breaker_trial_seconds=60)
+    health.record("openai", False, 12.0, "timeout")
+    # One failure is "down" for readiness but not enough to stop calling
+    assert health.status("openai")["status"] == "down"
+    assert health.allows("openai")
+
+    for _ in range(4):
+        health.record("openai", False, 12.0, "timeout")
+    # Open: one trial call, then nothing until the trial interval passes
+    assert health.allows("openai")
+    assert not health.allows("openai")
+
+    # The trial succeeded - calls go through again
+    health.record("openai", True, 1.0)
+    assert health.allows("openai")
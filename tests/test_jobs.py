@@ -0,0 +1,164 @@
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.jobs import JobQueue, Worker, register_job, run_job
+
+
+@register_job("test_echo")
+def echo_job(payload, progress):
+    progress("working", {"done": 1, "total": 1})
+    if payload.get("boom"):
+        raise RuntimeError("boom")
+    return {"echo": payload["value"]}
+
+
+def make_queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), **kwargs)
+
+
+def test_enqueue_claim_complete(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("test_echo", {"value": 42})
+    assert queue.get(job_id)["status"] == "queued"
+    assert queue.get(job_id)["position"] == 0
+
+    job = queue.claim()
+    assert job["id"] == job_id
+    assert queue.claim() is None
+
+    assert run_job(queue, job)
+    finished = queue.get(job_id)
+    assert finished["status"] == "succeeded"
+    assert finished["result"] == {"echo": 42}
+    assert finished["progress"] == {"done": 1, "total": 1, "stage": "working"}
+
+
+def test_failed_job_retries_then_fails(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    job_id = queue.enqueue("test_echo", {"boom": True})
+
+    assert not run_job(queue, queue.claim())
+    assert queue.get(job_id)["status"] == "queued"
+
+    assert not run_job(queue, queue.claim())
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+    assert job["attempts"] == 2
+    # The payload (tokens included) goes once the job has failed for good
+    payload = queue._connect().execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+    assert payload == '{}'
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0)
+    job_id = queue.enqueue("test_echo", {"value": 1})
+    assert queue.claim()["id"] == job_id
+
+    time.sleep(0.01)
+    reclaimed = queue.claim()
+    assert reclaimed["id"] == job_id
+    assert reclaimed["attempts"] == 2
+
+
+def test_unknown_kind_fails_immediately(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("no_such_job", {})
+    assert not run_job(queue, queue.claim())
+    assert queue.get(job_id)["status"] == "failed"
+
+
+def test_worker_processes_jobs_concurrently(tmp_path):
+    queue = make_queue(tmp_path)
+    job_ids = [queue.enqueue("test_echo", {"value": i}) for i in range(10)]
+
+    worker = Worker(queue, concurrency=3, poll_interval=0.01)
+    thread = worker.start()
+    deadline = time.time() + 5
+    while time.time() < deadline and queue.stats().get("succeeded", 0) < len(job_ids):
+        time.sleep(0.02)
+    worker.stop()
+    thread.join(timeout=2)
+
+    assert [queue.get(job_id)["result"]["echo"] for job_id in job_ids] == list(range(10))
+
+
+def test_worker_survives_queue_errors(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("test_echo", {"value": 7})
+    claim = queue.claim
+    failures = [RuntimeError("database is locked")] * 2
+
+    def flaky_claim():
+        if failures:
+            raise failures.pop()
+        return claim()
+
+    queue.claim = flaky_claim
+    worker = Worker(queue, concurrency=1, poll_interval=0.01)
+    thread = worker.start()
+    deadline = time.time() + 5
+    while time.time() < deadline and queue.get(job_id)["status"] != "succeeded":
+        time.sleep(0.02)
+    worker.stop()
+    thread.join(timeout=2)
+
+    assert not failures
+    assert queue.get(job_id)["result"] == {"echo": 7}
+
+
+def test_expired_lease_is_not_reclaimed_past_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0, max_attempts=2)
+    job_id = queue.enqueue("test_echo", {"value": 1})
+    queue.claim()
+    time.sleep(0.01)
+    queue.claim()
+    time.sleep(0.01)
+
+    assert queue.claim() is None
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    payload = queue._connect().execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+    assert payload == '{}'
+
+
+def test_stale_worker_cannot_finish_a_reclaimed_job(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0)
+    job_id = queue.enqueue("test_echo", {"value": 1})
+    stale = queue.claim()
+    time.sleep(0.01)
+    assert queue.claim()["id"] == job_id
+
+    assert not queue.complete(job_id, stale["lease"], {"echo": "stale"})
+    assert not queue.fail(job_id, stale["lease"], "stale", stale["attempts"])
+    assert queue.get(job_id)["status"] == "running"
+
+
+def test_lease_is_renewed_while_a_job_runs(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.3)
+    release = threading.Event()
+
+    @register_job("test_slow")
+    def slow_job(payload, progress):
+        # No progress reports; only the lease timer keeps the job claimed
+        release.wait(5)
+        return {"done": True}
+
+    job_id = queue.enqueue("test_slow", {})
+    job = queue.claim()
+    runner = threading.Thread(target=run_job, args=(queue, job))
+    runner.start()
+    time.sleep(0.6)
+    try:
+        assert queue.claim() is None
+    finally:
+        release.set()
+        runner.join(timeout=2)
+
+    assert queue.get(job_id)["result"] == {"done": True}
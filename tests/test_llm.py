@@ -0,0 +1,157 @@
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm import HEDGE_MIN_SAMPLES, LLMError, LLMGateway, LLMTimeoutError, parse_route
+
+
+def target(model, provider="fake"):
+    return {"provider": provider, "model": model, "base_url": "", "api_key": None}
+
+
+def completion(text, prompt_tokens=10, completion_tokens=20):
+    return {"choices": [{"message": {"content": text}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}}
+
+
+class FakeModels:
+    """send() for the gateway: per-model delay and failure"""
+
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, target, payload, timeout):
+        self.calls.append((payload["model"], timeout))
+        delay = self.delays.get(payload["model"], 0)
+        time.sleep(min(delay, timeout))
+        if payload["model"] in self.failing:
+            raise ConnectionError(f"{payload['model']} unavailable")
+        if delay > timeout:
+            raise TimeoutError("read timeout")
+        return completion(f"answer from {payload['model']}")
+
+
+def gateway(models, routes, **kwargs):
+    return LLMGateway(routes={task: [target(model) for model in route] for task, route in routes.items()},
+                      send=models, **kwargs)
+
+
+def test_routes_tasks_to_their_first_target():
+    models = FakeModels()
+    llm = gateway(models, {"playlist": ["big", "small"], "cheap": ["small"]})
+
+    assert llm.complete([], task="cheap")["model"] == "small"
+    result = llm.complete([], task="playlist")
+    assert result["text"] == "answer from big"
+    assert result["hedged"] is False
+    assert result["attempts"] == 1
+    # Unknown tasks use the default route
+    assert llm.complete([], task="other")["model"] == "big"
+
+
+def test_fails_over_to_the_next_target():
+    models = FakeModels(failing={"big"})
+    llm = gateway(models, {"playlist": ["big", "small"]})
+
+    result = llm.complete([])
+    assert result["model"] == "small"
+    assert result["attempts"] == 2
+
+
+def test_all_targets_failing_raises():
+    llm = gateway(FakeModels(failing={"big", "small"}), {"playlist": ["big", "small"]})
+    with pytest.raises(LLMError) as error:
+        llm.complete([])
+    assert not isinstance(error.value, LLMTimeoutError)
+    assert "big unavailable" in str(error.value)
+
+
+def test_slow_target_is_hedged_after_its_p95():
+    models = FakeModels(delays={"big": 0.01})
+    llm = gateway(models, {"playlist": ["big", "small"]})
+    for _ in range(HEDGE_MIN_SAMPLES):
+        llm.complete([])
+    assert llm.hedge_delay(target("big")) == 1.0  # clamped to HEDGE_MIN_DELAY
+
+    models.delays["big"] = 3
+    started = time.monotonic()
+    result = llm.complete([])
+    assert result["model"] == "small"
+    assert result["hedged"] is True
+    assert 1.0 <= time.monotonic() - started < 2.5
+
+
+def test_deadline_bounds_every_attempt():
+    models = FakeModels(delays={"big": 5, "small": 5})
+    llm = gateway(models, {"playlist": ["big", "small"]}, hedging=False)
+
+    started = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        llm.complete([], deadline=0.3)
+    assert time.monotonic() - started < 1
+    assert all(timeout <= 0.3 for _, timeout in models.calls)
+
+
+def test_parse_route(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("LLM_LOCAL_BASE_URL", "http://localhost:9000/v1/")
+    first, second = parse_route("gpt-4o-mini, local:llama3")
+    assert first == {"provider": "openai", "model": "gpt-4o-mini",
+                     "base_url": "https://api.openai.com/v1", "api_key": "sk-test"}
+    assert second["provider"] == "local"
+    assert second["base_url"] == "http://localhost:9000/v1"
+
+
+class FakeOpenAI(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible chat completions server"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append((self.path, self.headers.get('Authorization'), body))
+        time.sleep(self.server.delays.get(body['model'], 0))
+        payload = json.dumps(completion(f"- Artist - Song for {body['model']}")).encode('utf-8')
+        self.send_response(503 if body['model'] in self.server.failing else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    server.requests, server.delays, server.failing = [], {}, set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def test_against_a_local_fake_server(fake_server, monkeypatch):
+    pytest.importorskip("httpx")
+    monkeypatch.setenv("LLM_FAKE_BASE_URL", f"http://127.0.0.1:{fake_server.server_port}/v1")
+    monkeypatch.setenv("LLM_FAKE_API_KEY", "test-key")
+    fake_server.failing.add("big")
+    llm = LLMGateway(routes={"playlist": parse_route("fake:big,fake:small")})
+
+    result = llm.complete([{"role": "user", "content": "hi"}], temperature=0.9)
+
+    assert result["text"] == "- Artist - Song for small"
+    assert result["provider"] == "fake"
+    assert result["usage"]["completion_tokens"] == 20
+    path, auth, body = fake_server.requests[-1]
+    assert path == "/v1/chat/completions"
+    assert auth == "Bearer test-key"
+    assert body["temperature"] == 0.9
@@ -0,0 +1,95 @@
+import sys
+import os
+import io
+import json
+import logging
+import queue
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log import (
+    ContextFilter, DroppingQueueHandler, JsonFormatter, SamplingFilter,
+    context_from_headers, current_request_id, parse_sample_rates, request_context, trace_enabled
+)
+
+
+def make_logger(name, rates=None):
+    """Logger writing JSON lines to a buffer through the same filters as configure_logging"""
+    stream = io.StringIO()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter())
+    output.addFilter(ContextFilter())
+    output.addFilter(SamplingFilter(rates or {}))
+    logger = logging.getLogger(name)
+    logger.handlers = [output]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger, stream
+
+
+def lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_carry_request_id_and_fields():
+    logger, stream = make_logger("yoga.generator")
+
+    with request_context("req-1"):
+        logger.info("Playlist generated", extra={"source": "cache", "seconds": 0.01})
+    logger.info("Outside a request")
+
+    first, second = lines(stream)
+    assert first == {"ts": first["ts"], "level": "info", "category": "generator",
+                     "msg": "Playlist generated", "request_id": "req-1", "source": "cache", "seconds": 0.01}
+    assert "request_id" not in second
+
+
+def test_context_from_headers():
+    with context_from_headers({"X-Request-ID": "abc", "X-Debug-Trace": "1"}) as request_id:
+        assert request_id == "abc"
+        assert current_request_id() == "abc"
+        assert trace_enabled()
+
+    with context_from_headers({}) as request_id:
+        assert len(request_id) == 16
+        assert not trace_enabled()
+    assert current_request_id() is None
+
+
+def test_sampling_keeps_whole_requests_and_all_warnings():
+    logger, stream = make_logger("yoga.spotify", parse_sample_rates("spotify=0.25,bad=x"))
+
+    for index in range(200):
+        with request_context(f"req-{index}"):
+            logger.debug("Track search")
+            logger.debug("Track search")
+            logger.warning("Track search failed")
+
+    records = lines(stream)
+    warnings = [record for record in records if record["level"] == "warning"]
+    debug = [record for record in records if record["level"] == "debug"]
+    assert len(warnings) == 200
+    assert 20 < len(debug) / 2 < 80
+    # Sampled per request: both debug lines of a kept request survive
+    kept = [record["request_id"] for record in debug]
+    assert all(kept.count(request_id) == 2 for request_id in kept)
+
+
+def test_unsampled_categories_are_kept():
+    logger, stream = make_logger("yoga.api", {"spotify": 0.0})
+    logger.debug("Fetching classes")
+    assert len(lines(stream)) == 1
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    logger = logging.getLogger("yoga.test-queue")
+    logger.handlers = [handler]
+    logger.propagate = False
+
+    for _ in range(5):
+        logger.warning("burst")
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
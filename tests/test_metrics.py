@@ -0,0 +1,74 @@
+import sys
+import os
+import threading
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import Counter, Histogram, Registry
+
+
+def test_counter_sums_per_thread_shards():
+    counter = Counter("test_requests", "Requests", ["route"])
+
+    def work():
+        for _ in range(1000):
+            counter.labels(route="health").inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.labels(route="health").value() == 8000
+    assert 'test_requests_total{route="health"} 8000' in counter.render()
+    assert "# TYPE test_requests_total counter" in counter.render()
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("test_seconds", "Latency", buckets=(0.1, 1)))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value)
+
+    text = registry.render()
+    assert 'test_seconds_bucket{le="0.1"} 2' in text
+    assert 'test_seconds_bucket{le="1"} 3' in text
+    assert 'test_seconds_bucket{le="+Inf"} 4' in text
+    assert "test_seconds_count 4" in text
+    assert "test_seconds_sum 3.65" in text
+
+
+def test_label_values_are_escaped():
+    counter = Counter("test_errors", "Errors", ["message"])
+    counter.labels(message='say "hi"\n').inc()
+    assert 'message="say \\"hi\\"\\n"' in counter.render()
+
+
+def test_agent_model_calls_are_counted(monkeypatch):
+    pytest.importorskip("langchain_core")
+    from types import SimpleNamespace
+    from uuid import uuid4
+    from agents import tracing
+    from utils.health import UpstreamHealth
+    from utils.metrics import LLM_CALLS
+
+    health = UpstreamHealth()
+    monkeypatch.setattr(tracing, "get_health", lambda: health)
+    handler = tracing.LLMMetricsHandler("test-agent-model", "fake")
+    ok = LLM_CALLS.labels(model="test-agent-model", outcome="ok").value()
+
+    run_id = uuid4()
+    handler.on_chat_model_start({}, [[]], run_id=run_id)
+    handler.on_llm_end(SimpleNamespace(llm_output={"token_usage": {"prompt_tokens": 12, "completion_tokens": 30}}),
+                       run_id=run_id)
+    run_id = uuid4()
+    handler.on_chat_model_start({}, [[]], run_id=run_id)
+    handler.on_llm_error(RuntimeError("rate limited"), run_id=run_id)
+
+    assert LLM_CALLS.labels(model="test-agent-model", outcome="ok").value() == ok + 1
+    assert LLM_CALLS.labels(model="test-agent-model", outcome="error").value() >= 1
+    assert health.status("fake")["calls"] == 2
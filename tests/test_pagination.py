@@ -0,0 +1,111 @@
+import importlib.util
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from utils.pagination import decode_cursor, encode_cursor, escape_like, keyset_after, keyset_before, parse_limit
+
+
+def test_cursor_roundtrip():
+    position = {"segment": "public", "created_at": "2024-01-01T00:00:00+00:00", "id": 7}
+    cursor = encode_cursor(position)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == position
+
+
+def test_decode_cursor_rejects_garbage():
+    assert decode_cursor(None) is None
+    assert decode_cursor("not-a-cursor!") is None
+    assert decode_cursor(encode_cursor([1, 2])) is None
+
+
+def test_parse_limit_clamps():
+    assert parse_limit(None, 50, 100) == 50
+    assert parse_limit("500", 50, 100) == 100
+    assert parse_limit("0", 50, 100) == 1
+    assert parse_limit("abc", 50, 100) == 50
+
+
+def test_escape_like_and_keyset_filter():
+    assert escape_like("100%_hot") == "100\\%\\_hot"
+    assert keyset_after("created_at", "2024-01-01T00:00:00+00:00", 3) == (
+        'created_at.gt."2024-01-01T00:00:00+00:00",'
+        'and(created_at.eq."2024-01-01T00:00:00+00:00",id.gt."3")'
+    )
+    assert keyset_before("created_at", "2024-01-01T00:00:00+00:00", "a1") == (
+        'created_at.lt."2024-01-01T00:00:00+00:00",'
+        'and(created_at.eq."2024-01-01T00:00:00+00:00",id.lt."a1")'
+    )
+
+
+class FakeTable:
+    """Just enough of the Supabase query builder for the class listing"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = {}
+        self.count = None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def order(self, column):
+        return self
+
+    def or_(self, condition):
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        rows = [row for row in self.rows if all(row.get(k) == v for k, v in self.filters.items())]
+        return type("Result", (), {"data": rows[:self.count]})()
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        return FakeTable(self.rows)
+
+
+def load_classes_api():
+    pytest.importorskip("supabase")
+    pytest.importorskip("dotenv")
+    spec = importlib.util.spec_from_file_location(
+        "classes_api", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api", "classes.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def class_row(row_id, is_public, user_id=None):
+    return {"id": row_id, "name": f"Class {row_id}", "description": "", "user_id": user_id,
+            "is_public": is_public, "created_at": f"2024-01-0{row_id}T00:00:00+00:00"}
+
+
+def test_class_page_has_no_cursor_into_an_empty_custom_segment():
+    fetch = load_classes_api().handler._fetch_class_page
+    public = [class_row(1, True), class_row(2, True)]
+
+    rows, cursor = fetch(None, FakeSupabase(public), "user", "", 2, None)
+    assert [row["id"] for row in rows] == [1, 2]
+    assert cursor is None
+
+    rows, cursor = fetch(None, FakeSupabase(public + [class_row(3, False, "user")]), "user", "", 2, None)
+    assert [row["id"] for row in rows] == [1, 2]
+    assert decode_cursor(cursor) == {"segment": "custom"}
+    rows, cursor = fetch(None, FakeSupabase(public + [class_row(3, False, "user")]), "user", "", 2, cursor)
+    assert [row["id"] for row in rows] == [3]
+    assert cursor is None
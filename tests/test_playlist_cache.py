@@ -0,0 +1,82 @@
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+
+from utils.embeddings import HashingEmbedder
+from utils.text import normalize_terms
+from utils.vector_index import VectorIndex
+from tools.playlist_cache import SemanticPlaylistCache, adapt_playlist_text
+
+PLAYLIST = "WARMUP (10 minutes)\n- A - B\n\nFLOW/ACTIVE (40 minutes)\n- C - D\n\nCOOLDOWN/SAVASANA (10 minutes)\n- E - F"
+
+
+def response(playlist=PLAYLIST):
+    return {
+        "success": True,
+        "playlist": playlist,
+        "spotify_integration": {"search_results": {"found_count": 3, "total_tracks": 3}, "track_ids": ["1", "2", "3"]},
+        "ready_for_export": True,
+        "source": "langchain_agent_with_spotify"
+    }
+
+
+def request(prefs, duration=60, class_name="Vinyasa Flow", description="Dynamic flow"):
+    return {"class_name": class_name, "class_description": description,
+            "music_preferences": prefs, "duration": duration}
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder()
+    a = embedder.embed(["90's hip-hop like Tupac"])
+    b = HashingEmbedder().embed(["90's hip-hop like Tupac"])
+    assert np.allclose(a, b)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert normalize_terms("90's Hip-Hop, like Tupac") == ["90s", "hip", "hop", "tupac"]
+
+
+def test_vector_index_returns_best_matches_and_evicts():
+    index = VectorIndex(dim=3, max_size=10, ann=False)
+    for i, vector in enumerate(np.eye(3, dtype=np.float32)):
+        index.add(vector, i)
+    scores = index.search(np.array([0.1, 0.9, 0.0], dtype=np.float32), k=2)
+    assert [item for _, item in scores] == [1, 0]
+
+    for i in range(20):
+        index.add(np.array([1, 0, 0], dtype=np.float32), 100 + i)
+    assert len(index) <= 10
+
+
+def test_near_duplicate_request_hits_cache():
+    cache = SemanticPlaylistCache(embedder=HashingEmbedder(), threshold=0.9)
+    cache.store(request("90s hip hop"), response())
+
+    hit = cache.lookup(request("90's Hip-Hop"))
+    assert hit is not None
+    assert hit["source"] == "semantic_cache"
+    assert hit["cache"]["similarity"] > 0.99
+
+    assert cache.lookup(request("ambient piano")) is None
+    assert cache.lookup(request("90s hip hop", class_name="Yin Restore", description="Slow, long holds")) is None
+
+
+def test_duration_bucket_and_adaptation():
+    cache = SemanticPlaylistCache(embedder=HashingEmbedder(), threshold=0.9)
+    cache.store(request("indie folk"), response())
+
+    # 30 minutes is a different bucket - no reuse
+    assert cache.lookup(request("indie folk", duration=30)) is None
+
+    hit = cache.lookup(request("indie folk", duration=55))
+    assert hit["cache"]["adapted"]
+    assert "FLOW/ACTIVE (37 minutes)" in hit["playlist"]
+
+
+def test_adapt_playlist_text_keeps_minimum_minute():
+    assert adapt_playlist_text("WARMUP (1 minutes)", 60, 30) == "WARMUP (1 minutes)"
+    assert adapt_playlist_text(PLAYLIST, 60, 60) == PLAYLIST
@@ -0,0 +1,132 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.playlist_exporter import PlaylistExporter, PlaylistExportError
+
+
+class FakeSpotifyError(Exception):
+    def __init__(self, http_status):
+        super().__init__(f"HTTP {http_status}")
+        self.http_status = http_status
+        self.headers = {}
+
+
+class FakeSpotify:
+    """In-memory stand-in for the spotipy calls the exporter uses"""
+
+    def __init__(self, failures=None, apply_failed_write=False):
+        self.playlists = {}
+        self.add_calls = []
+        # Statuses to raise on successive add-items calls
+        self.failures = list(failures or [])
+        self.apply_failed_write = apply_failed_write
+
+    def current_user(self):
+        return {"id": "teacher"}
+
+    def user_playlist_create(self, user, name, description, public):
+        playlist_id = f"pl{len(self.playlists)}"
+        self.playlists[playlist_id] = []
+        return {"id": playlist_id, "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"}}
+
+    def playlist(self, playlist_id, fields=None):
+        return {"id": playlist_id, "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"}}
+
+    def playlist_add_items(self, playlist_id, items, position=None):
+        self.add_calls.append(len(items))
+        ids = [item.rsplit(":", 1)[-1] for item in items]
+        if self.failures:
+            status = self.failures.pop(0)
+            if self.apply_failed_write:
+                self.playlists[playlist_id][position:position] = ids
+            raise FakeSpotifyError(status)
+        self.playlists[playlist_id][position:position] = ids
+
+    def playlist_items(self, playlist_id, fields=None, limit=100, offset=0, additional_types=None):
+        tracks = self.playlists[playlist_id]
+        items = [{"track": {"id": t}} for t in tracks[offset:offset + limit]]
+        return {"items": items, "next": "more" if offset + limit < len(tracks) else None}
+
+
+def make_ids(count):
+    return [f"t{i}" for i in range(count)]
+
+
+def test_export_batches_at_api_maximum():
+    sp = FakeSpotify()
+    result = PlaylistExporter(sp).export("Marathon", make_ids(250))
+
+    assert sp.add_calls == [100, 100, 50]
+    assert sp.playlists[result["playlist_id"]] == make_ids(250)
+    assert result["chunks"] == 3
+
+
+def test_retry_does_not_duplicate_a_write_that_landed():
+    sp = FakeSpotify(failures=[503], apply_failed_write=True)
+    exporter = PlaylistExporter(sp, backoff_seconds=0)
+    result = exporter.export("Flaky", make_ids(120))
+
+    assert sp.playlists[result["playlist_id"]] == make_ids(120)
+    assert result["retries"] == 1
+
+
+def test_retry_rewrites_a_chunk_that_failed():
+    sp = FakeSpotify(failures=[429, 502])
+    result = PlaylistExporter(sp, backoff_seconds=0).export("Flaky", make_ids(30))
+
+    assert sp.playlists[result["playlist_id"]] == make_ids(30)
+    assert result["retries"] == 2
+
+
+def test_resume_skips_tracks_already_present():
+    sp = FakeSpotify(failures=[400])
+    exporter = PlaylistExporter(sp, batch_size=10, backoff_seconds=0)
+
+    try:
+        exporter.export("Partial", make_ids(25))
+        assert False, "expected the non-retryable error to stop the export"
+    except PlaylistExportError as e:
+        playlist_id = e.playlist_id
+        assert e.added == 0
+
+    sp.playlists[playlist_id] = make_ids(10)
+    result = exporter.export("Partial", make_ids(25), playlist_id=playlist_id)
+
+    assert result["skipped"] == 10
+    assert sp.playlists[playlist_id] == make_ids(25)
+
+
+def test_export_many_shares_one_user_lookup():
+    sp = FakeSpotify()
+    results = PlaylistExporter(sp).export_many([
+        {"playlist_name": f"Class {i}", "track_ids": make_ids(5)} for i in range(4)
+    ])
+
+    assert all(result["success"] for result in results)
+    assert len(sp.playlists) == 4
+
+
+def test_export_error_carries_the_list_being_written():
+    sp = FakeSpotify(failures=[400])
+    exporter = PlaylistExporter(sp, batch_size=10, backoff_seconds=0)
+
+    try:
+        exporter.export("Arc", make_ids(15) + make_ids(3))
+        assert False, "expected the non-retryable error to stop the export"
+    except PlaylistExportError as e:
+        # Repeats already removed, so a resume writes the same list
+        assert e.track_ids == make_ids(15)
+        playlist_id, track_ids = e.playlist_id, e.track_ids
+
+    result = exporter.export("Arc", track_ids, playlist_id=playlist_id)
+    assert sp.playlists[playlist_id] == make_ids(15)
+    assert result["track_ids"] == make_ids(15)
+
+
+def test_export_writes_each_track_once():
+    sp = FakeSpotify()
+    result = PlaylistExporter(sp).export("Flow", ["t1", "t2", "spotify:track:t1", "t3", "t2"])
+    assert sp.playlists[result['playlist_id']] == ["t1", "t2", "t3"]
@@ -0,0 +1,225 @@
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import playlist_generator
+from tools.playlist_history import PlaylistHistory, warm_cache
+from tools.playlist_cache import is_cacheable
+from utils.metrics import GENERATION_SECONDS
+
+REQUEST = {"class_name": "Slow  Flow", "class_description": "", "music_preferences": "indie folk", "duration": 60}
+RESPONSE = {"success": True, "playlist": "WARMUP (10 minutes)\n- A - B", "ready_for_export": True,
+            "spotify_integration": {"search_results": {"found_count": 1, "total_tracks": 1}, "track_ids": ["t1"]},
+            "source": "langchain_agent_with_spotify"}
+
+
+class FakeTable:
+    """Just enough of the Supabase query builder for the history"""
+
+    def __init__(self, client):
+        self.client = client
+        self.filters = []
+        self.limit_to = None
+
+    def insert(self, rows):
+        self.client.gate.wait()
+        self.client.inserts.append(rows)
+        self.client.rows.extend(dict(row, created_at=f"2026-01-01T00:00:{len(self.client.rows):02d}") for row in rows)
+        return self
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, count):
+        self.limit_to = count
+        return self
+
+    def execute(self):
+        rows = [row for row in reversed(self.client.rows) if all(f(row) for f in self.filters)]
+        return type("Result", (), {"data": rows[:self.limit_to]})
+
+
+class FakeClient:
+    def __init__(self):
+        self.rows = []
+        self.inserts = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def table(self, name):
+        assert name == "generated_playlists"
+        return FakeTable(self)
+
+
+def test_rows_are_written_in_batches():
+    client = FakeClient()
+    history = PlaylistHistory(client, batch_size=2, flush_interval=0.05)
+    for index in range(5):
+        history.record(playlist_generator.normalize_request(REQUEST), RESPONSE, f"fp{index}", user_id="u1")
+    history.flush()
+
+    assert sum(len(batch) for batch in client.inserts) == 5
+    assert max(len(batch) for batch in client.inserts) <= 2
+    row = client.rows[0]
+    assert row['user_id'] == "u1" and row['class_key'] == "slow flow" and row['track_count'] == 1
+    assert history.stats()['written'] == 5
+
+
+def test_record_never_waits_for_the_database():
+    client = FakeClient()
+    client.gate.clear()
+    history = PlaylistHistory(client, batch_size=1, flush_interval=0.01, max_pending=2)
+
+    started = time.perf_counter()
+    for index in range(5):
+        history.record(playlist_generator.normalize_request(REQUEST), RESPONSE, f"fp{index}")
+    assert time.perf_counter() - started < 0.5
+    # One row is held by the stalled insert, two wait in the queue
+    assert history.dropped >= 2
+
+    client.gate.set()
+    history.flush()
+    assert history.written + history.dropped == 5
+
+
+def test_generation_is_recorded_and_identical_requests_reuse_it(monkeypatch):
+    client = FakeClient()
+    history = PlaylistHistory(client, flush_interval=0.01)
+    llm_calls = []
+
+    def fake_text(*args, **kwargs):
+        llm_calls.append(args)
+        return "WARMUP (10 minutes)\n- A - B"
+
+    monkeypatch.setattr(playlist_generator, "get_playlist_history", lambda: history)
+    monkeypatch.setattr(playlist_generator, "get_playlist_cache", lambda: None)
+    monkeypatch.setattr(playlist_generator, "get_template_store", lambda: None)
+    monkeypatch.setattr(playlist_generator, "get_track_catalog", lambda: None)
+    monkeypatch.setattr(playlist_generator, "generate_playlist_text", fake_text)
+    monkeypatch.setattr(playlist_generator, "search_spotify_tracks", lambda text, **kwargs: RESPONSE['spotify_integration'])
+    # Flushing is the handler's job, after the response is sent
+    flushes = []
+    history.flush_if_serverless = lambda *args: flushes.append(args)
+
+    first = playlist_generator.generate_playlist(dict(REQUEST, user_id="u1"))
+    history.flush()
+    assert first['source'] == "langchain_agent_with_spotify"
+    assert client.rows[0]['fingerprint'] == playlist_generator.request_fingerprint(REQUEST)
+
+    second = playlist_generator.generate_playlist(dict(REQUEST, class_name="slow flow"))
+    history.flush()
+    assert second['source'] == "history"
+    assert len(llm_calls) == 1
+    assert flushes == []
+    # Reused playlists are history too, but never reused themselves
+    assert [row['source'] for row in client.rows] == ["langchain_agent_with_spotify", "history"]
+
+
+def test_serverless_flush_writes_without_waiting_for_the_batch():
+    client = FakeClient()
+    # A batch would wait a minute to fill; the flush writes the row straight away
+    history = PlaylistHistory(client, flush_interval=60)
+    history.record(playlist_generator.normalize_request(REQUEST), RESPONSE, "fp")
+    started = time.perf_counter()
+    history.flush_if_serverless(serverless=True)
+    assert time.perf_counter() - started < 1
+    assert len(client.rows) == 1
+    assert history.stats()["unflushed"] == 0
+
+
+def test_slow_lookup_does_not_hold_up_the_request():
+    history = PlaylistHistory(FakeClient())
+    release = threading.Event()
+    lookups = []
+
+    def slow_latest(fingerprint, sources):
+        lookups.append(fingerprint)
+        release.wait(5)
+        return RESPONSE
+
+    history.latest = slow_latest
+    started = time.perf_counter()
+    assert history.reusable("fp", ("langchain_agent_with_spotify",), timeout=0.05) is None
+    assert time.perf_counter() - started < 1
+    # A second miss joins the running lookup instead of starting another
+    assert history.reusable("fp", ("langchain_agent_with_spotify",), timeout=0.05) is None
+
+    release.set()
+    for _ in range(100):
+        if history.reusable("fp", ("langchain_agent_with_spotify",), timeout=0.05):
+            break
+        time.sleep(0.01)
+    assert history.reusable("fp", ("langchain_agent_with_spotify",)) == RESPONSE
+    assert lookups == ["fp"]
+
+
+def test_coalesced_requests_are_reusable_once(monkeypatch):
+    client = FakeClient()
+    history = PlaylistHistory(client, flush_interval=0.01)
+    release = threading.Event()
+    flight = playlist_generator._generations
+
+    def slow_text(*args, **kwargs):
+        release.wait(5)
+        return "WARMUP (10 minutes)\n- A - B"
+
+    monkeypatch.setattr(playlist_generator, "get_playlist_history", lambda: history)
+    monkeypatch.setattr(playlist_generator, "get_playlist_cache", lambda: None)
+    monkeypatch.setattr(playlist_generator, "get_template_store", lambda: None)
+    monkeypatch.setattr(playlist_generator, "get_track_catalog", lambda: None)
+    monkeypatch.setattr(playlist_generator, "generate_playlist_text", slow_text)
+    monkeypatch.setattr(playlist_generator, "search_spotify_tracks", lambda text, **kwargs: RESPONSE['spotify_integration'])
+    coalesced_timings = GENERATION_SECONDS.labels(source="coalesced").snapshot()[2]
+    joined = flight.coalesced
+
+    threads = [threading.Thread(target=playlist_generator.generate_playlist,
+                                args=(dict(REQUEST, fresh=True, user_id=f"u{index}"),))
+               for index in range(3)]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + 5
+    while flight.coalesced < joined + 2 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    history.flush()
+
+    # Every user gets their row; only the run's own is offered for reuse
+    assert sorted(row['user_id'] for row in client.rows) == ["u0", "u1", "u2"]
+    assert [row['reusable'] for row in client.rows].count(True) == 1
+    assert GENERATION_SECONDS.labels(source="coalesced").snapshot()[2] == coalesced_timings + 2
+
+
+def test_warm_cache_loads_only_real_playlists():
+    client = FakeClient()
+    client.rows = [
+        dict(REQUEST, degraded=False, reusable=True, response=RESPONSE),
+        dict(REQUEST, degraded=False, reusable=True, response=dict(RESPONSE, source="semantic_cache")),
+        dict(REQUEST, degraded=True, reusable=True, response=dict(RESPONSE, degraded=True)),
+        # A coalesced request's copy of the first row
+        dict(REQUEST, degraded=False, reusable=False, response=RESPONSE),
+    ]
+    stored = []
+
+    class FakeCache:
+        def store(self, request, response):
+            stored.append((request, response))
+
+    assert warm_cache(FakeCache(), PlaylistHistory(client), is_cacheable) == 1
+    assert stored[0][0]['duration'] == 60
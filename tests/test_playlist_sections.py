@@ -0,0 +1,145 @@
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import playlist_sections
+from tools.playlist_sections import (SectionNotFoundError, find_section, regenerate_section, structure_playlist,
+                                     validate_section_request)
+from utils.responses import compact_playlist_response
+
+PLAYLIST = """**WARMUP (10 minutes)**
+BPM: 60-80 | Energy: Gentle
+- Bon Iver - Holocene
+- Novo Amor - Anchor
+
+**PEAK (15 minutes)**
+BPM: 110-125 | Energy: High
+- Avicii - Levels
+
+**COOLDOWN/SAVASANA (10 minutes)**
+- Nils Frahm - Says"""
+
+
+def spotify(track_id):
+    return {"spotify_id": track_id, "name": track_id, "artists": ["X"], "uri": f"spotify:track:{track_id}"}
+
+
+INTEGRATION = {
+    "search_results": {"successful_tracks": [
+        {"original_query": "Bon Iver - Holocene", "spotify_data": spotify("holocene")},
+        {"original_query": "Novo Amor - Anchor", "spotify_data": spotify("anchor")},
+        {"original_query": "Avicii - Levels", "spotify_data": spotify("levels")},
+        {"original_query": "Nils Frahm - Says", "spotify_data": spotify("says")},
+    ]},
+    "track_ids": ["holocene", "anchor", "levels", "says"]
+}
+
+
+class FakeGateway:
+    def __init__(self, text):
+        self.text = text
+        self.prompts = []
+
+    def complete(self, messages, **kwargs):
+        self.prompts.append(messages[0]['content'])
+        return {"text": self.text}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    state = {"searched": [], "gateway": FakeGateway(""), "ids": {}}
+
+    def fake_search(text, sp=None, on_progress=None, dedupe=True):
+        queries = [line[2:] for line in text.split('\n')]
+        state["searched"].append(queries)
+        found = [{"original_query": query, "spotify_data": spotify(state["ids"].get(query, query.lower()))}
+                 for query in queries]
+        return {"search_results": {"found_count": len(found), "total_tracks": len(queries), "successful_tracks": found},
+                "track_ids": [track['spotify_data']['spotify_id'] for track in found]}
+
+    monkeypatch.setattr(playlist_sections, "search_spotify_tracks", fake_search)
+    monkeypatch.setattr(playlist_sections, "get_gateway", lambda: state["gateway"])
+    return state
+
+
+def test_structure_keeps_resolved_ids():
+    sections = structure_playlist(PLAYLIST, INTEGRATION)
+    assert [section['name'] for section in sections] == ["WARMUP", "PEAK", "COOLDOWN/SAVASANA"]
+    assert sections[1]['tracks'] == [{"query": "Avicii - Levels", "spotify_id": "levels"}]
+    # Compact responses have no successful_tracks
+    assert structure_playlist(PLAYLIST)[0]['tracks'][0]['spotify_id'] is None
+
+
+def test_find_section_by_name_or_position():
+    sections = structure_playlist(PLAYLIST)
+    assert find_section(sections, "peak") == 1
+    assert find_section(sections, "savasana") == 2
+    assert find_section(sections, 0) == 0
+    with pytest.raises(SectionNotFoundError):
+        find_section(sections, "flow")
+
+
+def test_only_the_section_is_generated_and_searched(pipeline):
+    pipeline["gateway"].text = "- Avicii - Levels\n- Bon Iver - Holocene\n- Odesza - Loyal\n- Rüfüs Du Sol - Innerbloom"
+    # Resolves to a track the warmup already has
+    pipeline["ids"]["Rüfüs Du Sol - Innerbloom"] = "anchor"
+
+    response = regenerate_section({"playlist": PLAYLIST, "spotify_integration": INTEGRATION, "section": "PEAK",
+                                   "constraints": {"bpm": "120-130", "notes": "less EDM"}})
+
+    # Rejected and kept tracks are excluded before searching
+    assert pipeline["searched"] == [["Odesza - Loyal", "Rüfüs Du Sol - Innerbloom"]]
+    prompt = pipeline["gateway"].prompts[0]
+    assert "less EDM" in prompt and "BPM: 120-130" in prompt and "- Nils Frahm - Says" in prompt
+
+    peak = response['sections'][1]
+    assert peak['tracks'] == [{"query": "Odesza - Loyal", "spotify_id": "odesza - loyal"}]
+    assert peak['details'] == ["BPM: 120-130 | Energy: as before"]
+    assert response['sections'][0] == structure_playlist(PLAYLIST, INTEGRATION)[0]
+    assert response['spotify_integration']['track_ids'] == ["holocene", "anchor", "odesza - loyal", "says"]
+    assert "- Odesza - Loyal" in response['playlist'] and "Levels" not in response['playlist']
+    assert response['regenerated'] == {"section": "PEAK", "tracks": 1, "searched": 2, "kept_tracks": 3}
+
+
+def test_kept_tracks_without_ids_are_resolved_again(pipeline):
+    pipeline["gateway"].text = "- Odesza - Loyal"
+
+    response = regenerate_section({"playlist": PLAYLIST, "section": 1})
+
+    assert pipeline["searched"] == [["Odesza - Loyal"], ["Bon Iver - Holocene", "Novo Amor - Anchor", "Nils Frahm - Says"]]
+    assert len(response['spotify_integration']['track_ids']) == 4
+
+    # With the returned sections sent back, kept tracks are not searched again
+    pipeline["searched"].clear()
+    pipeline["gateway"].text = "- Odesza - Loyal\n- Tycho - Awake"
+    regenerate_section({"sections": response['sections'], "section": "warmup"})
+    assert pipeline["searched"] == [["Tycho - Awake"]]
+
+
+def test_compact_response_keeps_ids_for_kept_tracks(pipeline):
+    pipeline["gateway"].text = "- Odesza - Loyal"
+    compact = compact_playlist_response({"playlist": PLAYLIST, "spotify_integration": INTEGRATION})
+
+    response = regenerate_section(dict(compact, section="peak"))
+
+    assert pipeline["searched"] == [["Odesza - Loyal"]]
+    assert response['spotify_integration']['track_ids'] == ["holocene", "anchor", "odesza - loyal", "says"]
+
+
+def test_malformed_sections_are_rejected():
+    def error(sections):
+        return validate_section_request({"sections": sections, "section": 0})
+
+    assert error("peak") == "Sections must be a list"
+    assert error([{"name": "PEAK", "tracks": []}]) == "Each section needs a name, heading, details and tracks"
+    section = {"name": "PEAK", "heading": "**PEAK**", "details": [], "tracks": []}
+    assert error([dict(section, details=[1])]) == "Section details must be lines of text"
+    assert error([dict(section, minutes="ten")]) == "Section minutes must be a number"
+    assert error([dict(section, tracks=["Avicii - Levels"])]) == "Each track needs a query"
+    assert error([dict(section, tracks=[{"query": "Avicii - Levels", "spotify_id": 5}])]) == "Track spotify_id must be text"
+    assert error([dict(section, tracks=[{"query": "Avicii - Levels"}])]) is None
+    assert validate_section_request({"playlist": ["- A - B"], "section": 0}) == "Playlist must be text"
@@ -0,0 +1,81 @@
+import sys
+import os
+import random
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.playlist_templates import PlaylistTemplateStore, template_key
+
+PLAYLIST = "WARMUP (10 minutes)\n- A - B\n\nFLOW/ACTIVE (40 minutes)\n- C - D\n\nCOOLDOWN/SAVASANA (10 minutes)\n- E - F"
+
+
+class FakeTable:
+    """Just enough of the Supabase query builder for the template store"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.selects = 0
+
+    def select(self, columns):
+        self.selects += 1
+        self.filters = []
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def execute(self):
+        return type("Result", (), {"data": [row for row in self.rows if all(f(row) for f in self.filters)]})
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.tables = {"playlist_templates": FakeTable(rows)}
+
+    def table(self, name):
+        return self.tables[name]
+
+
+def request(prefs="lofi hip hop", duration=60, description="Dynamic flow"):
+    return {"class_name": "Vinyasa Flow", "class_description": description,
+            "music_preferences": prefs, "duration": duration}
+
+
+def row(name, duration=60):
+    return {
+        "template_key": template_key(request()),
+        "duration": duration,
+        "response": {"success": True, "playlist": PLAYLIST, "name": name, "source": "langchain_agent_with_spotify"},
+        "created_at": "2026-01-01T00:00:00+00:00"
+    }
+
+
+def test_template_key_ignores_word_order_and_groups_durations():
+    assert template_key(request("Lofi, hip-hop")) == template_key(request("hip hop lofi"))
+    assert template_key(request(duration=60)) == template_key(request(duration=62))
+    assert template_key(request(duration=60)) != template_key(request(duration=90))
+    assert template_key(request()) != template_key(request(description="My own class"))
+
+
+def test_pick_rotates_through_the_pool_and_adapts_duration():
+    client = FakeClient([row("a"), row("b"), row("c")])
+    store = PlaylistTemplateStore(client=client, rng=random.Random(0))
+
+    picked = {store.pick(request(duration=66))['name'] for _ in range(30)}
+    assert picked == {"a", "b", "c"}
+
+    response = store.pick(request(duration=66))
+    assert response['source'] == "precomputed_template"
+    assert "(44 minutes)" in response['playlist']
+    # Pools are read once per TTL, not per request
+    assert client.tables["playlist_templates"].selects == 1
+
+
+def test_pick_misses_for_uncovered_requests():
+    client = FakeClient([row("a")])
+    store = PlaylistTemplateStore(client=client)
+    assert store.pick(request("death metal")) is None
+    assert store.stats()['misses'] == 1
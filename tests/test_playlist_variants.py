@@ -0,0 +1,141 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import playlist_generator
+from tools.playlist_variants import build_variants_response, parse_variants, playlist_text, unique_queries
+
+VARIANTS_TEXT = """**WARMUP (9 minutes)**
+BPM: 60-80 | Energy: Gentle
+Option A
+- Bon Iver - Holocene
+- Novo Amor - Anchor
+Option B
+- Novo Amor - Anchor
+- Sufjan Stevens - Mystery of Love
+
+**COOLDOWN/SAVASANA (9 minutes)**
+**Option A:**
+- Ólafur Arnalds - Near Light
+Option B
+- Nils Frahm - Says
+"""
+
+
+def spotify(track_id):
+    return {"spotify_id": track_id, "name": track_id, "artists": ["X"], "uri": f"spotify:track:{track_id}"}
+
+
+def test_parse_sections_and_options():
+    sections = parse_variants(VARIANTS_TEXT)
+
+    assert [section['name'] for section in sections] == ["WARMUP", "COOLDOWN/SAVASANA"]
+    assert sections[0]['minutes'] == 9
+    assert sections[0]['details'] == ["BPM: 60-80 | Energy: Gentle"]
+    assert sections[0]['options'] == [["Bon Iver - Holocene", "Novo Amor - Anchor"],
+                                      ["Novo Amor - Anchor", "Sufjan Stevens - Mystery of Love"]]
+    assert sections[1]['options'] == [["Ólafur Arnalds - Near Light"], ["Nils Frahm - Says"]]
+
+
+def test_plain_playlist_text_is_one_option():
+    sections = parse_variants("WARMUP (5 minutes)\n- A - One\n- B - Two")
+    assert sections[0]['options'] == [["A - One", "B - Two"]]
+    assert playlist_text(sections) == "WARMUP (5 minutes)\n- A - One\n- B - Two"
+
+
+def test_union_is_resolved_once():
+    queries = unique_queries(parse_variants(VARIANTS_TEXT))
+    assert len(queries) == 5
+    assert queries.count("Novo Amor - Anchor") == 1
+
+
+def test_response_uses_first_options_and_never_repeats_across_sections():
+    sections = parse_variants(VARIANTS_TEXT)
+    resolved = {
+        "bon iver - holocene": spotify("holocene"),
+        "novo amor - anchor": spotify("anchor"),
+        "sufjan stevens - mystery of love": spotify("mystery"),
+        # Resolves to a recording the warmup already offers - dropped from the cooldown
+        "nils frahm - says": spotify("anchor"),
+    }
+    response = build_variants_response(sections, resolved, 2)
+
+    assert response['spotify_integration']['track_ids'] == ["holocene", "anchor"]
+    assert response['spotify_integration']['search_results']['found_count'] == 2
+    assert response['spotify_integration']['search_results']['total_tracks'] == 3
+    assert "- Bon Iver - Holocene" in response['playlist']
+    assert "Nils Frahm" not in response['playlist']
+
+    warmup, cooldown = response['variants']['sections']
+    assert [option['label'] for option in warmup['options']] == ["A", "B"]
+    # Options are alternatives, so they may share a track
+    assert [track['spotify_id'] for track in warmup['options'][1]['tracks']] == ["anchor", "mystery"]
+    assert cooldown['options'] == [{"label": "A", "tracks": [{"query": "Ólafur Arnalds - Near Light", "spotify_id": None}]}]
+    assert response['variants']['count'] == 2
+
+
+def test_generator_makes_one_llm_call_and_one_search_pass(monkeypatch):
+    llm_calls = []
+    searched = []
+
+    def fake_variants_text(request, deadline=None):
+        llm_calls.append(request['variants'])
+        return VARIANTS_TEXT
+
+    def fake_search(text, sp=None, on_progress=None, dedupe=True):
+        queries = playlist_generator.extract_tracks_from_text(text)
+        searched.append(queries)
+        return {"search_results": {"found_count": len(queries), "total_tracks": len(queries),
+                                   "successful_tracks": [{"original_query": query, "spotify_data": spotify(f"id{index}")}
+                                                         for index, query in enumerate(queries)]},
+                "track_ids": [f"id{index}" for index in range(len(queries))]}
+
+    monkeypatch.setattr(playlist_generator, "generate_variants_text", fake_variants_text)
+    monkeypatch.setattr(playlist_generator, "search_spotify_tracks", fake_search)
+    monkeypatch.setattr(playlist_generator, "get_track_catalog", lambda: None)
+    monkeypatch.setattr(playlist_generator, "get_playlist_cache", lambda: None)
+    monkeypatch.setattr(playlist_generator, "get_template_store", lambda: None)
+
+    response = playlist_generator.generate_playlist(
+        {"class_name": "Slow Flow", "duration": 18, "variants": 2, "fresh": True})
+
+    assert llm_calls == [2]
+    assert len(searched) == 1 and len(searched[0]) == 5
+    assert response['source'] == "langchain_agent_variants"
+    assert response['variants']['resolved_tracks'] == 5
+
+
+def test_variants_skip_single_playlist_shortcuts(monkeypatch):
+    class Shortcut:
+        def __init__(self):
+            self.calls = 0
+
+        def __call__(self, *args):
+            self.calls += 1
+            return {"success": True, "source": "precomputed_template"}
+
+    shortcut = Shortcut()
+    monkeypatch.setattr(playlist_generator, "get_template_store", lambda: type("Store", (), {"pick": shortcut})())
+    monkeypatch.setattr(playlist_generator, "get_playlist_cache", lambda: None)
+    monkeypatch.setattr(playlist_generator, "get_track_catalog", lambda: None)
+    monkeypatch.setattr(playlist_generator, "get_playlist_history", lambda: None)
+    monkeypatch.setattr(playlist_generator, "generate_variants_text", lambda request, deadline=None: VARIANTS_TEXT)
+    monkeypatch.setattr(playlist_generator, "search_spotify_tracks", lambda text, **kwargs: {
+        "search_results": {"found_count": 0, "total_tracks": 0, "successful_tracks": []}, "track_ids": []})
+
+    single = playlist_generator.generate_playlist({"class_name": "Slow Flow", "duration": 18})
+    assert single['source'] == "precomputed_template"
+
+    response = playlist_generator.generate_playlist({"class_name": "Slow Flow", "duration": 18, "variants": 2})
+    assert shortcut.calls == 1
+    assert 'variants' in response
+
+
+def test_variants_are_validated_and_fingerprinted():
+    base = {"class_name": "Slow Flow", "duration": 60}
+    assert playlist_generator.validate_request(dict(base, variants=9)) == "Variants must be between 1 and 4"
+    assert playlist_generator.validate_request(dict(base, variants="x")) == "Variants must be a number"
+    assert playlist_generator.request_fingerprint(dict(base, variants=1)) == playlist_generator.request_fingerprint(base)
+    assert playlist_generator.request_fingerprint(dict(base, variants=3)) != playlist_generator.request_fingerprint(base)
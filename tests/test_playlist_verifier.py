@@ -0,0 +1,124 @@
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+
+from tools.track_catalog import TrackCatalog
+from tools.playlist_verifier import parse_sections, render_sections, verify_playlist
+from tools.track_resolution import dedupe_resolved, rewrite_playlist_text
+
+PLAYLIST = """**WARMUP (10 minutes)**
+BPM: 60-80 | Energy: Gentle
+- A - Slow One
+- B - Too Fast
+
+**PEAK (20 minutes)**
+BPM: 100-120 | Energy: High
+- C - Peak Low
+- D - Peak High
+- E - Not On Spotify
+
+**COOLDOWN/SAVASANA (10 minutes)**
+- F - Calm"""
+
+FEATURES = {
+    "a": (70, 0.3), "b": (110, 0.8), "c": (105, 0.6), "d": (115, 0.9), "f": (55, 0.1)
+}
+
+
+def resolved_response():
+    tracks = []
+    for query in ["A - Slow One", "B - Too Fast", "C - Peak Low", "D - Peak High", "F - Calm"]:
+        track_id = query[0].lower()
+        tracks.append({"original_query": query, "spotify_data": {
+            "spotify_id": track_id, "name": query, "artists": [query[0]], "artist_ids": [], "uri": f"spotify:track:{track_id}"
+        }})
+    return {
+        "success": True,
+        "playlist": PLAYLIST,
+        "spotify_integration": {
+            "search_results": {"found_count": 5, "total_tracks": 6, "successful_tracks": tracks},
+            "track_ids": [t["spotify_data"]["spotify_id"] for t in tracks]
+        },
+        "ready_for_export": True
+    }
+
+
+class FakeSpotify:
+    def __init__(self):
+        self.feature_calls = 0
+
+    def audio_features(self, ids):
+        self.feature_calls += 1
+        return [{"id": i, "tempo": FEATURES[i][0], "energy": FEATURES[i][1]} for i in ids]
+
+    def artists(self, ids):
+        return {"artists": []}
+
+
+def test_parse_and_render_round_trip():
+    parsed = parse_sections(PLAYLIST)
+    assert [s['name'] for s in parsed['sections']] == ["WARMUP", "PEAK", "COOLDOWN/SAVASANA"]
+    assert parsed['sections'][0]['bpm'] == (60, 80)
+    # No BPM line - falls back to the prompt's cooldown range
+    assert parsed['sections'][2]['bpm'] == (50, 70)
+    assert render_sections(parsed) == PLAYLIST
+
+
+def test_out_of_range_track_moves_to_fitting_section():
+    sp = FakeSpotify()
+    catalog = TrackCatalog()
+    verified = verify_playlist(resolved_response(), catalog, sp)
+
+    sections = parse_sections(verified['playlist'])['sections']
+    assert sections[0]['queries'] == ["A - Slow One"]
+    # B moved into the peak; unresolved tracks stay at the end of their section
+    assert sorted(sections[1]['queries'][:3]) == ["B - Too Fast", "C - Peak Low", "D - Peak High"]
+    assert sections[1]['queries'][3] == "E - Not On Spotify"
+    assert verified['verification']['moved'] == 1
+    assert verified['verification']['flagged'][0]['moved_to'] == "PEAK"
+    assert verified['spotify_integration']['track_ids'][0] == "a"
+    assert sorted(verified['spotify_integration']['track_ids']) == ["a", "b", "c", "d", "f"]
+
+    # Features are memoized in the catalog - no second fetch
+    verify_playlist(resolved_response(), catalog, sp)
+    assert sp.feature_calls == 1
+
+
+def test_unknown_features_leave_playlist_alone():
+    catalog = TrackCatalog()
+    verified = verify_playlist(resolved_response(), catalog, sp=None)
+    assert verified['verification']['unknown'] == 5
+    assert verified['verification']['moved'] == 0
+    assert verified['spotify_integration']['track_ids'] == ["a", "b", "c", "d", "f"]
+
+
+def test_backfilled_repeat_survives_verification():
+    holocene = {"spotify_id": "a", "name": "Holocene", "artists": ["Bon Iver"], "artist_ids": ["boniver"], "uri": "spotify:track:a"}
+    towers = {"spotify_id": "c", "name": "Towers", "artists": ["Bon Iver"], "artist_ids": ["boniver"], "uri": "spotify:track:c"}
+    calm = {"spotify_id": "f", "name": "Calm", "artists": ["F"], "artist_ids": ["f"], "uri": "spotify:track:f"}
+    slots = [
+        {"original_query": "Bon Iver - Holocene", "spotify_data": holocene, "candidates": []},
+        {"original_query": "Bon Iver - Holocene", "spotify_data": holocene, "candidates": [towers]},
+        {"original_query": "F - Calm", "spotify_data": calm, "candidates": []},
+    ]
+    tracks, dropped, _ = dedupe_resolved(slots, artist_cap=0)
+    search_results = {"successful_tracks": tracks, "dropped_tracks": dropped}
+    playlist = ("**WARMUP (10 minutes)**\nBPM: 60-80 | Energy: Gentle\n- Bon Iver - Holocene\n- Bon Iver - Holocene\n\n"
+                "**COOLDOWN/SAVASANA (10 minutes)**\n- F - Calm")
+    response = {
+        "playlist": rewrite_playlist_text(playlist, search_results),
+        "spotify_integration": {"search_results": search_results,
+                                "track_ids": [t["spotify_data"]["spotify_id"] for t in tracks]}
+    }
+
+    verified = verify_playlist(response, TrackCatalog(), FakeSpotify())
+
+    track_ids = verified['spotify_integration']['track_ids']
+    assert sorted(track_ids) == ["a", "c", "f"]
+    assert "- Bon Iver - Towers" in verified['playlist']
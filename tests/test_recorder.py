@@ -0,0 +1,81 @@
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.recorder import Cassette, ReplayMissError, recording, replaying, request_key
+
+
+def test_request_key_ignores_host_query_order_and_json_key_order():
+    a = request_key("post", "https://a.example/v1/search?q=x&type=track", b'{"q": "x", "limit": 1}')
+    b = request_key("POST", "https://b.example/v1/search?type=track&q=x", b'{"limit":1,"q":"x"}')
+    assert a == b
+    assert a != request_key("POST", "https://a.example/v1/search?q=y&type=track", b'{"q": "x", "limit": 1}')
+
+
+def test_cassette_round_trip_replays_in_order_with_scaled_latency(tmp_path):
+    path = str(tmp_path / "run.jsonl.gz")
+    cassette = Cassette(path)
+    body = json.dumps({"tracks": {"items": []}}, indent=2).encode()
+    cassette.record("GET", "https://api.spotify.com/v1/search?q=a", None, 200,
+                    {"Content-Type": "application/json", "Date": "today"}, body, 0.2)
+    cassette.record("GET", "https://api.spotify.com/v1/search?q=a", None, 429,
+                    {"Content-Type": "application/json", "Retry-After": "1"}, b'{}', 0.0)
+    cassette.save()
+
+    replay = Cassette(path, speed=0.1).load()
+    started = time.perf_counter()
+    status, headers, content = replay.replay("GET", "https://other.host/v1/search?q=a", None)
+    assert time.perf_counter() - started >= 0.02
+    assert status == 200
+    assert json.loads(content) == {"tracks": {"items": []}}
+    # Stored compact, and only the headers clients act on
+    assert len(content) < len(body)
+    assert headers == {"content-type": "application/json"}
+
+    assert replay.replay("GET", "https://api.spotify.com/v1/search?q=a", None)[0] == 429
+    # Exhausted keys keep answering with the last exchange
+    assert replay.replay("GET", "https://api.spotify.com/v1/search?q=a", None)[0] == 429
+
+    with pytest.raises(ReplayMissError):
+        replay.replay("GET", "https://api.spotify.com/v1/search?q=b", None)
+    assert replay.stats()["misses"] == 1
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(0.05)
+        payload = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_requests_traffic_is_recorded_and_replayed_offline(tmp_path):
+    requests = pytest.importorskip("requests")
+    server = HTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/search?q=yoga"
+    path = str(tmp_path / "run.jsonl.gz")
+
+    with recording(path) as cassette:
+        assert requests.get(url).json() == {"path": "/v1/search?q=yoga"}
+    assert cassette.stats()["recorded"] == 1
+    server.shutdown()
+    server.server_close()
+
+    with replaying(path, speed=0) as cassette:
+        assert requests.get(url).json() == {"path": "/v1/search?q=yoga"}
+    assert cassette.stats()["hits"] == 1
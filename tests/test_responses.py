@@ -0,0 +1,94 @@
+import sys
+import os
+import gzip
+import io
+import json
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import responses
+from utils.responses import (
+    compact_playlist_response,
+    encode_json,
+    negotiate_encoding,
+    send_json,
+)
+
+
+class FakeHandler:
+    """Minimal stand-in for BaseHTTPRequestHandler's response API"""
+
+    def __init__(self, headers=None, path="/"):
+        self.headers = headers or {}
+        self.path = path
+        self.status = None
+        self.sent_headers = {}
+        self.wfile = io.BytesIO()
+
+    def send_response(self, status):
+        self.status = status
+
+    def send_header(self, name, value):
+        self.sent_headers[name] = value
+
+    def end_headers(self):
+        pass
+
+
+def test_encode_json_roundtrip():
+    data = {"playlist": "🧘 Warmup", "track_ids": ["a", "b"]}
+    assert json.loads(encode_json(data)) == data
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    if responses.brotli is not None:
+        assert negotiate_encoding("gzip, br") == "br"
+    else:
+        assert negotiate_encoding("gzip, br") == "gzip"
+
+
+def test_send_json_compresses_large_bodies():
+    data = {"playlist": "- Artist - Song\n" * 200}
+    handler = FakeHandler(headers={"Accept-Encoding": "gzip"})
+    send_json(handler, data)
+
+    body = handler.wfile.getvalue()
+    assert handler.sent_headers["Content-Encoding"] == "gzip"
+    assert handler.sent_headers["Content-Length"] == str(len(body))
+    assert json.loads(gzip.decompress(body)) == data
+
+
+def test_send_json_skips_small_bodies():
+    handler = FakeHandler(headers={"Accept-Encoding": "gzip"})
+    send_json(handler, {"status": "healthy"}, 201)
+
+    assert handler.status == 201
+    assert "Content-Encoding" not in handler.sent_headers
+    assert json.loads(handler.wfile.getvalue()) == {"status": "healthy"}
+
+
+def test_compact_playlist_response():
+    response = {
+        "success": True,
+        "playlist": "- Artist - Song",
+        "spotify_integration": {
+            "search_results": {
+                "found_count": 1,
+                "total_tracks": 1,
+                "successful_tracks": [{"original_query": "Artist - Song", "spotify_data": {"spotify_id": "id1"}}]
+            },
+            "track_ids": ["id1"]
+        }
+    }
+    compact = compact_playlist_response(response)
+
+    assert "successful_tracks" not in compact["spotify_integration"]["search_results"]
+    assert compact["spotify_integration"]["search_results"]["resolved"] == {"Artist - Song": "id1"}
+    assert compact["spotify_integration"]["track_ids"] == ["id1"]
+    # The original response is left untouched
+    assert "successful_tracks" in response["spotify_integration"]["search_results"]
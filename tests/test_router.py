@@ -0,0 +1,47 @@
+import json
+import re
+import sys
+import os
+
+# Add parent and api directories to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'api'))
+
+import index
+
+
+def test_resolve_route_by_path():
+    assert index.resolve_route('/api/health') == 'health'
+    assert index.resolve_route('/api/classes?user_id=abc') == 'classes'
+    assert index.resolve_route('/api/generate-playlist/') == 'generate-playlist'
+
+
+def test_resolve_route_from_rewrite():
+    assert index.resolve_route('/api/index?route=test-spotify') == 'test-spotify'
+    assert index.resolve_route('/api/index?route=unknown') is None
+    assert index.resolve_route('/api') is None
+
+
+def test_load_endpoint_is_cached():
+    first = index.load_endpoint('health')
+    assert index.load_endpoint('health') is first
+
+
+def test_vercel_routes_every_api_path_to_the_router():
+    with open(os.path.join(ROOT, 'vercel.json')) as f:
+        config = json.load(f)
+    # A rewrite loses to a matching api/<name>.py function - API paths must be routed
+    assert 'rewrites' not in config
+
+    def route(path):
+        for rule in config['routes']:
+            match = re.fullmatch(rule['src'], path)
+            if match:
+                return match.expand(rule['dest'].replace('$', '\\'))
+        return path
+
+    for path, name in index.ROUTES.items():
+        destination = route(path)
+        assert destination.startswith('/api/index?')
+        assert index.resolve_route(destination) == name
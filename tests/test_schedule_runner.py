@@ -0,0 +1,96 @@
+import sys
+import os
+import json
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.schedule_runner import ScheduleRunner, load_results, load_schedule, row_keys
+from tools.playlist_exporter import PlaylistExportError
+
+SCHEDULE = """id,class_name,class_description,music_preferences,duration
+,Vinyasa Flow,Dynamic flow,lofi,60
+,Vinyasa Flow,Dynamic flow,lofi,60
+mon-yin,Yin,Slow holds,,75
+,Broken,,,
+"""
+
+
+def fake_generate(request):
+    return {
+        "success": True,
+        "playlist": f"{request['class_name']} playlist",
+        "spotify_integration": {"track_ids": ["1", "2", "3"]},
+        "source": "langchain_agent_with_spotify"
+    }
+
+
+class FlakyExporter:
+    """Fails the first export part way, then succeeds"""
+
+    def __init__(self):
+        self.calls = []
+
+    def export(self, playlist_name, track_ids, playlist_id=None):
+        self.calls.append((playlist_name, playlist_id))
+        if len(self.calls) == 1:
+            raise PlaylistExportError("rate limited", playlist_id="pl-1", added=1, track_ids=track_ids)
+        return {"playlist_id": playlist_id or "pl-new", "playlist_url": "https://x", "added": len(track_ids)}
+
+
+def write_schedule(tmp_path):
+    path = tmp_path / "schedule.csv"
+    path.write_text(SCHEDULE)
+    return load_schedule(str(path))
+
+
+def test_schedule_rows_get_stable_keys(tmp_path):
+    rows = write_schedule(tmp_path)
+    keys = row_keys(rows)
+    assert len(set(keys)) == 4
+    assert keys[2] == "mon-yin"
+    assert keys[0].endswith("#1") and keys[1].endswith("#2")
+
+
+def test_run_writes_jsonl_and_resume_skips_finished_rows(tmp_path):
+    rows = write_schedule(tmp_path)
+    output = str(tmp_path / "out.jsonl")
+    calls = []
+
+    def generate(request):
+        calls.append(request)
+        return fake_generate(request)
+
+    stats = ScheduleRunner(output, workers=2, generate=generate, log=lambda _: None).run(rows)
+    assert stats["succeeded"] == 3 and stats["failed"] == 1
+    assert stats["tracks"] == 9
+    assert len(calls) == 3
+
+    lines = [json.loads(line) for line in open(output)]
+    assert len(lines) == 4
+
+    # An interrupted run leaves a partial last line behind
+    with open(output, "a") as f:
+        f.write('{"key": "mon-')
+    stats = ScheduleRunner(output, workers=2, generate=generate, log=lambda _: None).run(rows)
+    assert stats["skipped"] == 3 and stats["processed"] == 1
+    assert len(calls) == 3
+
+
+def test_failed_export_resumes_into_the_same_playlist(tmp_path):
+    rows = write_schedule(tmp_path)[2:3]
+    output = str(tmp_path / "out.jsonl")
+    exporter = FlakyExporter()
+    generated = []
+
+    def generate(request):
+        generated.append(request)
+        return fake_generate(request)
+
+    runner = ScheduleRunner(output, exporter=exporter, generate=generate, log=lambda _: None)
+    assert runner.run(rows)["export_failed"] == 1
+    assert runner.run(rows)["exported"] == 1
+
+    assert len(generated) == 1
+    assert exporter.calls == [("Yin - 75 min", None), ("Yin - 75 min", "pl-1")]
+    assert load_results(output)["mon-yin"]["export"]["success"]
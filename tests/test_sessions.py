@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sessions import SessionStore, needs_refresh, session_from_token
+
+
+def test_session_from_token_uses_expires_in():
+    session = session_from_token({"access_token": "a", "refresh_token": "r", "expires_in": 3600}, "user1")
+    assert session["user_id"] == "user1"
+    assert session["refresh_token"] == "r"
+    assert not needs_refresh(session)
+
+
+def test_needs_refresh_inside_margin():
+    assert needs_refresh({"expires_at": 1030}, now=1000)
+    assert not needs_refresh({"expires_at": 2000}, now=1000)
+    assert needs_refresh({}, now=1000)
+
+
+def test_store_disabled_without_secret():
+    store = SessionStore(secret="")
+    assert not store.enabled
+    assert store.load("yp_spotify_session=abc") is None
+
+
+def test_round_trip_and_tamper():
+    pytest.importorskip("cryptography")
+    store = SessionStore(secret="test-secret")
+    session = {"access_token": "a", "refresh_token": "r", "expires_at": 123, "user_id": "u"}
+
+    cookie = store.dump(session).split(";")[0]
+    assert store.load(cookie) == session
+    assert store.load(cookie[:-2] + "xx") is None
+    assert SessionStore(secret="other").load(cookie) is None
@@ -0,0 +1,60 @@
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.singleflight import SingleFlight
+from tools.playlist_generator import request_fingerprint
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return "playlist"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, "key", slow) for _ in range(8)]
+        # Give every caller time to join the in-flight call
+        deadline = time.time() + 2
+        while flight.coalesced < 7 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results == ["playlist"] * 8
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_exceptions_are_shared_and_not_cached():
+    flight = SingleFlight()
+
+    def boom():
+        raise ValueError("upstream down")
+
+    with pytest.raises(ValueError):
+        flight.do("key", boom)
+    assert flight.do("key", lambda: "ok") == "ok"
+    assert flight.executed == 2
+
+
+def test_fingerprint_normalizes_request():
+    a = request_fingerprint({"class_name": "Vinyasa Flow", "duration": "60",
+                             "music_preferences": "  Chill   INDIE "})
+    b = request_fingerprint({"class_name": "vinyasa flow", "duration": 60,
+                             "music_preferences": "chill indie", "compact": True})
+    c = request_fingerprint({"class_name": "vinyasa flow", "duration": 45,
+                             "music_preferences": "chill indie"})
+    assert a == b
+    assert a != c
@@ -0,0 +1,88 @@
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+
+from tools.track_catalog import TrackCatalog, SECTION_PROFILES, assemble_playlist
+
+
+def make_catalog(path=None, per_section=12, tags=("indie", "folk")):
+    catalog = TrackCatalog(path)
+    tracks = []
+    for profile in SECTION_PROFILES:
+        low, high = profile['bpm']
+        energy = sum(profile['energy']) / 2
+        for i in range(per_section):
+            tracks.append({
+                "id": f"{profile['name']}-{i}",
+                "name": f"Song {i}",
+                "artists": [f"Artist {i}"],
+                "tempo": low + (high - low) * i / per_section,
+                "energy": energy,
+                "duration_ms": 240000,
+                "tags": set(tags)
+            })
+    catalog.add(tracks)
+    return catalog
+
+
+class FakeSpotify:
+    def audio_features(self, ids):
+        return [{"id": track_id, "tempo": 72.0, "energy": 0.3, "duration_ms": 200000} for track_id in ids]
+
+    def artists(self, ids):
+        return {"artists": [{"id": artist_id, "genres": ["indie folk"]} for artist_id in ids]}
+
+
+def test_select_filters_by_bpm_tags_and_exclusions():
+    catalog = make_catalog()
+    picked = catalog.select((60, 80), tags=["indie"], limit=50)
+    assert picked
+    assert all(60 <= track['tempo'] <= 80 or 60 <= track['tempo'] / 2 <= 80 for track in picked)
+
+    assert catalog.select((60, 80), tags=["metal"]) == []
+    excluded = {track['id'] for track in picked}
+    assert not {t['id'] for t in catalog.select((60, 80), tags=["indie"], exclude=excluded, limit=50)} & excluded
+
+
+def test_double_time_tempo_counts_as_half():
+    catalog = TrackCatalog()
+    catalog.add([{"id": "fast", "name": "Fast", "artists": ["X"], "tempo": 140.0}])
+    assert [t['id'] for t in catalog.select((60, 80))] == ["fast"]
+
+
+def test_assemble_fills_every_section_without_repeats():
+    catalog = make_catalog()
+    request = {"class_name": "Vinyasa", "music_preferences": "Indie folk", "duration": 60}
+    response = assemble_playlist(catalog, request, rng=np.random.default_rng(1))
+
+    assert response['source'] == "track_catalog"
+    track_ids = response['spotify_integration']['track_ids']
+    assert len(track_ids) == len(set(track_ids))
+    for profile in SECTION_PROFILES:
+        assert f"**{profile['name']} (" in response['playlist']
+
+
+def test_assemble_declines_novel_taste():
+    catalog = make_catalog()
+    request = {"class_name": "Vinyasa", "music_preferences": "baroque harpsichord", "duration": 60}
+    assert assemble_playlist(catalog, request) is None
+
+
+def test_ingest_and_round_trip(tmp_path):
+    path = str(tmp_path / "catalog.npz")
+    catalog = TrackCatalog(path)
+    catalog.ingest(FakeSpotify(), [
+        {"spotify_id": "t1", "name": "Holocene", "artists": ["Bon Iver"], "artist_ids": ["a1"], "duration_ms": 336000}
+    ], preference_terms=["chill"])
+    catalog.save()
+
+    loaded = TrackCatalog.load(path)
+    assert len(loaded) == 1
+    assert loaded.get("t1")["tempo"] == 72.0
+    assert [t['id'] for t in loaded.select((60, 80), tags=["folk", "chill"], min_tag_overlap=2)] == ["t1"]
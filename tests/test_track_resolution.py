@@ -0,0 +1,146 @@
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import playlist_generator
+from tools.track_resolution import dedupe_resolved, resolved_queries, rewrite_playlist_text
+
+
+def track(track_id, name, artist, isrc=None):
+    return {"spotify_id": track_id, "name": name, "artists": [artist], "artist_ids": [artist.lower()],
+            "isrc": isrc, "uri": f"spotify:track:{track_id}"}
+
+
+def slot(query, data, *candidates, section=0):
+    return {"original_query": query, "spotify_data": data, "candidates": list(candidates), "section": section}
+
+
+def ids(tracks):
+    return [t['spotify_data']['spotify_id'] for t in tracks]
+
+
+def test_same_recording_by_id_isrc_or_version_is_kept_once():
+    juicy = track("juicy", "Juicy", "Biggie", isrc="USBB40580001")
+    slots = [
+        slot("Biggie - Juicy", juicy),
+        slot("The Notorious B.I.G. - Juicy", juicy),
+        # Another release of the same master
+        slot("Notorious BIG - Juicy (Remastered)", track("juicy-remaster", "Juicy - 2005 Remaster", "Biggie", isrc="USBB40580001")),
+        slot("Biggie - Juicy Live", track("juicy-live", "Juicy (Live)", "Biggie")),
+    ]
+    tracks, dropped, stats = dedupe_resolved(slots, artist_cap=0)
+    assert ids(tracks) == ["juicy"]
+    assert [d['reason'] for d in dropped] == ["duplicate"] * 3
+    assert stats == {"duplicates": 3, "capped": 0, "backfilled": 0}
+
+
+def test_covers_count_as_the_same_song():
+    slots = [
+        slot("Leonard Cohen - Hallelujah", track("cohen", "Hallelujah", "Leonard Cohen")),
+        slot("Jeff Buckley - Hallelujah", track("buckley", "Hallelujah", "Jeff Buckley"),
+             track("grace", "Grace", "Jeff Buckley")),
+    ]
+    tracks, dropped, stats = dedupe_resolved(slots)
+    assert ids(tracks) == ["cohen", "grace"]
+    assert stats == {"duplicates": 1, "capped": 0, "backfilled": 1}
+
+
+def test_artist_cap_backfills_in_place_from_the_same_section():
+    slots = [
+        slot("Bon Iver - Holocene", track("holocene", "Holocene", "Bon Iver"), section=0),
+        slot("Bon Iver - Towers", track("towers", "Towers", "Bon Iver"), section=0),
+        # Another version or a cover of the capped song doesn't replace it
+        slot("Bon Iver - Re: Stacks", track("stacks", "Re: Stacks", "Bon Iver"),
+             track("stacks-live", "Re: Stacks - Live", "Bon Iver"),
+             track("stacks-cover", "Re: Stacks", "Cover Band"), section=0),
+        slot("Nils Frahm - Says", track("says", "Says", "Nils Frahm"), track("ambre", "Ambre", "Nils Frahm"),
+             section=1),
+        slot("Olafur Arnalds - Near Light", track("near-light", "Near Light", "Olafur Arnalds"),
+             track("saman", "Saman", "Olafur Arnalds"), section=0),
+    ]
+    tracks, dropped, stats = dedupe_resolved(slots, artist_cap=2)
+
+    # The third Bon Iver slot takes the first fitting candidate from its own section, not "Ambre"
+    assert ids(tracks) == ["holocene", "towers", "saman", "says", "near-light"]
+    # The refill gets its own query, so it can't be confused with the line it replaced
+    assert tracks[2]['original_query'] == "Olafur Arnalds - Saman"
+    assert tracks[2]['replaces'] == "Bon Iver - Re: Stacks"
+    assert dropped == []
+    assert stats == {"duplicates": 0, "capped": 1, "backfilled": 1}
+
+
+def test_artist_cap_is_off_by_default():
+    slots = [slot(f"Bon Iver - {name}", track(name, name, "Bon Iver")) for name in ("A", "B", "C")]
+    tracks, dropped, _ = dedupe_resolved(slots)
+    assert ids(tracks) == ["A", "B", "C"]
+
+
+def test_slots_nothing_fits_are_dropped():
+    data = track("a", "A", "X")
+    tracks, dropped, stats = dedupe_resolved([slot("X - A", data), slot("X - A again", data)])
+    assert ids(tracks) == ["a"]
+    assert dropped == [{"original_query": "X - A again", "reason": "duplicate"}]
+    assert stats["backfilled"] == 0
+
+
+class FakeSpotify:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def search(self, q, type, limit):
+        self.calls.append((q, limit))
+        return {"tracks": {"items": [
+            {"id": item_id, "name": name, "artists": [{"id": artist.lower(), "name": artist}],
+             "uri": f"spotify:track:{item_id}", "external_ids": {"isrc": isrc}}
+            for item_id, name, artist, isrc in self.results[q]
+        ]}}
+
+
+def test_search_dedupes_without_extra_calls():
+    sp = FakeSpotify({
+        "Biggie - Juicy": [("juicy", "Juicy", "Biggie", "US1")],
+        "The Notorious B.I.G. - Juicy": [("juicy2", "Juicy", "Biggie", "US1"), ("hypnotize", "Hypnotize", "Biggie", "US2")],
+    })
+    result = playlist_generator.search_spotify_tracks(
+        "- Biggie - Juicy\n- The Notorious B.I.G. - Juicy", sp=sp)
+
+    assert result['track_ids'] == ["juicy", "hypnotize"]
+    assert len(sp.calls) == 2
+    assert result['search_results']['total_tracks'] == 2
+
+
+def test_search_backfills_within_a_section():
+    sp = FakeSpotify({
+        "Biggie - Juicy": [("juicy", "Juicy", "Biggie", "US1"), ("warning", "Warning", "Biggie", "US3")],
+        "Biggie - Juicy (Live)": [("juicy-live", "Juicy (Live)", "Biggie", "US4")],
+    })
+    text = ("**WARMUP (10 minutes)**\n- Biggie - Juicy\n"
+            "**PEAK (20 minutes)**\n- Biggie - Juicy (Live)")
+    assert playlist_generator.track_sections(text) == [1, 2]
+
+    result = playlist_generator.search_spotify_tracks(text, sp=sp)
+    # The warmup's other results don't refill the peak
+    assert result['track_ids'] == ["juicy"]
+    assert result['search_results']['dropped_tracks'] == [
+        {"original_query": "Biggie - Juicy (Live)", "reason": "duplicate"}]
+
+
+def test_rewritten_text_matches_resolved_tracks():
+    slots = [
+        slot("Bon Iver - Holocene", track("holocene", "Holocene", "Bon Iver")),
+        slot("Bon Iver - Holocene", track("holocene", "Holocene", "Bon Iver"), track("towers", "Towers", "Bon Iver")),
+        slot("X - A", track("a", "A", "X")),
+        slot("X - A", track("a", "A", "X")),
+    ]
+    tracks, dropped, _ = dedupe_resolved(slots, artist_cap=0)
+    search_results = {"successful_tracks": tracks, "dropped_tracks": dropped}
+
+    queries = ["Bon Iver - Holocene", "Bon Iver - Holocene", "X - A", "Not On Spotify - Song", "X - A"]
+    assert resolved_queries(queries, search_results) == [
+        "Bon Iver - Holocene", "Bon Iver - Towers", "X - A", "Not On Spotify - Song", None]
+    text = "**PEAK (20 minutes)**\n" + "\n".join(f"- {query}" for query in queries)
+    assert rewrite_playlist_text(text, search_results) == (
+        "**PEAK (20 minutes)**\n- Bon Iver - Holocene\n- Bon Iver - Towers\n- X - A\n- Not On Spotify - Song")
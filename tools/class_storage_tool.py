@@ -1,24 +1,51 @@
 import os
-from supabase import create_client
+import sys
 from langchain.tools import BaseTool
 from typing import Optional
 from dotenv import load_dotenv
+from postgrest.exceptions import APIError
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import get_supabase_client
 
 load_dotenv()
 
+# Columns needed to describe a class in listings and search results
+LISTING_COLUMNS = "name, description"
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+# Postgres "undefined column": search_vector has not been migrated yet
+UNDEFINED_COLUMN = "42703"
+
+
+def search_query(supabase, query: str, limit: int = DEFAULT_LIMIT):
+    """Full-text search on yoga_class_types, backed by the GIN index on search_vector
+
+    websearch_to_tsquery ("wfts") accepts free text like "slow flow" or
+    "yin -restorative"; plain to_tsquery would reject it.
+    """
+    return supabase.table("yoga_class_types").select(LISTING_COLUMNS).text_search(
+        "search_vector", query, options={"type": "web_search", "config": "english"}
+    ).limit(limit)
+
+
 class ClassStorageTool(BaseTool):
     name = "class_storage"
     description = "Store and retrieve custom yoga class types from database"
     
     def _get_supabase_client(self):
-        """Get Supabase client when needed"""
-        return create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        """Get the shared Supabase client"""
+        return get_supabase_client()
     
     def _run(self, query: str) -> str:
         """Run the tool with a query string"""
         # Parse the query - for now, let's handle it simply
         if query == "list_all":
             return self._list_all_class_types()
+        elif query.startswith("search:"):
+            return self._search_class_types(query[len("search:"):].strip())
         else:
             return f"Query: {query} - Tool is working!"
     
@@ -41,11 +68,21 @@ class ClassStorageTool(BaseTool):
         result = supabase.table("yoga_class_types").insert(data).execute()
         return f"✅ Added class type: {name}"
     
-    def _search_class_types(self, query: str) -> str:
+    def _search_class_types(self, query: str, limit: int = DEFAULT_LIMIT) -> str:
         """Search for class types by name or description"""
         
         supabase = self._get_supabase_client()
-        result = supabase.table("yoga_class_types").select("*").ilike("name", f"%{query}%").execute()
+        limit = max(1, min(limit, MAX_LIMIT))
+        
+        try:
+            result = search_query(supabase, query, limit).execute()
+        except APIError as e:
+            if e.code != UNDEFINED_COLUMN:
+                raise
+            # search_vector not migrated yet - name match uses the trigram index
+            result = supabase.table("yoga_class_types").select(LISTING_COLUMNS).ilike(
+                "name", f"%{query}%"
+            ).limit(limit).execute()
         
         if result.data:
             classes = []
@@ -55,11 +92,14 @@ class ClassStorageTool(BaseTool):
         else:
             return f"No class types found matching '{query}'"
     
-    def _list_all_class_types(self) -> str:
-        """List all available class types"""
+    def _list_all_class_types(self, limit: int = DEFAULT_LIMIT, offset: int = 0) -> str:
+        """List available class types, newest first, one page at a time"""
         
         supabase = self._get_supabase_client()
-        result = supabase.table("yoga_class_types").select("*").order("created_at", desc=True).execute()
+        limit = max(1, min(limit, MAX_LIMIT))
+        result = supabase.table("yoga_class_types").select(LISTING_COLUMNS).order(
+            "created_at", desc=True
+        ).range(offset, offset + limit - 1).execute()
         
         if result.data:
             classes = []
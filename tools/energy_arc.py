@@ -0,0 +1,181 @@
+import os
+import sys
+from typing import Dict, List, Optional, Sequence
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Optional dependency - tracks keep their order without NumPy
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from tools.track_catalog import SECTION_PROFILES
+
+# Differences of this size count as one unit of cost
+TEMPO_SCALE = 15.0
+ENERGY_SCALE = 0.15
+# Weight of staying near the target curve relative to smooth transitions
+POSITION_WEIGHT = 0.5
+MAX_PASSES = 50
+
+
+def effective_tempo(tempo, low, high):
+    """Tempo or half tempo (detectors often report double time), whichever is nearer the range"""
+    def distance(t):
+        return np.clip(low - t, 0, None) + np.clip(t - high, 0, None)
+    half = tempo / 2
+    return np.where(distance(half) < distance(tempo), half, tempo)
+
+
+def target_curve(section_of: "np.ndarray", sections: Sequence[Dict]):
+    """Target tempo and energy per position
+
+    Each section ramps across its BPM/energy range: upwards up to and
+    including the peak section (highest BPM), downwards after it.
+    """
+    tempo = np.empty(len(section_of), dtype=np.float64)
+    energy = np.empty(len(section_of), dtype=np.float64)
+    peak = int(np.argmax([section['bpm'][1] for section in sections]))
+
+    for index, section in enumerate(sections):
+        positions = np.flatnonzero(section_of == index)
+        if len(positions) == 0:
+            continue
+        ramp = np.linspace(0.0, 1.0, len(positions)) if len(positions) > 1 else np.array([0.5])
+        if index > peak:
+            ramp = 1.0 - ramp
+        low, high = section['bpm']
+        tempo[positions] = low + (high - low) * ramp
+        energy_low, energy_high = section.get('energy') or (0.0, 1.0)
+        energy[positions] = energy_low + (energy_high - energy_low) * ramp
+    return tempo, energy
+
+
+def _transition_costs(tempo, energy, a, b):
+    return ((tempo[a] - tempo[b]) / TEMPO_SCALE) ** 2 + ((energy[a] - energy[b]) / ENERGY_SCALE) ** 2
+
+
+def order_cost(order, tempo, energy, target_tempo, target_energy) -> float:
+    """Total cost of an ordering: transitions plus distance from the target curve"""
+    order = np.asarray(order)
+    transitions = _transition_costs(tempo, energy, order[:-1], order[1:]).sum()
+    position = (((tempo[order] - target_tempo) / TEMPO_SCALE) ** 2 +
+                ((energy[order] - target_energy) / ENERGY_SCALE) ** 2).sum()
+    return float(transitions + POSITION_WEIGHT * position)
+
+
+def _anti_diagonal_sums(matrix):
+    """A[s, k] = sum of M[k', s - k'] for k' <= k (anti-diagonal prefix sums)
+
+    Reversing positions i..j moves the track at k to i + j - k, so the new
+    position cost of that segment is A[i+j, j] - A[i+j, i-1].
+    """
+    n = len(matrix)
+    rows, columns = np.indices((n, n))
+    diagonals = np.zeros((2 * n - 1, n))
+    diagonals[rows + columns, rows] = matrix
+    return np.cumsum(diagonals, axis=1)
+
+
+def _improve_block(order, start, stop, transition, position_cost) -> bool:
+    """One sweep of 2-opt reversals within order[start:stop]; True if anything changed"""
+    count = len(order)
+    improved = False
+    stale = True
+    for i in range(start, stop - 1):
+        if stale:
+            # M[k, m]: track now at block position k placed at block position m
+            matrix = position_cost[order[start:stop]][:, start:stop]
+            sums = _anti_diagonal_sums(matrix)
+            diagonal = np.concatenate([[0.0], np.cumsum(np.diag(matrix))])
+            stale = False
+
+        a = i - start
+        j = np.arange(a + 1, stop - start)
+        delta = (sums[a + j, j] - (sums[a + j, a - 1] if a > 0 else 0.0)) - (diagonal[j + 1] - diagonal[a])
+
+        ends = j + start
+        if i > 0:
+            before = transition[order[i - 1]]
+            delta += before[order[ends]] - before[order[i]]
+        after = order[np.minimum(ends + 1, count - 1)]
+        delta += np.where(ends + 1 < count,
+                          transition[order[i], after] - transition[order[ends], after], 0.0)
+
+        best = int(np.argmin(delta))
+        if delta[best] < -1e-9:
+            end = ends[best]
+            order[i:end + 1] = order[i:end + 1][::-1].copy()
+            improved = stale = True
+    return improved
+
+
+def order_tracks(tempo: Sequence[Optional[float]], energy: Sequence[Optional[float]],
+                 section_of: Sequence[int], sections: Sequence[Dict]) -> List[int]:
+    """Order tracks for a smooth tempo/energy arc, keeping each in its section
+
+    Tracks are first placed by matching their energy rank to the target
+    curve within each section (greedy), then improved with 2-opt segment
+    reversals inside sections. Reversal gains are evaluated for all segment
+    ends at once: transition changes only touch the two boundary
+    transitions, and position costs come from anti-diagonal prefix sums.
+    Missing features are treated as on-target, so those tracks don't pull
+    their neighbours around. Returns indices into the input lists.
+    """
+    count = len(section_of)
+    if count < 2:
+        return list(range(count))
+
+    # Greedy start: group by section, sorted by energy the way the curve runs
+    section_of = np.asarray(section_of)
+    grouped = np.argsort(section_of, kind='stable')
+    target_tempo, target_energy = target_curve(section_of[grouped], sections)
+
+    tempo = np.array([np.nan if t is None else t for t in tempo], dtype=np.float64)
+    energy = np.array([np.nan if e is None else e for e in energy], dtype=np.float64)
+    tempo[grouped] = np.where(np.isnan(tempo[grouped]), target_tempo, tempo[grouped])
+    energy[grouped] = np.where(np.isnan(energy[grouped]), target_energy, energy[grouped])
+
+    order = grouped.copy()
+    for index in range(len(sections)):
+        positions = np.flatnonzero(section_of[grouped] == index)
+        if len(positions) > 1:
+            members = order[positions]
+            by_energy = members[np.argsort(energy[members], kind='stable')]
+            if target_energy[positions[-1]] < target_energy[positions[0]]:
+                by_energy = by_energy[::-1]
+            order[positions] = by_energy
+
+    # Position cost of every track at every position; reversals stay inside
+    # a section, so each section only needs its own block of this matrix
+    position_cost = POSITION_WEIGHT * (
+        ((tempo[:, np.newaxis] - target_tempo) / TEMPO_SCALE) ** 2 +
+        ((energy[:, np.newaxis] - target_energy) / ENERGY_SCALE) ** 2
+    )
+    # Cost of every possible transition, looked up instead of recomputed
+    transition = (((tempo[:, np.newaxis] - tempo) / TEMPO_SCALE) ** 2 +
+                  ((energy[:, np.newaxis] - energy) / ENERGY_SCALE) ** 2)
+    section_at = section_of[order]
+    blocks = [np.flatnonzero(section_at == index) for index in range(len(sections))]
+    blocks = [(positions[0], positions[-1] + 1) for positions in blocks if len(positions) > 2]
+
+    for _ in range(MAX_PASSES):
+        improved = False
+        for start, stop in blocks:
+            while _improve_block(order, start, stop, transition, position_cost):
+                improved = True
+        if not improved:
+            break
+
+    return [int(index) for index in order]
+
+
+def sections_by_share(count: int, profiles: Sequence[Dict] = SECTION_PROFILES) -> List[int]:
+    """Assign positions to sections by each section's share of class time"""
+    bounds = np.cumsum([profile['share'] for profile in profiles])
+    bounds = bounds / bounds[-1]
+    positions = (np.arange(count) + 0.5) / max(count, 1)
+    return [int(index) for index in np.searchsorted(bounds, positions)]
+
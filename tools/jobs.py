@@ -0,0 +1,70 @@
+import sys
+import os
+from typing import Dict
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.jobs import register_job
+from utils.responses import compact_playlist_response
+from tools.playlist_generator import generate_playlist
+from tools.playlist_exporter import PlaylistExporter, PlaylistExportError
+
+GENERATE_PLAYLIST = "generate_playlist"
+EXPORT_PLAYLIST = "export_playlist"
+
+
+@register_job(GENERATE_PLAYLIST)
+def run_generate_playlist(payload: Dict, progress) -> Dict:
+    """Background version of POST /api/generate-playlist"""
+    response = generate_playlist(payload, on_progress=progress)
+    if payload.get('compact'):
+        response = compact_playlist_response(response)
+    return response
+
+
+@register_job(EXPORT_PLAYLIST)
+def run_export_playlist(payload: Dict, progress) -> Dict:
+    """Background version of the create_playlist(s) actions
+
+    The request handler does the OAuth exchange and passes the resulting
+    access token and user ID; the payload is dropped once the job finishes.
+    """
+    import spotipy
+
+    sp = spotipy.Spotify(auth=payload['access_token'])
+    exporter = PlaylistExporter(sp, user_id=payload.get('user_id'), on_progress=progress)
+
+    if payload.get('playlists'):
+        results = exporter.export_many(payload['playlists'])
+        created = sum(1 for result in results if result['success'])
+        return {
+            "success": created == len(results),
+            "message": f"✅ Created {created} of {len(results)} playlists",
+            "playlist_created": created > 0,
+            "results": results
+        }
+
+    playlist_name = payload['playlist_name']
+    track_ids = payload.get('track_ids', [])
+    try:
+        result = exporter.export(playlist_name, track_ids, playlist_id=payload.get('playlist_id'))
+    except PlaylistExportError as export_error:
+        # Reported as a result (not a job failure) so the client can resume
+        return {
+            "success": False,
+            "error": f"Failed to create playlist: {str(export_error)}",
+            "resumable": export_error.playlist_id is not None,
+            "playlist_id": export_error.playlist_id,
+            "playlist_url": export_error.playlist_url,
+            "added": export_error.added,
+            "track_ids": export_error.track_ids
+        }
+
+    return {
+        "success": True,
+        "message": f"✅ Created playlist '{playlist_name}' with {len(track_ids)} tracks",
+        "playlist_created": True,
+        "playlist_url": result['playlist_url'],
+        "playlist_id": result['playlist_id']
+    }
@@ -0,0 +1,153 @@
+import copy
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Optional dependency - the semantic cache is disabled without NumPy
+try:
+    import numpy as np
+    from utils.embeddings import get_embedder
+    from utils.vector_index import VectorIndex
+except ImportError:
+    np = None
+
+# Share of the similarity score carried by each request field (sums to 1)
+FIELD_WEIGHTS = {
+    "class_name": 0.35,
+    "class_description": 0.15,
+    "music_preferences": 0.5,
+}
+DURATION_BUCKET_MINUTES = 15
+DEFAULT_THRESHOLD = 0.9
+# Embedded in place of empty fields so two empty descriptions still match
+EMPTY_FIELD = "none"
+
+
+def duration_bucket(duration: int) -> int:
+    return int(round(duration / DURATION_BUCKET_MINUTES))
+
+
+def adapt_playlist_text(playlist_text: str, from_duration: int, to_duration: int) -> str:
+    """Rescale "(N minutes)" section lengths to a different class duration"""
+    if from_duration == to_duration or from_duration <= 0:
+        return playlist_text
+
+    def rescale(match):
+        minutes = max(1, int(round(int(match.group(1)) * to_duration / from_duration)))
+        return f"({minutes} minutes)"
+
+    return re.sub(r"\((\d+) minutes\)", rescale, playlist_text)
+
+
+class SemanticPlaylistCache:
+    """Reuse generated playlists for requests that mean the same thing
+
+    Each request field is embedded separately and the weighted fields are
+    concatenated, so the cosine similarity of two requests is the weighted
+    average of their per-field similarities. Requests only match within the
+    same duration bucket; the reused playlist's section lengths are rescaled
+    to the requested duration.
+    """
+
+    def __init__(self, embedder=None, threshold: float = DEFAULT_THRESHOLD,
+                 max_entries_per_bucket: int = 2000):
+        self.embedder = embedder or get_embedder()
+        self.threshold = threshold
+        self.max_entries_per_bucket = max_entries_per_bucket
+        self._indexes: Dict[int, VectorIndex] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_request(self, request: Dict) -> "np.ndarray":
+        texts = [str(request.get(field) or "").strip() or EMPTY_FIELD for field in FIELD_WEIGHTS]
+        vectors = self.embedder.embed(texts)
+        weights = np.sqrt(np.array(list(FIELD_WEIGHTS.values()), dtype=np.float32))
+        return (vectors * weights[:, np.newaxis]).reshape(-1)
+
+    def _index(self, bucket: int, dim: int) -> "VectorIndex":
+        with self._lock:
+            index = self._indexes.get(bucket)
+            if index is None:
+                index = VectorIndex(dim, max_size=self.max_entries_per_bucket)
+                self._indexes[bucket] = index
+            return index
+
+    def lookup(self, request: Dict, vector: Optional["np.ndarray"] = None,
+               threshold: Optional[float] = None) -> Optional[Dict]:
+        """A cached response adapted to this request, or None (threshold overrides the cache's own)"""
+        index = self._indexes.get(duration_bucket(request['duration']))
+        match = None
+        if index is not None and len(index):
+            vector = self.embed_request(request) if vector is None else vector
+            match = index.best(vector)
+
+        if match is None or match[0] < (self.threshold if threshold is None else threshold):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        similarity, entry = match
+        response = copy.deepcopy(entry['response'])
+        adapted = entry['duration'] != request['duration']
+        if adapted:
+            response['playlist'] = adapt_playlist_text(response['playlist'], entry['duration'], request['duration'])
+            # Alternatives keep the original section lengths, so they are not offered
+            response.pop('variants', None)
+        response['source'] = "semantic_cache"
+        response['cache'] = {
+            "similarity": round(similarity, 4),
+            "adapted": adapted,
+            "cached_at": entry['cached_at']
+        }
+        return response
+
+    def store(self, request: Dict, response: Dict, vector: Optional["np.ndarray"] = None):
+        vector = self.embed_request(request) if vector is None else vector
+        index = self._index(duration_bucket(request['duration']), len(vector))
+        index.add(vector, {
+            "duration": request['duration'],
+            "response": copy.deepcopy(response),
+            "cached_at": time.time()
+        })
+
+    def stats(self) -> Dict:
+        return {
+            "entries": sum(len(index) for index in self._indexes.values()),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_playlist_cache() -> Optional[SemanticPlaylistCache]:
+    """Shared cache for this process (None when SEMANTIC_CACHE=off or NumPy is missing)"""
+    global _cache
+    if np is None or os.getenv("SEMANTIC_CACHE", "on") == "off":
+        return None
+    if _cache is not None:
+        return _cache
+
+    with _cache_lock:
+        if _cache is None:
+            threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", DEFAULT_THRESHOLD))
+            _cache = SemanticPlaylistCache(threshold=threshold)
+    return _cache
+
+
+# Sources of freshly generated playlists (not reused or degraded ones)
+CACHEABLE_SOURCES = ("langchain_agent_with_spotify", "langchain_agent_variants")
+
+
+def is_cacheable(response: Dict) -> bool:
+    """Only real playlists with Spotify matches are worth reusing"""
+    return response.get('source') in CACHEABLE_SOURCES and response.get('ready_for_export')
@@ -0,0 +1,219 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from utils.metrics import EXPORT_CHUNKS, EXPORT_CHUNK_WRITES
+
+# Spotify accepts at most 100 items per add-items call
+SPOTIFY_MAX_BATCH = 100
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class PlaylistExportError(Exception):
+    """Raised when an export stops part way; carries what is needed to resume"""
+
+    def __init__(self, message: str, playlist_id: Optional[str] = None,
+                 playlist_url: Optional[str] = None, added: int = 0,
+                 track_ids: Optional[List[str]] = None):
+        super().__init__(message)
+        self.playlist_id = playlist_id
+        self.playlist_url = playlist_url
+        self.added = added
+        # Track order being written - resume with exactly this list
+        self.track_ids = track_ids
+
+
+def _to_uri(track_id: str) -> str:
+    return track_id if track_id.startswith("spotify:") else f"spotify:track:{track_id}"
+
+
+def _to_id(track_id: str) -> str:
+    return track_id.rsplit(":", 1)[-1]
+
+
+class PlaylistExporter:
+    """Writes tracks to Spotify playlists in API-sized chunks
+
+    Each chunk is written at an explicit position and retried on rate limits
+    and server errors. Before a retry the exporter reads that slice of the
+    playlist back, so a write that succeeded but whose response was lost is
+    never applied twice. Exports into an existing playlist resume after the
+    tracks it already holds.
+    """
+
+    def __init__(self, sp, batch_size: int = SPOTIFY_MAX_BATCH,
+                 max_retries: int = 3, backoff_seconds: float = 1.0,
+                 user_id: Optional[str] = None,
+                 on_progress: Optional[Callable[[str, Dict], None]] = None):
+        self.sp = sp
+        self.batch_size = max(1, min(batch_size, SPOTIFY_MAX_BATCH))
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        # Known user ID (e.g. from a stored session) saves a current_user() call
+        self._user_id = user_id
+        # Called as on_progress("exporting", {...}) after each chunk is written
+        self.on_progress = on_progress
+
+    def get_user_id(self) -> str:
+        """Look up the authorized user once per exporter (one auth session)"""
+        if self._user_id is None:
+            self._user_id = self.sp.current_user()['id']
+        return self._user_id
+
+    def get_playlist_track_ids(self, playlist_id: str, offset: int = 0,
+                               limit: Optional[int] = None) -> List[str]:
+        """Read track IDs currently in a playlist, optionally just a slice"""
+        track_ids = []
+        while limit is None or len(track_ids) < limit:
+            page_size = SPOTIFY_MAX_BATCH if limit is None else min(SPOTIFY_MAX_BATCH, limit - len(track_ids))
+            page = self.sp.playlist_items(
+                playlist_id,
+                fields="items(track(id)),next",
+                limit=page_size,
+                offset=offset + len(track_ids),
+                additional_types=("track",)
+            )
+            items = page.get('items', [])
+            track_ids.extend((item.get('track') or {}).get('id') for item in items)
+            if not items or not page.get('next'):
+                break
+        return track_ids
+
+    def _is_retryable(self, error: Exception) -> bool:
+        status = getattr(error, 'http_status', None)
+        if status is None:
+            # Connection resets and timeouts carry no HTTP status
+            return True
+        return status in RETRYABLE_STATUS
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        headers = getattr(error, 'headers', None) or {}
+        retry_after = headers.get('Retry-After') or headers.get('retry-after')
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_seconds * (2 ** attempt)
+
+    def _add_chunk(self, playlist_id: str, chunk: List[str], position: int) -> int:
+        """Write one chunk at a fixed position; returns the number of retries used"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.sp.playlist_add_items(playlist_id, [_to_uri(t) for t in chunk], position=position)
+                return attempt
+            except Exception as e:
+                if attempt == self.max_retries or not self._is_retryable(e):
+                    raise
+                time.sleep(self._retry_delay(e, attempt))
+
+                # The failed call may still have been applied - check before retrying
+                landed = self.get_playlist_track_ids(playlist_id, offset=position, limit=len(chunk))
+                if landed == [_to_id(t) for t in chunk]:
+                    return attempt + 1
+        return self.max_retries
+
+    def add_tracks(self, playlist_id: str, track_ids: List[str], resume: bool = True) -> Dict:
+        """Append track_ids to a playlist, skipping any prefix already present"""
+        wanted = [_to_id(t) for t in track_ids]
+
+        skipped = 0
+        if resume:
+            existing = self.get_playlist_track_ids(playlist_id)
+            while skipped < min(len(existing), len(wanted)) and existing[skipped] == wanted[skipped]:
+                skipped += 1
+
+        added = 0
+        retries = 0
+        chunks = 0
+        for start in range(skipped, len(wanted), self.batch_size):
+            chunk = wanted[start:start + self.batch_size]
+            try:
+                retries += self._add_chunk(playlist_id, chunk, position=start)
+            except Exception as e:
+                EXPORT_CHUNK_WRITES.labels(outcome="failed").inc()
+                EXPORT_CHUNKS.observe(chunks + 1)
+                raise PlaylistExportError(
+                    f"Failed adding tracks {start + 1}-{start + len(chunk)}: {str(e)}",
+                    playlist_id=playlist_id,
+                    added=skipped + added
+                ) from e
+            added += len(chunk)
+            chunks += 1
+            EXPORT_CHUNK_WRITES.labels(outcome="written").inc()
+            if self.on_progress:
+                self.on_progress("exporting", {"playlist_id": playlist_id, "done": skipped + added, "total": len(wanted)})
+
+        EXPORT_CHUNKS.observe(chunks)
+        return {
+            "added": added,
+            "skipped": skipped,
+            "chunks": chunks,
+            "retries": retries
+        }
+
+    def export(self, playlist_name: str, track_ids: List[str],
+               description: str = "Generated by Yoga Playlist AI",
+               playlist_id: Optional[str] = None, public: bool = False) -> Dict:
+        """Create (or resume) a playlist and write all tracks to it (each track once)"""
+        track_ids = list(dict.fromkeys(_to_id(t) for t in track_ids))
+
+        if playlist_id:
+            playlist = self.sp.playlist(playlist_id, fields="id,external_urls")
+        else:
+            playlist = self.sp.user_playlist_create(
+                user=self.get_user_id(),
+                name=playlist_name,
+                description=description,
+                public=public
+            )
+
+        playlist_url = playlist['external_urls']['spotify']
+        try:
+            # A freshly created playlist is empty - no need to read it back
+            stats = self.add_tracks(playlist['id'], track_ids, resume=bool(playlist_id))
+        except PlaylistExportError as e:
+            e.playlist_url = playlist_url
+            e.track_ids = track_ids
+            raise
+
+        return dict(stats, playlist_id=playlist['id'], playlist_url=playlist_url,
+                    playlist_name=playlist_name, track_ids=track_ids)
+
+    def export_many(self, playlists: List[Dict], max_workers: int = 4) -> List[Dict]:
+        """Export several playlists with one authorized client
+
+        Each entry needs playlist_name and track_ids and may carry description
+        and playlist_id (to resume). Failures are reported per playlist.
+        """
+        # Resolve the user before fanning out so workers don't race to fetch it
+        self.get_user_id()
+
+        def run(entry):
+            try:
+                result = self.export(
+                    entry['playlist_name'],
+                    entry['track_ids'],
+                    description=entry.get('description', "Generated by Yoga Playlist AI"),
+                    playlist_id=entry.get('playlist_id')
+                )
+                return dict(result, success=True)
+            except PlaylistExportError as e:
+                return {
+                    "success": False,
+                    "playlist_name": entry['playlist_name'],
+                    "error": str(e),
+                    "playlist_id": e.playlist_id,
+                    "playlist_url": e.playlist_url,
+                    "added": e.added,
+                    "track_ids": e.track_ids
+                }
+            except Exception as e:
+                return {
+                    "success": False,
+                    "playlist_name": entry['playlist_name'],
+                    "error": str(e)
+                }
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            return list(pool.map(run, playlists))
@@ -0,0 +1,553 @@
+"""Playlist generation pipeline behind /api/generate-playlist
+
+Popular class/taste/duration combinations are served from the pools
+precomputed by config/precompute_playlists.py, requests similar enough to an
+earlier one from the semantic cache, common tastes are assembled from the
+local track catalog and identical requests reuse the last playlist in the
+history; "fresh": true always generates. Otherwise the LLM writes the
+playlist text, which is resolved against Spotify; when the LLM fails or
+misses DEGRADE_AFTER, a degraded playlist from already-resolved tracks is
+served instead.
+
+Concurrent identical requests (by request_fingerprint) share one run. Every
+response is queued for the generated_playlists history under the body's
+user_id without waiting for the write; requests that joined another's run
+are timed under source "coalesced" and their rows are not reusable, so the
+shared run is counted once.
+"""
+import hashlib
+import json
+import re
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.clients import get_spotify_client
+from utils.llm import LLMError, LLMTimeoutError, get_gateway
+from utils.singleflight import SingleFlight
+from utils.health import get_health, track
+from utils.log import get_logger
+from utils.metrics import CACHE_LOOKUPS, GENERATION_SECONDS, SPOTIFY_SEARCHES
+from tools.playlist_cache import CACHEABLE_SOURCES, get_playlist_cache, is_cacheable
+from tools.playlist_history import get_playlist_history, start_cache_warmup
+from tools.playlist_templates import get_template_store
+from tools.track_catalog import get_track_catalog, assemble_playlist
+from tools.playlist_verifier import SECTION_HEADER, verify_playlist, verification_enabled
+from tools.track_resolution import RESOLVE_CANDIDATES, dedupe_resolved, rewrite_playlist_text, spotify_track_data
+from tools.playlist_variants import MAX_VARIANTS, VARIANTS_PROMPT, build_variants_response, parse_variants, unique_queries
+from utils.text import normalize_terms
+
+DEFAULT_MUSIC_PREFERENCES = "music appropriate for yoga"
+
+# Seconds the LLM gets before a degraded playlist is served instead
+DEGRADE_AFTER = float(os.getenv("DEGRADE_AFTER", 12))
+# Cached playlists this similar are good enough when degrading
+DEGRADED_SIMILARITY = 0.6
+
+PLAYLIST_PROMPT = """
+        Create a structured playlist for this yoga class that matches the following criteria:
+
+        Class Name: {class_name}
+        Class Description: {class_description}
+        Duration: {duration} minutes
+        Music Preferences: {music_preferences}
+
+        Ensure the playlist contains enough tracks to cover the entire class duration, with appropriate BPM and energy levels for each section.
+
+        IMPORTANT: Use ONLY dashes (-) for track listings, NEVER use numbers (1., 2., 3., etc.).
+
+        Format (use this exact format):
+        WARMUP (X minutes)
+        - Artist - Song Title
+        - Artist - Song Title
+
+        FLOW/ACTIVE (X minutes)
+        - Artist - Song Title
+        - Artist - Song Title
+
+        COOLDOWN/SAVASANA (X minutes)
+        - Artist - Song Title
+        - Artist - Song Title
+        """
+
+log = get_logger("generator")
+search_log = get_logger("spotify")
+
+# Progress callbacks receive a stage name and a dict of details
+ProgressCallback = Callable[[str, Dict], None]
+
+# Identical requests / track searches in flight at the same time share one
+# upstream call (e.g. a studio link opened by a whole class at once)
+_generations = SingleFlight()
+_searches = SingleFlight()
+
+# Feeds resolved tracks into the track catalog off the request path
+_catalog_ingest = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-ingest")
+
+
+def _report(on_progress: Optional[ProgressCallback], stage: str, **details):
+    if on_progress:
+        on_progress(stage, details)
+
+
+def validate_request(data: Dict) -> Optional[str]:
+    """Error message for a malformed generation request, or None"""
+    for field in ('class_name', 'duration'):
+        if field not in data:
+            return f"Missing required field: {field}"
+    try:
+        int(data['duration'])
+    except (TypeError, ValueError):
+        return "Duration must be a number of minutes"
+    try:
+        variants = int(data.get('variants') or 1)
+    except (TypeError, ValueError):
+        return "Variants must be a number"
+    if not 1 <= variants <= MAX_VARIANTS:
+        return f"Variants must be between 1 and {MAX_VARIANTS}"
+    return None
+
+
+def normalize_request(data: Dict) -> Dict:
+    """Pull the generation inputs out of a request body, with defaults applied"""
+    music_preferences = data.get('music_preferences') or ''
+    # Handle empty music preferences
+    if not music_preferences.strip():
+        music_preferences = DEFAULT_MUSIC_PREFERENCES
+    return {
+        "class_name": data['class_name'],
+        "class_description": data.get('class_description') or '',
+        "music_preferences": music_preferences,
+        "duration": int(data['duration']),
+        "variants": min(MAX_VARIANTS, max(1, int(data.get('variants') or 1)))
+    }
+
+
+def _normalize_text(text) -> str:
+    return ' '.join(str(text or '').lower().split())
+
+
+def request_fingerprint(data: Dict) -> str:
+    """Stable key for a generation request
+
+    Case and whitespace are ignored and only the fields that affect the
+    playlist are included, so equivalent requests map to the same key.
+    """
+    request = normalize_request(data)
+    key = {
+        "class_name": _normalize_text(request['class_name']),
+        "class_description": _normalize_text(request['class_description']),
+        "music_preferences": _normalize_text(request['music_preferences']),
+        "duration": request['duration']
+    }
+    # Left out for plain requests so their keys stay the same
+    if request['variants'] > 1:
+        key['variants'] = request['variants']
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def convert_numbers_to_dashes(text: str) -> str:
+    """Convert numbered lists to dashed lists"""
+    # Pattern to match "1. Artist - Song" or "10. Artist - Song" etc.
+    # and replace with "- Artist - Song"
+    pattern = r'^\s*\d+\.\s+'
+
+    cleaned_lines = []
+    for line in text.split('\n'):
+        # If line starts with number followed by period, replace with dash
+        if re.match(pattern, line):
+            cleaned_lines.append(re.sub(pattern, '- ', line))
+        else:
+            cleaned_lines.append(line)
+
+    return '\n'.join(cleaned_lines)
+
+
+def extract_tracks_from_text(playlist_text: str) -> List[str]:
+    """Extract "Artist - Song" queries from playlist text (same logic as MusicIntegrationAgent)"""
+    tracks = []
+    for line in playlist_text.split('\n'):
+        line = line.strip()
+        # Look for lines that start with • OR - and contain track info
+        if (line.startswith('•') or line.startswith('-')) and ' - ' in line:
+            # Remove the bullet point or dash and clean up
+            tracks.append(line[1:].strip())
+    return tracks
+
+
+def track_sections(playlist_text: str) -> List[int]:
+    """Section index of each query extract_tracks_from_text finds, counting SECTION_HEADER lines"""
+    sections = []
+    section = 0
+    for line in playlist_text.split('\n'):
+        line = line.strip()
+        if (line.startswith('•') or line.startswith('-')) and ' - ' in line:
+            sections.append(section)
+        elif SECTION_HEADER.match(line):
+            section += 1
+    return sections
+
+
+def generate_playlist_text(class_name: str, class_description: str,
+                           music_preferences: str, duration: int, deadline: Optional[float] = None) -> str:
+    """Generate playlist text with the LLM (raises LLMTimeoutError past the deadline)"""
+    prompt = PLAYLIST_PROMPT.format(
+        class_name=class_name,
+        class_description=class_description,
+        duration=duration,
+        music_preferences=music_preferences
+    )
+    result = get_gateway().complete([{"role": "user", "content": prompt}], task="playlist",
+                                    temperature=0.9, deadline=deadline)
+
+    # Clean up any numbered lists that slip through
+    return convert_numbers_to_dashes(result['text'])
+
+
+def generate_variants_text(request: Dict, deadline: Optional[float] = None) -> str:
+    """One LLM call listing request['variants'] alternative track lists per section"""
+    prompt = VARIANTS_PROMPT.format(
+        class_name=request['class_name'],
+        class_description=request['class_description'],
+        duration=request['duration'],
+        music_preferences=request['music_preferences'],
+        variants=request['variants']
+    )
+    result = get_gateway().complete([{"role": "user", "content": prompt}], task="playlist",
+                                    temperature=0.9, deadline=deadline)
+    return convert_numbers_to_dashes(result['text'])
+
+
+def _search_failure(error: str) -> Dict:
+    return {
+        "search_results": {
+            "found_count": 0,
+            "total_tracks": 0,
+            "error": error
+        },
+        "track_ids": []
+    }
+
+
+def search_spotify_tracks(playlist_text: str, sp=None,
+                          on_progress: Optional[ProgressCallback] = None, dedupe: bool = True) -> Dict:
+    """Search Spotify for tracks mentioned in the playlist
+
+    Lines resolving to the same recording or song and artists over ARTIST_CAP
+    are removed and backfilled from their section's other search results (see
+    tools.track_resolution); rewrite_playlist_text brings the text in line.
+    Pass dedupe=False to get every line's first result as is.
+    """
+    try:
+        # Shared client - reused across requests while the process is warm
+        sp = sp or get_spotify_client()
+        if not sp:
+            return _search_failure("Spotify credentials not configured")
+
+        tracks = extract_tracks_from_text(playlist_text)
+        if not tracks:
+            return _search_failure("No tracks found in playlist text")
+
+        sections = track_sections(playlist_text)
+        slots = []
+
+        for index, track_query in enumerate(tracks):
+            try:
+                with track("spotify"):
+                    results = _searches.do(
+                        _normalize_text(track_query),
+                        sp.search, q=track_query, type='track', limit=RESOLVE_CANDIDATES
+                    )
+
+                SPOTIFY_SEARCHES.labels(result="hit" if results['tracks']['items'] else "miss").inc()
+                search_log.debug("Track search", extra={"query": track_query, "found": bool(results['tracks']['items'])})
+                items = [item for item in results['tracks']['items'] if item]
+                if items:
+                    slots.append({
+                        'original_query': track_query,
+                        'spotify_data': spotify_track_data(items[0]),
+                        'candidates': [spotify_track_data(item) for item in items[1:]],
+                        'section': sections[index]
+                    })
+
+            except Exception as search_error:
+                SPOTIFY_SEARCHES.labels(result="error").inc()
+                search_log.warning("Track search failed", extra={"query": track_query, "error": str(search_error)})
+                continue
+            finally:
+                _report(on_progress, "resolving", done=index + 1, total=len(tracks))
+
+        dropped = []
+        if dedupe:
+            found_tracks, dropped, changes = dedupe_resolved(slots)
+            if any(changes.values()):
+                search_log.info("Resolved tracks deduplicated", extra=changes)
+        else:
+            found_tracks = [{'original_query': slot['original_query'], 'spotify_data': slot['spotify_data']}
+                            for slot in slots]
+
+        search_results = {
+            "found_count": len(found_tracks),
+            "total_tracks": len(tracks) - len(dropped),
+            "successful_tracks": found_tracks
+        }
+        if dropped:
+            search_results["dropped_tracks"] = dropped
+        return {
+            "search_results": search_results,
+            "track_ids": [track['spotify_data']['spotify_id'] for track in found_tracks]
+        }
+
+    except Exception as e:
+        return _search_failure(f"Spotify search failed: {str(e)}")
+
+
+def generate_mock_playlist(class_name: str, music_preferences: str, duration: int) -> str:
+    """Fallback mock playlist"""
+    warmup_duration = int(duration * 0.15)
+    flow_duration = int(duration * 0.45)
+    peak_duration = int(duration * 0.25)
+    cooldown_duration = int(duration * 0.15)
+
+    return f"""**WARMUP ({warmup_duration} minutes)**
+BPM: 70-85 | Energy: Building, welcoming
+- Sample Artist - Sample Song 1
+
+**FLOW/ACTIVE ({flow_duration} minutes)**
+BPM: 90-110 | Energy: Sustained, rhythmic
+- Sample Artist - Sample Song 2
+
+**PEAK ({peak_duration} minutes)**
+BPM: 100-120 | Energy: High intensity
+- Sample Artist - Sample Song 3
+
+**COOLDOWN/SAVASANA ({cooldown_duration} minutes)**
+BPM: 60-75 | Energy: Peaceful
+- Sample Artist - Sample Song 4"""
+
+
+def degraded_playlist(request: Dict, reason: str) -> Dict:
+    """Best playlist available without the LLM, flagged degraded
+
+    Tries a loosely similar cached playlist first, then assembles one from
+    tracks already resolved into the catalog (by earlier generations and the
+    precompute job), preferring tracks tagged with the request's tastes
+    but accepting any track in each section's BPM range. Only when neither
+    has anything is the mock playlist returned.
+    """
+    response = None
+    cache = get_playlist_cache()
+    if cache:
+        response = cache.lookup(request, threshold=DEGRADED_SIMILARITY)
+        if response:
+            response['source'] = "degraded_cache"
+
+    catalog = get_track_catalog()
+    if response is None and catalog:
+        response = assemble_playlist(catalog, request, min_tag_share=0, allow_partial=True)
+        if response:
+            response['source'] = "degraded_catalog"
+
+    if response is None:
+        response = {
+            "success": True,
+            "playlist": generate_mock_playlist(request['class_name'], request['music_preferences'], request['duration']),
+            "spotify_integration": _search_failure(reason),
+            "ready_for_export": False,
+            "source": f"fallback_due_to: {reason}"
+        }
+
+    log.warning("Serving a degraded playlist", extra={"reason": reason, "source": response['source']})
+    return dict(response, degraded=True, degraded_reason=reason)
+
+
+def generate_playlist(data: Dict, on_progress: Optional[ProgressCallback] = None) -> Dict:
+    """Full generation pipeline behind /api/generate-playlist (see the module docstring)
+
+    The response dict may be shared with concurrent identical requests, so
+    callers must not mutate it.
+    """
+    started = time.perf_counter()
+    response, coalesced = _generate_playlist(data, on_progress)
+    elapsed = time.perf_counter() - started
+    source = "coalesced" if coalesced else response.get('source', 'unknown').split(':')[0]
+    GENERATION_SECONDS.labels(source=source).observe(elapsed)
+    log.info("Playlist generated", extra={"source": source, "seconds": round(elapsed, 3)})
+
+    history = get_playlist_history()
+    if history:
+        # A coalesced request still gets its own row (its user's history), but
+        # the run it shared is offered for reuse only once
+        request = normalize_request(data)
+        history.record(request, response, request_fingerprint(request), data.get('user_id'),
+                       reusable=is_cacheable(response) and not coalesced)
+    return response
+
+
+def _lookup(cache_name: str, lookup, *args) -> Optional[Dict]:
+    found = lookup(*args)
+    CACHE_LOOKUPS.labels(cache=cache_name, result="hit" if found else "miss").inc()
+    return found
+
+
+def _semantic_cacheable(response: Dict) -> bool:
+    # Variants responses are only reused for identical requests (history, by fingerprint)
+    return is_cacheable(response) and not response.get('variants')
+
+
+def _generate_playlist(data: Dict, on_progress: Optional[ProgressCallback]) -> Tuple[Dict, bool]:
+    """The response and whether it came from a concurrent identical request's run"""
+    request = normalize_request(data)
+    # Templates, the semantic cache and the catalog hold single playlists - no variants block
+    shortcuts = not data.get('fresh') and request['variants'] == 1
+
+    templates = get_template_store()
+    if templates and shortcuts:
+        template = _lookup("template", templates.pick, request)
+        if template:
+            _report(on_progress, "precomputed")
+            return template, False
+
+    history = get_playlist_history()
+    cache = get_playlist_cache()
+    if cache and history:
+        # A new instance starts with an empty cache - fill it from recent history
+        start_cache_warmup(cache, history, _semantic_cacheable)
+    if cache and shortcuts:
+        cached = _lookup("semantic", cache.lookup, request)
+        if cached:
+            _report(on_progress, "cached", similarity=cached['cache']['similarity'])
+            return cached, False
+
+    # Common tastes can be served straight from tracks resolved before
+    catalog = get_track_catalog()
+    if catalog and shortcuts:
+        assembled = _lookup("catalog", assemble_playlist, catalog, request)
+        if assembled:
+            _report(on_progress, "assembled")
+            return assembled, False
+
+    if history and not data.get('fresh'):
+        reused = _lookup("history", _reuse_from_history, history, request)
+        if reused:
+            _report(on_progress, "cached")
+            return reused, False
+
+    return _generations.do_shared(request_fingerprint(request), _run_generation, request, on_progress)
+
+
+def _reuse_from_history(history, request: Dict) -> Optional[Dict]:
+    """The last real playlist generated for an identical request, or None (never waits long)"""
+    response = history.reusable(request_fingerprint(request), CACHEABLE_SOURCES)
+    if not response or not is_cacheable(response):
+        return None
+    return dict(response, source="history")
+
+
+def _run_generation(request: Dict, on_progress: Optional[ProgressCallback]) -> Dict:
+    response = _generate_and_resolve(request, on_progress)
+    if response.get('degraded'):
+        return response
+
+    catalog = get_track_catalog()
+    sp = get_spotify_client()
+    resolved = [track['spotify_data'] for track in response['spotify_integration']['search_results'].get('successful_tracks', [])]
+    if catalog and resolved and sp:
+        terms = normalize_terms(request['music_preferences'])
+        if verification_enabled() and not response.get('variants'):
+            # Fetches features for new tracks, which also adds them to the catalog
+            _report(on_progress, "verifying")
+            try:
+                response = verify_playlist(response, catalog, sp, terms)
+            except Exception as e:
+                log.warning("Playlist verification failed", extra={"error": str(e)})
+        else:
+            _catalog_ingest.submit(catalog.ingest, sp, resolved, terms)
+
+    cache = get_playlist_cache()
+    if cache and _semantic_cacheable(response):
+        cache.store(request, response)
+    return response
+
+
+def _llm_available(task: str = "playlist") -> bool:
+    """False when every provider on the task's route has been failing (see UpstreamHealth.allows)"""
+    try:
+        providers = {target['provider'] for target in get_gateway().targets(task)}
+    except LLMError:
+        # Nothing configured - let the call itself fail and degrade as usual
+        return True
+    health = get_health()
+    return any(health.allows(provider) for provider in providers)
+
+
+def _generate_and_resolve(request: Dict, on_progress: Optional[ProgressCallback]) -> Dict:
+    # Recent LLM calls mostly failed - don't make this request wait for another one
+    if not _llm_available("playlist"):
+        _report(on_progress, "degraded")
+        return degraded_playlist(request, "llm_down")
+
+    if request['variants'] > 1:
+        return _generate_variants(request, on_progress)
+
+    try:
+        _report(on_progress, "generating")
+        playlist = generate_playlist_text(
+            request['class_name'],
+            request['class_description'],
+            request['music_preferences'],
+            request['duration'],
+            deadline=DEGRADE_AFTER
+        )
+
+        # Search for real Spotify tracks
+        _report(on_progress, "resolving", done=0, total=len(extract_tracks_from_text(playlist)))
+        spotify_results = search_spotify_tracks(playlist, on_progress=on_progress)
+        # Refilled and dropped duplicates show in the text as they will be exported
+        playlist = rewrite_playlist_text(playlist, spotify_results['search_results'])
+
+        return {
+            "success": True,
+            "playlist": playlist,
+            "spotify_integration": spotify_results,
+            "ready_for_export": len(spotify_results.get("track_ids", [])) > 0,
+            "source": "langchain_agent_with_spotify"
+        }
+
+    except Exception as e:
+        log.warning("Generation failed", extra={"error": str(e)})
+        _report(on_progress, "degraded")
+        return degraded_playlist(request, "llm_timeout" if isinstance(e, LLMTimeoutError) else f"llm_error: {e}")
+
+
+def _generate_variants(request: Dict, on_progress: Optional[ProgressCallback]) -> Dict:
+    """Alternatives for every section from one completion, resolved together"""
+    try:
+        _report(on_progress, "generating")
+        sections = parse_variants(generate_variants_text(request, deadline=DEGRADE_AFTER))
+        if not sections:
+            raise ValueError("No tracks found in playlist text")
+    except Exception as e:
+        log.warning("Variant generation failed", extra={"error": str(e)})
+        _report(on_progress, "degraded")
+        return degraded_playlist(request, "llm_timeout" if isinstance(e, LLMTimeoutError) else f"llm_error: {e}")
+
+    # Each distinct track is searched once, whichever options it appears in
+    queries = unique_queries(sections)
+    _report(on_progress, "resolving", done=0, total=len(queries))
+    # Options are alternatives, so build_variants_response dedupes them itself
+    results = search_spotify_tracks("\n".join(f"- {query}" for query in queries), on_progress=on_progress,
+                                    dedupe=False)
+    resolved = {
+        _normalize_text(track['original_query']): track['spotify_data']
+        for track in results['search_results'].get('successful_tracks', [])
+    }
+    response = build_variants_response(sections, resolved, request['variants'])
+    if results['search_results'].get('error'):
+        response['spotify_integration']['search_results']['error'] = results['search_results']['error']
+    return response
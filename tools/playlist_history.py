@@ -0,0 +1,332 @@
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.health import track
+from utils.log import get_logger
+from utils.metrics import HISTORY_ROWS
+from utils.pagination import decode_cursor, encode_cursor, keyset_before
+
+log = get_logger("history")
+
+TABLE = "generated_playlists"
+HISTORY_COLUMNS = "id, class_name, music_preferences, duration, source, degraded, track_count, response, created_at"
+
+# Rows per insert, and the longest a row waits for its batch to fill
+BATCH_SIZE = int(os.getenv("PLAYLIST_HISTORY_BATCH", 50))
+FLUSH_INTERVAL = float(os.getenv("PLAYLIST_HISTORY_FLUSH", 2))
+# Rows waiting to be written; past this new ones are dropped, never blocking a request
+MAX_PENDING = 1000
+# Serverless instances are frozen between requests and never run atexit, so
+# once a response is sent the handler waits up to this long for queued rows
+SERVERLESS = bool(os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+SERVERLESS_FLUSH_TIMEOUT = float(os.getenv("PLAYLIST_HISTORY_SERVERLESS_FLUSH", 1.5))
+# Recent playlists loaded into the semantic cache of a new instance (0 = none)
+WARMUP_SIZE = int(os.getenv("PLAYLIST_HISTORY_WARMUP", 200))
+# Identical-request lookups: longest a request waits on Supabase, how long answers
+# (found or not) are remembered, and how many fingerprints are remembered
+LOOKUP_TIMEOUT = float(os.getenv("PLAYLIST_HISTORY_LOOKUP_TIMEOUT", 0.25))
+LOOKUP_TTL = float(os.getenv("PLAYLIST_HISTORY_LOOKUP_TTL", 600))
+LOOKUP_CACHE_SIZE = 1000
+# Lookups still running; past this a miss doesn't start another
+MAX_LOOKUPS = 8
+
+_STOP = object()
+# Ends the batch being collected so a flush doesn't wait out FLUSH_INTERVAL
+_FLUSH = object()
+
+
+def class_key(class_name: str) -> str:
+    return ' '.join(str(class_name or '').lower().split())
+
+
+def history_row(request: Dict, response: Dict, fingerprint: str, user_id: Optional[str] = None,
+                reusable: bool = True) -> Dict:
+    """generated_playlists row for a normalized request and the response it got"""
+    return {
+        "user_id": user_id or None,
+        "class_name": request['class_name'],
+        "class_key": class_key(request['class_name']),
+        "class_description": request['class_description'],
+        "music_preferences": request['music_preferences'],
+        "duration": request['duration'],
+        "fingerprint": fingerprint,
+        "source": str(response.get('source') or 'unknown'),
+        "degraded": bool(response.get('degraded')),
+        "track_count": len((response.get('spotify_integration') or {}).get('track_ids') or []),
+        "reusable": reusable,
+        "response": response
+    }
+
+
+class PlaylistHistory:
+    """Generated playlists in Supabase, written in batches by a background thread
+
+    record() only queues the row, so generation never waits on the
+    database. The writer inserts up to BATCH_SIZE rows at a time, at most
+    FLUSH_INTERVAL seconds after the first of them was queued. A failed
+    insert is logged and its rows are dropped; history is best effort.
+    On serverless hosts the instance may be frozen before the writer runs,
+    so API handlers flush once their response is sent (flush_after_response);
+    rows that can't be written in time are counted as "unflushed" and may
+    be lost.
+
+    reusable() answers identical-request lookups from memory, waiting at
+    most LOOKUP_TIMEOUT on Supabase for a fingerprint it hasn't seen; a
+    slower answer is still remembered for the next request.
+    """
+
+    def __init__(self, client=None, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 max_pending: int = MAX_PENDING):
+        self._client = client
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.unflushed = 0
+        # fingerprint -> (expires_at, response or None), oldest first
+        self._lookups: OrderedDict = OrderedDict()
+        self._running: Dict[str, Future] = {}
+        self._lookup_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-lookup")
+
+    @property
+    def client(self):
+        if self._client is None:
+            from config.database import get_supabase_client
+            self._client = get_supabase_client()
+        return self._client
+
+    def record(self, request: Dict, response: Dict, fingerprint: str, user_id: Optional[str] = None,
+               reusable: bool = False):
+        """Queue a generated playlist for writing (never blocks)
+
+        Only reusable rows are offered to identical requests and the cache
+        warm-up; this instance also remembers them without a lookup.
+        """
+        if reusable:
+            self._remember(fingerprint, response)
+        self._start()
+        try:
+            self._queue.put_nowait(history_row(request, response, fingerprint, user_id, reusable))
+        except queue.Full:
+            self.dropped += 1
+            HISTORY_ROWS.labels(outcome="dropped").inc()
+
+    def _start(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="playlist-history", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            stopping = batch[0] is _STOP
+            flush_at = time.monotonic() + self.flush_interval
+            while not stopping and batch[-1] is not _FLUSH and len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get(timeout=max(0.0, flush_at - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    self._queue.task_done()
+                    break
+                batch.append(row)
+
+            rows = [row for row in batch if row is not _STOP and row is not _FLUSH]
+            if rows:
+                self._insert(rows)
+            for _ in batch:
+                self._queue.task_done()
+            if stopping:
+                return
+
+    def _insert(self, rows: List[Dict]):
+        try:
+            with track("supabase"):
+                self.client.table(TABLE).insert(rows).execute()
+            self.written += len(rows)
+            self.batches += 1
+            HISTORY_ROWS.labels(outcome="written").inc(len(rows))
+        except Exception as e:
+            self.dropped += len(rows)
+            HISTORY_ROWS.labels(outcome="dropped").inc(len(rows))
+            log.warning("Playlist history insert failed", extra={"rows": len(rows), "error": str(e)})
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued so far now; False if timeout passed first"""
+        if self._writer is None:
+            return True
+        try:
+            self._queue.put_nowait(_FLUSH)
+        except queue.Full:
+            pass
+        if timeout is None:
+            self._queue.join()
+            return True
+        give_up = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = give_up - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def flush_if_serverless(self, serverless: bool = SERVERLESS):
+        """On a serverless host, write queued rows before the instance can be frozen
+
+        A row still queued after SERVERLESS_FLUSH_TIMEOUT is counted as
+        unflushed; it is written only if the instance gets another request.
+        """
+        if not serverless or self.flush(SERVERLESS_FLUSH_TIMEOUT):
+            return
+        self.unflushed += 1
+        HISTORY_ROWS.labels(outcome="unflushed").inc()
+        log.warning("Playlist history not flushed before the request ended", extra={"pending": self._queue.qsize()})
+
+    def close(self):
+        """Write what is queued and stop the writer (registered with atexit)"""
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            self._queue.put(_STOP)
+            writer.join(timeout=10)
+
+    def user_history(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """One page of a user's playlists, newest first, and the next page's cursor"""
+        request = self.client.table(TABLE).select(HISTORY_COLUMNS).eq("user_id", user_id)
+        position = decode_cursor(cursor)
+        if position and "created_at" in position:
+            request = request.or_(keyset_before("created_at", position["created_at"], position["id"]))
+        with track("supabase"):
+            result = request.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute()
+        rows = result.data or []
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor({"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]})
+
+    def latest(self, fingerprint: str, sources: Tuple[str, ...]) -> Optional[Dict]:
+        """Newest response from one of sources for an identical request, or None"""
+        with track("supabase"):
+            result = self.client.table(TABLE).select("response").eq("fingerprint", fingerprint).in_(
+                "source", list(sources)).eq("reusable", True).eq("degraded", False).order("created_at", desc=True).limit(1).execute()
+        return result.data[0]['response'] if result.data else None
+
+    def reusable(self, fingerprint: str, sources: Tuple[str, ...], timeout: float = LOOKUP_TIMEOUT) -> Optional[Dict]:
+        """latest() through a small in-memory cache, waiting at most timeout seconds on Supabase"""
+        with self._lock:
+            remembered = self._lookups.get(fingerprint)
+            if remembered and remembered[0] > time.monotonic():
+                return remembered[1]
+            future = self._running.get(fingerprint)
+            if future is None:
+                if len(self._running) >= MAX_LOOKUPS:
+                    return None
+                future = self._running[fingerprint] = self._lookup_pool.submit(self._lookup, fingerprint, sources)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            return None
+
+    def _lookup(self, fingerprint: str, sources: Tuple[str, ...]) -> Optional[Dict]:
+        try:
+            response = self.latest(fingerprint, sources)
+        except Exception as e:
+            log.warning("Playlist history lookup failed", extra={"error": str(e)})
+            response = None
+        self._remember(fingerprint, response)
+        with self._lock:
+            self._running.pop(fingerprint, None)
+        return response
+
+    def _remember(self, fingerprint: str, response: Optional[Dict]):
+        with self._lock:
+            self._lookups[fingerprint] = (time.monotonic() + LOOKUP_TTL, response)
+            self._lookups.move_to_end(fingerprint)
+            while len(self._lookups) > LOOKUP_CACHE_SIZE:
+                self._lookups.popitem(last=False)
+
+    def recent(self, limit: int = WARMUP_SIZE) -> List[Dict]:
+        """Newest non-degraded rows across all users"""
+        with track("supabase"):
+            result = self.client.table(TABLE).select(
+                "class_name, class_description, music_preferences, duration, response").eq(
+                "degraded", False).eq("reusable", True).order("created_at", desc=True).limit(limit).execute()
+        return result.data or []
+
+    def stats(self) -> Dict:
+        return {"pending": self._queue.qsize(), "written": self.written,
+                "batches": self.batches, "dropped": self.dropped, "unflushed": self.unflushed}
+
+
+def warm_cache(cache, history: PlaylistHistory, is_cacheable, limit: int = WARMUP_SIZE) -> int:
+    """Load recent cacheable playlists from history into a semantic cache; returns how many"""
+    loaded = 0
+    for row in reversed(history.recent(limit)):
+        if is_cacheable(row['response']):
+            request = {field: row[field] for field in ("class_name", "class_description", "music_preferences", "duration")}
+            cache.store(request, row['response'])
+            loaded += 1
+    return loaded
+
+
+_history = None
+_history_lock = threading.Lock()
+_warmed = threading.Event()
+
+
+def get_playlist_history() -> Optional[PlaylistHistory]:
+    """Shared history for this process (None when PLAYLIST_HISTORY=off or Supabase isn't configured)"""
+    global _history
+    if os.getenv("PLAYLIST_HISTORY", "on") == "off" or not os.getenv("SUPABASE_URL"):
+        return None
+    if _history is not None:
+        return _history
+
+    with _history_lock:
+        if _history is None:
+            _history = PlaylistHistory()
+    return _history
+
+
+def flush_after_response():
+    """For API handlers, after the response is sent: see PlaylistHistory.flush_if_serverless"""
+    if _history is not None:
+        _history.flush_if_serverless()
+
+
+def start_cache_warmup(cache, history: PlaylistHistory, is_cacheable):
+    """Warm a new instance's semantic cache from history once, in the background"""
+    if _warmed.is_set() or not WARMUP_SIZE:
+        return
+    with _history_lock:
+        if _warmed.is_set():
+            return
+        _warmed.set()
+
+    def run():
+        try:
+            loaded = warm_cache(cache, history, is_cacheable)
+            log.info("Semantic cache warmed from history", extra={"playlists": loaded})
+        except Exception as e:
+            log.warning("Semantic cache warm-up failed", extra={"error": str(e)})
+
+    threading.Thread(target=run, name="cache-warmup", daemon=True).start()
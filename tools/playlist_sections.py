@@ -0,0 +1,276 @@
+import re
+import sys
+import os
+import time
+from typing import Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm import get_gateway
+from utils.log import get_logger
+from utils.metrics import GENERATION_SECONDS
+from tools.playlist_generator import (DEGRADE_AFTER, ProgressCallback, _normalize_text, _report,
+                                      convert_numbers_to_dashes, extract_tracks_from_text, search_spotify_tracks)
+from tools.playlist_variants import parse_variants, playlist_text
+from tools.track_resolution import resolved_queries
+
+log = get_logger("generator")
+
+SECTION_PROMPT = """
+        Replace one section of a yoga class playlist. The teacher wants different tracks for this section only.
+
+        Class Name: {class_name}
+        Class Description: {class_description}
+        Section: {heading}
+        {details}
+        Music Preferences: {music_preferences}
+        {notes}
+        Give about {track_count} tracks that fill {minutes} minutes with the right BPM and energy for this section.
+
+        Do NOT use any of these tracks (they are elsewhere in the playlist or were rejected):
+        {exclude}
+
+        IMPORTANT: Use ONLY dashes (-) for track listings, NEVER use numbers (1., 2., 3., etc.).
+
+        Format (use this exact format, tracks only):
+        - Artist - Song Title
+        - Artist - Song Title
+        """
+
+class SectionNotFoundError(LookupError):
+    """The section to regenerate is not in the playlist"""
+
+
+def structure_playlist(playlist: str, spotify_integration: Optional[Dict] = None) -> List[Dict]:
+    """Playlist text plus its resolved tracks -> [{"name", "minutes", "heading", "details", "tracks"}]
+
+    Each track is {"query", "spotify_id"}, the ID taken from
+    successful_tracks or, in compact responses, the "resolved" query -> ID
+    map. Queries found in neither get spotify_id None and are resolved
+    again when the playlist is rebuilt.
+    """
+    search_results = (spotify_integration or {}).get('search_results') or {}
+    resolved = {_normalize_text(query): spotify_id for query, spotify_id in (search_results.get('resolved') or {}).items()}
+    resolved.update({
+        _normalize_text(track['original_query']): track['spotify_data']['spotify_id']
+        for track in search_results.get('successful_tracks') or []
+    })
+    return [{
+        "name": section['name'],
+        "minutes": section['minutes'],
+        "heading": section['heading'],
+        "details": section['details'],
+        "tracks": [{"query": query, "spotify_id": resolved.get(_normalize_text(query))}
+                   for query in section['options'][0]]
+    } for section in parse_variants(playlist)]
+
+
+def find_section(sections: List[Dict], section_id) -> int:
+    """Index of a section by position or name ("peak" matches "PEAK", "flow" matches "FLOW/ACTIVE")"""
+    if isinstance(section_id, int) or str(section_id).strip().isdigit():
+        index = int(section_id)
+        if 0 <= index < len(sections):
+            return index
+        raise SectionNotFoundError(f"Section {index} not found (playlist has {len(sections)})")
+
+    wanted = str(section_id).strip().upper()
+    for index, section in enumerate(sections):
+        if section['name'] == wanted:
+            return index
+    for index, section in enumerate(sections):
+        if wanted in re.split(r'[/&\- ]+', section['name']):
+            return index
+    raise SectionNotFoundError(f"Section '{section_id}' not found")
+
+
+def _sections_error(sections) -> Optional[str]:
+    if not isinstance(sections, list):
+        return "Sections must be a list"
+    for section in sections:
+        if not isinstance(section, dict) or not isinstance(section.get('name'), str) \
+                or not isinstance(section.get('heading'), str) or not isinstance(section.get('details'), list) \
+                or not isinstance(section.get('tracks'), list):
+            return "Each section needs a name, heading, details and tracks"
+        if not all(isinstance(line, str) for line in section['details']):
+            return "Section details must be lines of text"
+        if section.get('minutes') is not None and (not isinstance(section['minutes'], int) or isinstance(section['minutes'], bool)):
+            return "Section minutes must be a number"
+        for track in section['tracks']:
+            if not isinstance(track, dict) or not isinstance(track.get('query'), str) or not track['query'].strip():
+                return "Each track needs a query"
+            if track.get('spotify_id') is not None and not isinstance(track['spotify_id'], str):
+                return "Track spotify_id must be text"
+    return None
+
+
+def validate_section_request(data: Dict) -> Optional[str]:
+    """Error message for a malformed regeneration request, or None"""
+    if not data.get('playlist') and not data.get('sections'):
+        return "Missing required field: playlist"
+    if data.get('sections'):
+        error = _sections_error(data['sections'])
+        if error:
+            return error
+    elif not isinstance(data['playlist'], str):
+        return "Playlist must be text"
+    if data.get('section') in (None, ''):
+        return "Missing required field: section"
+    if not isinstance(data.get('constraints') or {}, dict):
+        return "Constraints must be an object"
+    return None
+
+
+def section_details(section: Dict, constraints: Dict) -> List[str]:
+    """The section's BPM/energy line, replaced when the constraints set either"""
+    if not (constraints.get('bpm') or constraints.get('energy')):
+        return list(section['details'])
+    return [f"BPM: {constraints.get('bpm') or 'as before'} | Energy: {constraints.get('energy') or 'as before'}"]
+
+
+def section_prompt(data: Dict, section: Dict, exclude: List[str]) -> str:
+    constraints = data.get('constraints') or {}
+    return SECTION_PROMPT.format(
+        class_name=data.get('class_name') or "Yoga class",
+        class_description=data.get('class_description') or '',
+        heading=section['heading'] or section['name'],
+        details="\n        ".join(section_details(section, constraints)),
+        music_preferences=constraints.get('music_preferences') or data.get('music_preferences') or "music appropriate for yoga",
+        notes=f"Teacher's notes: {constraints['notes']}\n" if constraints.get('notes') else "",
+        track_count=max(2, len(section['tracks'])),
+        minutes=section['minutes'] or "a few",
+        exclude="\n        ".join(f"- {query}" for query in exclude) or "(none)"
+    )
+
+
+def _found(results: Dict) -> Dict[str, Dict]:
+    return {
+        _normalize_text(track['original_query']): track['spotify_data']
+        for track in results['search_results'].get('successful_tracks') or []
+    }
+
+
+def regenerate_section(data: Dict, on_progress: Optional[ProgressCallback] = None) -> Dict:
+    """Replace one section of an existing playlist, keeping every other section's tracks
+
+    data holds the playlist ("sections" from an earlier regeneration, or
+    "playlist" text with its "spotify_integration"), the "section" to
+    replace and optional "constraints". Only that section goes to the LLM
+    and only its tracks are searched; kept tracks reuse their Spotify IDs.
+    A new track that matches a kept one (by query or Spotify ID) is dropped.
+
+    Returns a generate-playlist shaped response plus the updated "sections".
+    Raises SectionNotFoundError for an unknown section and LLMError when the
+    LLM fails, so the caller's playlist stays as it was.
+    """
+    started = time.perf_counter()
+    constraints = data.get('constraints') or {}
+    sections = data.get('sections') or structure_playlist(data['playlist'], data.get('spotify_integration'))
+    # Copied - kept tracks get IDs filled in below
+    sections = [dict(section, minutes=section.get('minutes'), tracks=[dict(track) for track in section['tracks']])
+                for section in sections]
+    target = find_section(sections, data['section'])
+    section = sections[target]
+
+    kept = [track for index, other in enumerate(sections) if index != target for track in other['tracks']]
+    kept_queries = {_normalize_text(track['query']) for track in kept}
+    rejected = {_normalize_text(track['query']) for track in section['tracks']}
+
+    _report(on_progress, "generating")
+    prompt = section_prompt(data, section, [track['query'] for track in kept + section['tracks']])
+    result = get_gateway().complete([{"role": "user", "content": prompt}], task="playlist",
+                                    temperature=0.9, deadline=DEGRADE_AFTER)
+    queries = []
+    seen = kept_queries | rejected
+    for query in extract_tracks_from_text(convert_numbers_to_dashes(result['text'])):
+        if _normalize_text(query) not in seen:
+            seen.add(_normalize_text(query))
+            queries.append(query)
+
+    # New tracks, plus kept tracks whose IDs the caller didn't send back
+    unresolved = [track['query'] for track in kept if not track.get('spotify_id')]
+    to_search = queries + unresolved
+    _report(on_progress, "resolving", done=0, total=len(to_search))
+    found = {}
+    if queries:
+        # Repeats among the new tracks are refilled or dropped; the query list follows
+        results = search_spotify_tracks("\n".join(f"- {query}" for query in queries), on_progress=on_progress)
+        queries = [query for query in resolved_queries(queries, results['search_results']) if query]
+        found.update(_found(results))
+    if unresolved:
+        # Kept tracks stay as they are, repeats and all
+        found.update(_found(search_spotify_tracks("\n".join(f"- {query}" for query in unresolved),
+                                                  on_progress=on_progress, dedupe=False)))
+
+    kept_ids = set()
+    for track in kept:
+        if not track.get('spotify_id') and _normalize_text(track['query']) in found:
+            track['spotify_id'] = found[_normalize_text(track['query'])]['spotify_id']
+        if track.get('spotify_id'):
+            kept_ids.add(track['spotify_id'])
+
+    new_tracks = []
+    for query in queries:
+        spotify_data = found.get(_normalize_text(query))
+        spotify_id = spotify_data['spotify_id'] if spotify_data else None
+        if spotify_id and spotify_id in kept_ids:
+            continue
+        if spotify_id:
+            kept_ids.add(spotify_id)
+        new_tracks.append({"query": query, "spotify_id": spotify_id})
+
+    sections[target] = dict(section, details=section_details(section, constraints), tracks=new_tracks)
+
+    response = build_sections_response(sections, found)
+    response['regenerated'] = {
+        "section": section['name'],
+        "tracks": len(new_tracks),
+        "searched": len(to_search),
+        "kept_tracks": len(kept)
+    }
+    elapsed = time.perf_counter() - started
+    GENERATION_SECONDS.labels(source="section_regeneration").observe(elapsed)
+    log.info("Section regenerated", extra={"section": section['name'], "searched": len(to_search),
+                                           "kept": len(kept), "seconds": round(elapsed, 3)})
+    return response
+
+
+def build_sections_response(sections: List[Dict], found: Dict[str, Dict]) -> Dict:
+    """generate-playlist response for structured sections
+
+    found maps normalized queries to Spotify data from this request's
+    searches. Kept tracks only carry their ID, so their successful_tracks
+    entry has just the ID and URI.
+    """
+    track_ids = []
+    successful_tracks = []
+    total = 0
+    for section in sections:
+        for track in section['tracks']:
+            total += 1
+            spotify_id = track.get('spotify_id')
+            if not spotify_id or spotify_id in track_ids:
+                continue
+            track_ids.append(spotify_id)
+            successful_tracks.append({
+                'original_query': track['query'],
+                'spotify_data': found.get(_normalize_text(track['query'])) or
+                                {'spotify_id': spotify_id, 'uri': f"spotify:track:{spotify_id}"}
+            })
+
+    text_sections = [dict(section, options=[[track['query'] for track in section['tracks']]]) for section in sections]
+    return {
+        "success": True,
+        "playlist": playlist_text(text_sections),
+        "spotify_integration": {
+            "search_results": {
+                "found_count": len(track_ids),
+                "total_tracks": total,
+                "successful_tracks": successful_tracks
+            },
+            "track_ids": track_ids
+        },
+        "ready_for_export": len(track_ids) > 0,
+        "sections": sections,
+        "source": "section_regeneration"
+    }
@@ -0,0 +1,160 @@
+import copy
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.playlist_cache import adapt_playlist_text, duration_bucket
+from utils.health import track
+from utils.log import get_logger
+from utils.text import normalize_terms
+
+log = get_logger("templates")
+
+TABLE = "playlist_templates"
+# Tastes the precompute job covers for every public class ("" = no preference)
+POPULAR_PREFERENCES = [
+    "",
+    "chill instrumental",
+    "ambient electronic",
+    "acoustic",
+    "indie folk",
+    "lofi hip hop",
+    "pop",
+    "world music",
+]
+COMMON_DURATIONS = [30, 45, 60, 75, 90]
+POOL_SIZE = 3
+# Seconds a pool (or a miss) is remembered before asking Supabase again
+POOL_TTL = 300
+
+
+def template_key(request: Dict) -> str:
+    """Pool key for a normalized request: class, preference terms and duration bucket
+
+    Word order, case and punctuation don't matter ("Lofi, hip-hop" and
+    "hip hop lofi" share a pool), and durations share a pool within a
+    15 minute bucket; section lengths are rescaled on the way out. The
+    description is part of the key, so a custom class that reuses a public
+    class's name doesn't get its playlists.
+    """
+    class_terms = " ".join(normalize_terms(request['class_name']))
+    description = " ".join(normalize_terms(request['class_description']))
+    description_hash = hashlib.blake2b(description.encode("utf-8"), digest_size=6).hexdigest()
+    preference_terms = " ".join(sorted(set(normalize_terms(request['music_preferences']))))
+    return f"{class_terms}|{description_hash}|{preference_terms}|{duration_bucket(request['duration'])}"
+
+
+class PlaylistTemplateStore:
+    """Pools of precomputed responses in Supabase, served with random rotation
+
+    Pools are read once per POOL_TTL per process, so a warm instance answers
+    template hits without touching the database. Refreshes insert the new
+    pool before deleting the old one, so readers never see an empty pool.
+    """
+
+    def __init__(self, client=None, ttl: float = POOL_TTL, rng: Optional[random.Random] = None):
+        self._client = client
+        self.ttl = ttl
+        self.rng = rng or random.Random()
+        self._pools: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            from config.database import get_supabase_client
+            self._client = get_supabase_client()
+        return self._client
+
+    def get_pool(self, key: str) -> List[Dict]:
+        cached = self._pools.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+
+        try:
+            with track("supabase"):
+                result = self.client.table(TABLE).select("duration, response, created_at").eq(
+                    "template_key", key).execute()
+            pool = result.data or []
+        except Exception as e:
+            log.warning("Playlist template lookup failed", extra={"error": str(e)})
+            pool = []
+        with self._lock:
+            self._pools[key] = (time.monotonic(), pool)
+        return pool
+
+    def pick(self, request: Dict) -> Optional[Dict]:
+        """A random pool entry adapted to this request, or None"""
+        pool = self.get_pool(template_key(request))
+        if not pool:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        entry = self.rng.choice(pool)
+        response = copy.deepcopy(entry['response'])
+        response['playlist'] = adapt_playlist_text(response['playlist'], entry['duration'], request['duration'])
+        response['source'] = "precomputed_template"
+        response['template'] = {"pool_size": len(pool), "generated_at": entry.get('created_at')}
+        return response
+
+    def newest(self, key: str) -> Optional[datetime]:
+        """When the pool was last refreshed (None if it is empty)"""
+        result = self.client.table(TABLE).select("created_at").eq(
+            "template_key", key).order("created_at", desc=True).limit(1).execute()
+        if not result.data:
+            return None
+        return datetime.fromisoformat(result.data[0]['created_at'].replace("Z", "+00:00"))
+
+    def replace_pool(self, request: Dict, responses: List[Dict]) -> int:
+        """Store a fresh pool for this request's key and drop the previous one"""
+        if not responses:
+            return 0
+        key = template_key(request)
+        started = datetime.now(timezone.utc).isoformat()
+        rows = [{
+            "template_key": key,
+            "class_name": request['class_name'],
+            "music_preferences": request['music_preferences'],
+            "duration": request['duration'],
+            "response": response,
+            # Set here rather than by the database so the cutoff below can't
+            # catch the new rows on clock skew
+            "created_at": started
+        } for response in responses]
+        self.client.table(TABLE).insert(rows).execute()
+        self.client.table(TABLE).delete().eq("template_key", key).lt("created_at", started).execute()
+        with self._lock:
+            self._pools.pop(key, None)
+        return len(rows)
+
+    def stats(self) -> Dict:
+        return {"pools": len(self._pools), "hits": self.hits, "misses": self.misses}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_template_store() -> Optional[PlaylistTemplateStore]:
+    """Shared store for this process (None when PLAYLIST_TEMPLATES=off)"""
+    global _store
+    if os.getenv("PLAYLIST_TEMPLATES", "on") == "off":
+        return None
+    if _store is not None:
+        return _store
+
+    with _store_lock:
+        if _store is None:
+            _store = PlaylistTemplateStore()
+    return _store
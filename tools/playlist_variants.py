@@ -0,0 +1,184 @@
+import re
+from typing import Dict, List, Optional
+
+# Alternatives per section a request may ask for (1 = a plain playlist)
+MAX_VARIANTS = 4
+OPTION_LABELS = "ABCD"
+
+VARIANTS_PROMPT = """
+        Create a structured playlist for this yoga class that matches the following criteria:
+
+        Class Name: {class_name}
+        Class Description: {class_description}
+        Duration: {duration} minutes
+        Music Preferences: {music_preferences}
+
+        For every section, give {variants} alternative track lists (Option A, Option B, ...). Each option must cover the whole section on its own with appropriate BPM and energy levels. Don't repeat a track anywhere in the playlist.
+
+        IMPORTANT: Use ONLY dashes (-) for track listings, NEVER use numbers (1., 2., 3., etc.).
+
+        Format (use this exact format):
+        WARMUP (X minutes)
+        Option A
+        - Artist - Song Title
+        - Artist - Song Title
+        Option B
+        - Artist - Song Title
+        - Artist - Song Title
+
+        FLOW/ACTIVE (X minutes)
+        Option A
+        - Artist - Song Title
+        Option B
+        - Artist - Song Title
+
+        COOLDOWN/SAVASANA (X minutes)
+        Option A
+        - Artist - Song Title
+        Option B
+        - Artist - Song Title
+        """
+
+SECTION_PATTERN = re.compile(r'^\W*([A-Z][A-Z/&\- ]*[A-Z])\W*\((\d+)\s*min', re.IGNORECASE)
+OPTION_PATTERN = re.compile(r'^\W*option\s+([A-Z0-9]+)\b', re.IGNORECASE)
+
+
+def parse_variants(text: str) -> List[Dict]:
+    """Split variants-mode playlist text into sections with their options
+
+    Returns [{"name", "minutes", "heading", "details", "options": [[query, ...], ...]}].
+    Tracks listed before any "Option" line count as the first option, so a
+    model that ignores the options format still yields a usable playlist.
+    """
+    sections = []
+    for raw_line in text.split('\n'):
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        if (line.startswith('-') or line.startswith('•')) and ' - ' in line:
+            if not sections:
+                sections.append({"name": "PLAYLIST", "minutes": None, "heading": "", "details": [], "options": []})
+            options = sections[-1]['options']
+            if not options:
+                options.append([])
+            options[-1].append(line[1:].strip())
+            continue
+
+        if OPTION_PATTERN.match(line) and sections:
+            sections[-1]['options'].append([])
+            continue
+
+        section = SECTION_PATTERN.match(line)
+        if section:
+            sections.append({
+                "name": section.group(1).strip().upper(),
+                "minutes": int(section.group(2)),
+                "heading": line,
+                "details": [],
+                "options": []
+            })
+        elif sections:
+            sections[-1]['details'].append(line)
+
+    for section in sections:
+        section['options'] = [option for option in section['options'] if option]
+    return [section for section in sections if section['options']]
+
+
+def unique_queries(sections: List[Dict]) -> List[str]:
+    """Every track query across all options, once each (case and spacing ignored)"""
+    seen = set()
+    queries = []
+    for section in sections:
+        for option in section['options']:
+            for query in option:
+                key = ' '.join(query.lower().split())
+                if key not in seen:
+                    seen.add(key)
+                    queries.append(query)
+    return queries
+
+
+def playlist_text(sections: List[Dict], choice: Optional[List[int]] = None) -> str:
+    """Plain playlist text for one option per section (the first by default)"""
+    lines = []
+    for index, section in enumerate(sections):
+        option = section['options'][choice[index] if choice else 0]
+        if section['heading']:
+            lines.append(section['heading'])
+        lines.extend(section['details'])
+        lines.extend(f"- {query}" for query in option)
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+def build_variants_response(sections: List[Dict], resolved: Dict[str, Dict], variants: int) -> Dict:
+    """generate-playlist response for the first option of every section, plus all options
+
+    resolved maps normalized queries to their Spotify data. A track offered
+    in an earlier section is dropped from later sections' options, so no
+    combination of choices repeats a song. Clients rebuild the text and
+    track IDs for another choice from "variants" without a new request.
+    """
+    claimed = set()
+    variant_sections = []
+    for section in sections:
+        section_ids = set()
+        options = []
+        for option in section['options'][:variants]:
+            tracks = []
+            option_ids = set()
+            for query in option:
+                spotify_data = resolved.get(' '.join(query.lower().split()))
+                spotify_id = spotify_data['spotify_id'] if spotify_data else None
+                if spotify_id and (spotify_id in claimed or spotify_id in option_ids):
+                    continue
+                if spotify_id:
+                    option_ids.add(spotify_id)
+                tracks.append({"query": query, "spotify_id": spotify_id})
+            if tracks or not options:
+                options.append({"label": OPTION_LABELS[len(options)], "tracks": tracks})
+                section_ids |= option_ids
+        claimed |= section_ids
+        variant_sections.append({
+            "name": section['name'],
+            "minutes": section['minutes'],
+            "heading": section['heading'],
+            "details": section['details'],
+            "options": options
+        })
+
+    primary = [section['options'][0]['tracks'] for section in variant_sections]
+    found_tracks = []
+    track_ids = []
+    for tracks in primary:
+        for track in tracks:
+            if track['spotify_id'] and track['spotify_id'] not in track_ids:
+                track_ids.append(track['spotify_id'])
+                found_tracks.append({
+                    'original_query': track['query'],
+                    'spotify_data': resolved[' '.join(track['query'].lower().split())]
+                })
+
+    trimmed = [dict(section, options=[[track['query'] for track in option['tracks']] for option in variant['options']])
+               for section, variant in zip(sections, variant_sections)]
+    return {
+        "success": True,
+        "playlist": playlist_text(trimmed),
+        "spotify_integration": {
+            "search_results": {
+                "found_count": len(found_tracks),
+                "total_tracks": sum(len(tracks) for tracks in primary),
+                "successful_tracks": found_tracks
+            },
+            "track_ids": track_ids
+        },
+        "ready_for_export": len(track_ids) > 0,
+        "variants": {
+            "count": max(len(section['options']) for section in variant_sections),
+            "resolved_tracks": len(resolved),
+            "sections": variant_sections
+        },
+        "source": "langchain_agent_variants"
+    }
@@ -0,0 +1,197 @@
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Optional dependency - verification is skipped without NumPy
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from tools.track_catalog import SECTION_PROFILES
+from tools.energy_arc import effective_tempo, order_tracks
+
+SECTION_HEADER = re.compile(r"^\W*([A-Za-z][A-Za-z/ &-]*?)\s*\((\d+)\s*min(?:ute)?s?\)", re.IGNORECASE)
+BPM_LINE = re.compile(r"BPM:?\s*(\d+)\s*-\s*(\d+)", re.IGNORECASE)
+TRACK_LINE = re.compile(r"^\s*[-•]\s*(.+ - .+)$")
+
+
+def _profile_for(name: str) -> Optional[Dict]:
+    """Section profile whose name shares a word with the header (WARMUP, FLOW, PEAK, COOLDOWN...)"""
+    words = set(re.split(r"[^a-z]+", name.lower()))
+    for profile in SECTION_PROFILES:
+        if words & set(re.split(r"[^a-z]+", profile['name'].lower())):
+            return profile
+    return None
+
+
+def parse_sections(playlist_text: str) -> Dict:
+    """Split playlist text into sections with their declared BPM range and track queries
+
+    Returns {"preamble": [...lines], "sections": [...]}; each section keeps
+    its header lines verbatim so the text can be rebuilt after reordering.
+    Sections without a "BPM: a-b" line use the prompt's range for that
+    section name.
+    """
+    preamble = []
+    sections = []
+    for line in playlist_text.split('\n'):
+        header = SECTION_HEADER.match(line.strip())
+        if header:
+            profile = _profile_for(header.group(1))
+            sections.append({
+                "name": header.group(1).strip().upper(),
+                "minutes": int(header.group(2)),
+                "bpm": profile['bpm'] if profile else None,
+                "energy": profile['energy'] if profile else None,
+                "header": [line],
+                "queries": []
+            })
+            continue
+
+        if not sections:
+            preamble.append(line)
+            continue
+
+        section = sections[-1]
+        track = TRACK_LINE.match(line)
+        if track:
+            section['queries'].append(track.group(1).strip())
+            continue
+
+        bpm = BPM_LINE.search(line)
+        if bpm and not section['queries']:
+            section['bpm'] = (int(bpm.group(1)), int(bpm.group(2)))
+        if line.strip() and not section['queries']:
+            section['header'].append(line)
+
+    return {"preamble": preamble, "sections": sections}
+
+
+def render_sections(parsed: Dict) -> str:
+    """Inverse of parse_sections"""
+    lines = list(parsed['preamble'])
+    for section in parsed['sections']:
+        if lines and lines[-1].strip():
+            lines.append("")
+        lines.extend(section['header'])
+        lines.extend(f"- {query}" for query in section['queries'])
+    return "\n".join(lines).strip()
+
+
+def verify_playlist(response: Dict, catalog, sp=None, preference_terms=()) -> Dict:
+    """Check resolved tracks against each section's BPM range and tidy the order
+
+    Features come from the track catalog; tracks it hasn't seen are fetched
+    from Spotify in one batch (if sp is given) and remembered there.
+    Out-of-range tracks move to the section whose range fits them best
+    when one does, otherwise they stay and are flagged. Tracks are then
+    ordered along a smooth tempo/energy arc (tools/energy_arc.py) so the
+    class builds to the peak and then settles. Returns a new response with
+    a "verification" summary.
+    """
+    spotify = response.get('spotify_integration', {})
+    resolved = spotify.get('search_results', {}).get('successful_tracks', [])
+    parsed = parse_sections(response.get('playlist', ''))
+    sections = [s for s in parsed['sections'] if s['bpm']]
+    if not resolved or not sections:
+        return response
+
+    missing = [track['spotify_data'] for track in resolved if catalog.get(track['spotify_data']['spotify_id']) is None]
+    if missing and sp is not None:
+        catalog.ingest(sp, missing, preference_terms)
+
+    # Resolved tracks per query line, handed out in order, so a query listed
+    # twice maps to two tracks rather than one track twice
+    pending = {}
+    for track in resolved:
+        pending.setdefault(track['original_query'], []).append(track)
+    # One row (section, query, track) per resolved track placed in a parsed section
+    rows = []
+    unresolved = {}
+    for index, section in enumerate(sections):
+        for query in section['queries']:
+            if pending.get(query):
+                rows.append((index, query, pending[query].pop(0)))
+            else:
+                unresolved.setdefault(index, []).append(query)
+    if not rows:
+        return response
+
+    features = [catalog.get(track['spotify_data']['spotify_id']) or {} for _, _, track in rows]
+    tempo = np.array([f.get('tempo') if f.get('tempo') is not None else np.nan for f in features], dtype=np.float32)
+    energy = np.array([f.get('energy') if f.get('energy') is not None else np.nan for f in features], dtype=np.float32)
+    current = np.array([index for index, _, _ in rows])
+
+    # tracks x sections matrices of BPM distance from each section's range
+    lows = np.array([s['bpm'][0] for s in sections], dtype=np.float32)
+    highs = np.array([s['bpm'][1] for s in sections], dtype=np.float32)
+    tempos = effective_tempo(tempo[:, np.newaxis], lows[np.newaxis, :], highs[np.newaxis, :])
+    distance = np.clip(lows - tempos, 0, None) + np.clip(tempos - highs, 0, None)
+
+    known = ~np.isnan(tempo)
+    own_distance = distance[np.arange(len(rows)), current]
+    in_range = known & (own_distance == 0)
+    # Move a stray track only to a section it actually fits
+    best = np.argmin(np.nan_to_num(distance, nan=np.inf), axis=1)
+    movable = known & ~in_range & (distance[np.arange(len(rows)), best] == 0)
+    target = np.where(movable, best, current)
+
+    # Smooth tempo/energy arc across the whole class, tracks kept in their sections
+    order = order_tracks(
+        [None if np.isnan(t) else float(t) for t in tempos[np.arange(len(rows)), target]],
+        [None if np.isnan(e) else float(e) for e in energy],
+        target,
+        sections
+    )
+    reordered = {}
+    ordered_tracks = []
+    for index, section in enumerate(sections):
+        placed = [i for i in order if target[i] == index]
+        reordered[id(section)] = [rows[i][1] for i in placed] + unresolved.get(index, [])
+        ordered_tracks += [rows[i][2] for i in placed]
+
+    parsed = dict(parsed, sections=[
+        dict(section, queries=reordered.get(id(section), section['queries'])) for section in parsed['sections']
+    ])
+    # Resolved tracks outside any section keep their place at the end
+    placed = {id(track) for track in ordered_tracks}
+    ordered_tracks += [track for track in resolved if id(track) not in placed]
+
+    flagged = [{
+        "query": rows[i][1],
+        "section": sections[current[i]]['name'],
+        "tempo": round(float(tempos[i, current[i]]), 1),
+        "declared_bpm": list(sections[current[i]]['bpm']),
+        "moved_to": sections[target[i]]['name'] if movable[i] else None
+    } for i in np.flatnonzero(known & ~in_range)]
+
+    verified = dict(response)
+    verified['playlist'] = render_sections(parsed)
+    verified['spotify_integration'] = dict(spotify, track_ids=[t['spotify_data']['spotify_id'] for t in ordered_tracks])
+    verified['spotify_integration']['search_results'] = dict(spotify['search_results'], successful_tracks=ordered_tracks)
+    verified['verification'] = {
+        "checked": int(known.sum()),
+        "in_range": int(in_range.sum()),
+        "moved": int(movable.sum()),
+        "unknown": int((~known).sum()),
+        "flagged": flagged,
+        "sections": [{
+            "name": section['name'],
+            "declared_bpm": list(section['bpm']),
+            "in_range_share": _share(in_range, known & (current == index))
+        } for index, section in enumerate(sections)]
+    }
+    return verified
+
+
+def _share(values: "np.ndarray", mask: "np.ndarray") -> Optional[float]:
+    return round(float(values[mask].mean()), 2) if mask.any() else None
+
+
+def verification_enabled() -> bool:
+    return np is not None and os.getenv("PLAYLIST_VERIFICATION", "on") != "off"
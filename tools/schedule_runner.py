@@ -0,0 +1,212 @@
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.playlist_generator import generate_playlist, normalize_request, request_fingerprint, validate_request
+from tools.playlist_exporter import PlaylistExportError
+
+SCHEDULE_FIELDS = ("id", "class_name", "class_description", "music_preferences", "duration", "playlist_name")
+
+
+def load_schedule(path: str) -> List[Dict]:
+    """Rows of a studio schedule from a .csv (header row) or .json/.jsonl file
+
+    JSON may be a list of rows or {"classes": [...]}. Unknown columns are
+    ignored; a row's "id" (if any) is used as its resume key.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        elif path.endswith('.jsonl'):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = json.load(f)
+            if isinstance(rows, dict):
+                rows = rows.get('classes', [])
+
+    schedule = []
+    for row in rows:
+        row = {field: row[field] for field in SCHEDULE_FIELDS if row.get(field) not in (None, '')}
+        schedule.append(row)
+    return schedule
+
+
+def row_keys(rows: List[Dict]) -> List[str]:
+    """Stable resume key per row: its id, else the request fingerprint and occurrence
+
+    The occurrence count keeps repeated classes (the same class on several
+    days) apart without depending on line numbers, so rows can be added to
+    the schedule between runs.
+    """
+    seen = Counter()
+    keys = []
+    for row in rows:
+        if row.get('id'):
+            keys.append(str(row['id']))
+            continue
+        fingerprint = request_fingerprint(row)[:16] if validate_request(row) is None else "invalid"
+        seen[fingerprint] += 1
+        keys.append(f"{fingerprint}#{seen[fingerprint]}")
+    return keys
+
+
+def load_results(path: str) -> Dict[str, Dict]:
+    """Latest record per key from an earlier run's JSON Lines output"""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interruption - that row runs again
+                continue
+            results[record['key']] = record
+    return results
+
+
+def _percentile(values: List[float], share: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(share * len(values)))], 2)
+
+
+class ScheduleRunner:
+    """Generates (and optionally exports) playlists for every row of a schedule
+
+    Rows run on a pool of worker threads and each finished row is appended
+    to the JSON Lines output straight away, so an interrupted run resumes
+    where it stopped: finished rows are skipped and rows whose export
+    failed are only exported again (into the same Spotify playlist).
+    """
+
+    def __init__(self, output_path: str, workers: int = 4, exporter=None, fresh: bool = False,
+                 generate: Callable[[Dict], Dict] = generate_playlist,
+                 log: Callable[[str], None] = print):
+        self.output_path = output_path
+        self.workers = max(1, workers)
+        self.exporter = exporter
+        self.fresh = fresh
+        self.generate = generate
+        self.log = log
+        self._write_lock = threading.Lock()
+
+    def _write(self, record: Dict):
+        with self._write_lock:
+            with open(self.output_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+
+    def _needs_work(self, record: Optional[Dict]) -> bool:
+        if record is None or record['status'] == "failed":
+            return True
+        return self.exporter is not None and not (record.get('export') or {}).get('success')
+
+    def _export(self, row: Dict, track_ids: List[str], previous: Optional[Dict]) -> Dict:
+        playlist_name = row.get('playlist_name') or f"{row['class_name']} - {row['duration']} min"
+        previous = previous or {}
+        try:
+            result = self.exporter.export(playlist_name, previous.get('track_ids') or track_ids,
+                                          playlist_id=previous.get('playlist_id'))
+        except PlaylistExportError as e:
+            return {"success": False, "error": str(e), "playlist_id": e.playlist_id,
+                    "added": e.added, "track_ids": e.track_ids}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        return {"success": True, "playlist_id": result['playlist_id'],
+                "playlist_url": result['playlist_url'], "added": result['added']}
+
+    def run_row(self, key: str, row: Dict, previous: Optional[Dict] = None) -> Dict:
+        started = time.monotonic()
+        record = {"key": key, "request": row}
+
+        error = validate_request(row)
+        if error:
+            return dict(record, status="failed", error=error, elapsed=0.0)
+
+        if previous and previous['status'] == "succeeded":
+            # Generated last time; only the export is left
+            record.update({field: previous.get(field) for field in ("playlist", "track_ids", "source")})
+        else:
+            try:
+                response = self.generate(dict(normalize_request(row), fresh=self.fresh))
+            except Exception as e:
+                return dict(record, status="failed", error=str(e), elapsed=round(time.monotonic() - started, 2))
+            record.update({
+                "playlist": response.get('playlist'),
+                "track_ids": response.get('spotify_integration', {}).get('track_ids', []),
+                "source": response.get('source')
+            })
+            if not record['track_ids']:
+                return dict(record, status="failed", error="No tracks found on Spotify",
+                            elapsed=round(time.monotonic() - started, 2))
+
+        record['status'] = "succeeded"
+        if self.exporter is not None:
+            record['export'] = self._export(row, record['track_ids'], (previous or {}).get('export'))
+        record['elapsed'] = round(time.monotonic() - started, 2)
+        return record
+
+    def run(self, rows: List[Dict]) -> Dict:
+        """Process every row not finished by an earlier run; returns throughput stats"""
+        keys = row_keys(rows)
+        previous = load_results(self.output_path)
+        pending = [(key, row) for key, row in zip(keys, rows) if self._needs_work(previous.get(key))]
+        self.log(f"📋 {len(rows)} rows, {len(rows) - len(pending)} already done, {len(pending)} to run "
+                 f"with {self.workers} workers")
+
+        started = time.monotonic()
+        latencies = []
+        outcomes = Counter()
+        sources = Counter()
+        tracks = 0
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = [pool.submit(self.run_row, key, row, previous.get(key)) for key, row in pending]
+            for done, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                self._write(record)
+                latencies.append(record['elapsed'])
+                outcomes[record['status']] += 1
+                if record.get('export') is not None:
+                    outcomes["exported" if record['export']['success'] else "export_failed"] += 1
+                if record.get('source'):
+                    sources[record['source'].split(':')[0]] += 1
+                tracks += len(record.get('track_ids') or [])
+
+                icon = "✅" if record['status'] == "succeeded" else "❌"
+                self.log(f"{icon} [{done}/{len(pending)}] {record['request'].get('class_name')}: "
+                         f"{record.get('error') or record.get('source')}")
+        except KeyboardInterrupt:
+            # Rows still running are not recorded, so the next run repeats them
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+        elapsed = time.monotonic() - started
+        return {
+            "rows": len(rows),
+            "skipped": len(rows) - len(pending),
+            "processed": len(pending),
+            "succeeded": outcomes["succeeded"],
+            "failed": outcomes["failed"],
+            "exported": outcomes["exported"],
+            "export_failed": outcomes["export_failed"],
+            "tracks": tracks,
+            "sources": dict(sources),
+            "elapsed_seconds": round(elapsed, 1),
+            "rows_per_minute": round(len(pending) / elapsed * 60, 1) if elapsed > 0 else None,
+            "latency_p50": _percentile(latencies, 0.5),
+            "latency_p95": _percentile(latencies, 0.95)
+        }
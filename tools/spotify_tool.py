@@ -1,12 +1,26 @@
 import os
+import sys
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 from langchain.tools import BaseTool
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.playlist_exporter import PlaylistExporter, PlaylistExportError
+from utils.singleflight import SingleFlight
+from utils.health import track
+from utils.log import get_logger
+
+log = get_logger("spotify")
+
 load_dotenv()
 
+# Identical searches running at the same time share one Spotify call
+_track_searches = SingleFlight()
+
 class SpotifyTool(BaseTool):
     name = "spotify_search"
     description = "Search for tracks on Spotify and create playlists"
@@ -27,7 +41,7 @@ class SpotifyTool(BaseTool):
             )
             return spotipy.Spotify(auth_manager=auth_manager)
         except Exception as e:
-            print(f"❌ Spotify authentication failed: {e}")
+            log.error("Spotify authentication failed", extra={"error": str(e)})
             return None
     
     def _run(self, query: str) -> str:
@@ -104,7 +118,11 @@ class SpotifyTool(BaseTool):
         
         for track_query in track_list:
             try:
-                search_results = sp.search(q=track_query, type='track', limit=1)
+                with track("spotify"):
+                    search_results = _track_searches.do(
+                        ' '.join(track_query.lower().split()),
+                        sp.search, q=track_query, type='track', limit=1
+                    )
                 tracks = search_results['tracks']['items']
                 
                 if tracks:
@@ -138,22 +156,17 @@ class SpotifyTool(BaseTool):
             return "❌ Spotify client not available"
             
         try:
-            user_id = sp.current_user()['id']
-            
-            # Create playlist
-            playlist = sp.user_playlist_create(
-                user=user_id,
-                name=playlist_name,
-                description=description,
-                public=False
+            # Chunked at the API maximum with retries - safe above 100 tracks
+            result = PlaylistExporter(sp).export(
+                playlist_name=playlist_name,
+                track_ids=track_ids,
+                description=description
             )
             
-            # Add tracks to playlist
-            if track_ids:
-                sp.playlist_add_items(playlist['id'], track_ids)
-            
-            return f"✅ Created playlist '{playlist_name}' with {len(track_ids)} tracks: {playlist['external_urls']['spotify']}"
+            return f"✅ Created playlist '{playlist_name}' with {len(track_ids)} tracks: {result['playlist_url']}"
             
+        except PlaylistExportError as e:
+            return f"❌ Failed to create playlist: {str(e)} (resume with playlist_id {e.playlist_id})"
         except Exception as e:
             return f"❌ Failed to create playlist: {str(e)}"
 
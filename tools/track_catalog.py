@@ -0,0 +1,371 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Optional dependency - the catalog is disabled without NumPy
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils.text import normalize_terms
+from utils.log import get_logger
+
+log = get_logger("catalog")
+
+DEFAULT_CATALOG_PATH = os.path.join(tempfile.gettempdir(), "yoga-track-catalog.npz")
+
+# Section targets from MusicCurationAgent's prompt, with the share of class
+# time each section gets (same split as the mock playlist)
+SECTION_PROFILES = [
+    {"name": "WARMUP", "share": 0.15, "bpm": (60, 80), "energy": (0.2, 0.5), "description": "Gentle, welcoming"},
+    {"name": "FLOW/ACTIVE", "share": 0.45, "bpm": (80, 110), "energy": (0.4, 0.7), "description": "Rhythmic, supportive"},
+    {"name": "PEAK", "share": 0.25, "bpm": (90, 120), "energy": (0.6, 0.9), "description": "Energizing, focused"},
+    {"name": "COOLDOWN/SAVASANA", "share": 0.15, "bpm": (50, 70), "energy": (0.0, 0.35), "description": "Peaceful, integrative"},
+]
+
+# Spotify batch limits
+AUDIO_FEATURES_BATCH = 100
+ARTISTS_BATCH = 50
+
+
+class TrackCatalog:
+    """Columnar store of resolved tracks with tempo/energy features and tags
+
+    Every column is a NumPy array indexed by row, so selecting tracks for a
+    section is a handful of vectorized comparisons over the whole catalog.
+    Tags (artist genres and the preference terms that led to a track) are a
+    boolean track x tag matrix.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._artists: List[str] = []
+        self._vocab: Dict[str, int] = {}
+        self._tempo = np.full(256, np.nan, dtype=np.float32)
+        self._energy = np.full(256, np.nan, dtype=np.float32)
+        self._duration_ms = np.zeros(256, dtype=np.int32)
+        self._tags = np.zeros((256, 64), dtype=bool)
+        self._dirty_since = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _grow(self, rows: int, tags: int):
+        capacity, tag_capacity = self._tags.shape
+        if rows > capacity:
+            new_capacity = max(rows, capacity * 2)
+            for column, fill in (("_tempo", np.nan), ("_energy", np.nan), ("_duration_ms", 0)):
+                old = getattr(self, column)
+                grown = np.full(new_capacity, fill, dtype=old.dtype)
+                grown[:capacity] = old
+                setattr(self, column, grown)
+        else:
+            new_capacity = capacity
+
+        new_tag_capacity = max(tags, tag_capacity * 2) if tags > tag_capacity else tag_capacity
+        if (new_capacity, new_tag_capacity) != self._tags.shape:
+            grown = np.zeros((new_capacity, new_tag_capacity), dtype=bool)
+            grown[:capacity, :tag_capacity] = self._tags
+            self._tags = grown
+
+    def _tag_columns(self, tags: Iterable[str], create: bool) -> List[int]:
+        columns = []
+        for tag in tags:
+            column = self._vocab.get(tag)
+            if column is None and create:
+                column = len(self._vocab)
+                self._vocab[tag] = column
+            if column is not None:
+                columns.append(column)
+        return columns
+
+    def add(self, tracks: List[Dict]):
+        """Insert or update tracks
+
+        Each track needs id, name and artists and may carry tempo, energy,
+        duration_ms and tags. Missing features keep the stored value; tags
+        accumulate.
+        """
+        with self._lock:
+            for track in tracks:
+                row = self._rows.get(track['id'])
+                if row is None:
+                    row = len(self._ids)
+                    self._rows[track['id']] = row
+                    self._ids.append(track['id'])
+                    self._names.append(track['name'])
+                    self._artists.append(", ".join(track['artists']))
+
+                columns = self._tag_columns(track.get('tags', ()), create=True)
+                self._grow(row + 1, len(self._vocab))
+                if track.get('tempo') is not None:
+                    self._tempo[row] = track['tempo']
+                if track.get('energy') is not None:
+                    self._energy[row] = track['energy']
+                if track.get('duration_ms'):
+                    self._duration_ms[row] = track['duration_ms']
+                self._tags[row, columns] = True
+            self._dirty_since = self._dirty_since or time.time()
+
+    def select(self, bpm_range: Tuple[float, float], energy_range: Optional[Tuple[float, float]] = None,
+               tags: Iterable[str] = (), min_tag_overlap: int = 1, exclude: Iterable[str] = (),
+               limit: int = 20, rng=None) -> List[Dict]:
+        """Tracks within a BPM range, best matching the tags and energy range first
+
+        Detected tempos are often doubled, so a track also qualifies when half
+        its tempo is in range. A little random jitter in the ranking varies
+        the picks between calls.
+        """
+        with self._lock:
+            count = len(self._ids)
+            if count == 0:
+                return []
+
+            tempo = self._tempo[:count]
+            low, high = bpm_range
+            half = tempo / 2
+            mask = ((tempo >= low) & (tempo <= high)) | ((half >= low) & (half <= high))
+            score = np.zeros(count, dtype=np.float32)
+
+            columns = self._tag_columns(tags, create=False)
+            if tags:
+                overlap = self._tags[:count][:, columns].sum(axis=1) if columns else np.zeros(count)
+                mask &= overlap >= min_tag_overlap
+                score += overlap
+
+            if energy_range is not None:
+                energy = self._energy[:count]
+                # Distance outside the range; tracks without energy are left neutral
+                distance = np.clip(energy_range[0] - energy, 0, None) + np.clip(energy - energy_range[1], 0, None)
+                score -= np.nan_to_num(distance, nan=0.0) * 4
+
+            for track_id in exclude:
+                row = self._rows.get(track_id)
+                if row is not None:
+                    mask[row] = False
+
+            candidates = np.flatnonzero(mask)
+            if len(candidates) == 0:
+                return []
+            rng = rng or np.random.default_rng()
+            ranking = score[candidates] + rng.random(len(candidates)) * 0.5
+            chosen = candidates[np.argsort(-ranking)[:limit]]
+            return [self._track(int(row)) for row in chosen]
+
+    def _track(self, row: int) -> Dict:
+        tempo = self._tempo[row]
+        energy = self._energy[row]
+        return {
+            "id": self._ids[row],
+            "name": self._names[row],
+            "artists": self._artists[row].split(", "),
+            "tempo": None if np.isnan(tempo) else float(tempo),
+            "energy": None if np.isnan(energy) else float(energy),
+            "duration_ms": int(self._duration_ms[row])
+        }
+
+    def get(self, track_id: str) -> Optional[Dict]:
+        row = self._rows.get(track_id)
+        return None if row is None else self._track(row)
+
+    def save(self, path: Optional[str] = None):
+        """Write the catalog to an .npz file (atomically replaced)"""
+        path = path or self.path
+        with self._lock:
+            count = len(self._ids)
+            vocab = sorted(self._vocab, key=self._vocab.get)
+            tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+            np.savez_compressed(
+                tmp_path,
+                ids=np.array(self._ids, dtype=str),
+                names=np.array(self._names, dtype=str),
+                artists=np.array(self._artists, dtype=str),
+                tempo=self._tempo[:count],
+                energy=self._energy[:count],
+                duration_ms=self._duration_ms[:count],
+                tags=self._tags[:count, :len(vocab)],
+                vocab=np.array(vocab, dtype=str)
+            )
+            os.replace(tmp_path, path)
+            self._dirty_since = None
+
+    def save_if_due(self, interval: float = 60):
+        """Save when there are changes older than interval seconds"""
+        if self.path and self._dirty_since and time.time() - self._dirty_since >= interval:
+            self.save()
+
+    @classmethod
+    def load(cls, path: str) -> "TrackCatalog":
+        catalog = cls(path)
+        if not os.path.exists(path):
+            return catalog
+
+        with np.load(path, allow_pickle=False) as data:
+            count = len(data['ids'])
+            catalog._ids = data['ids'].tolist()
+            catalog._names = data['names'].tolist()
+            catalog._artists = data['artists'].tolist()
+            catalog._rows = {track_id: row for row, track_id in enumerate(catalog._ids)}
+            catalog._vocab = {tag: column for column, tag in enumerate(data['vocab'].tolist())}
+            catalog._grow(count, len(catalog._vocab))
+            catalog._tempo[:count] = data['tempo']
+            catalog._energy[:count] = data['energy']
+            catalog._duration_ms[:count] = data['duration_ms']
+            catalog._tags[:count, :len(catalog._vocab)] = data['tags']
+        return catalog
+
+    def ingest(self, sp, resolved_tracks: List[Dict], preference_terms: Iterable[str] = ()):
+        """Add tracks resolved by a search, fetching tempo/energy and artist genres from Spotify
+
+        resolved_tracks are spotify_data dicts from search_spotify_tracks.
+        Lookups that fail (e.g. audio features unavailable to the app) just
+        leave those features empty.
+        """
+        track_ids = [track['spotify_id'] for track in resolved_tracks]
+        features = {}
+        for start in range(0, len(track_ids), AUDIO_FEATURES_BATCH):
+            try:
+                for item in sp.audio_features(track_ids[start:start + AUDIO_FEATURES_BATCH]) or []:
+                    if item:
+                        features[item['id']] = item
+            except Exception as e:
+                log.warning("Audio features lookup failed", extra={"error": str(e)})
+                break
+
+        artist_ids = sorted({artist_id for track in resolved_tracks for artist_id in track.get('artist_ids', [])})
+        genres = {}
+        for start in range(0, len(artist_ids), ARTISTS_BATCH):
+            try:
+                for artist in sp.artists(artist_ids[start:start + ARTISTS_BATCH])['artists']:
+                    if artist:
+                        genres[artist['id']] = artist.get('genres', [])
+            except Exception as e:
+                log.warning("Artist genre lookup failed", extra={"error": str(e)})
+                break
+
+        preference_terms = set(preference_terms)
+        tracks = []
+        for track in resolved_tracks:
+            tags = set(preference_terms)
+            for artist_id in track.get('artist_ids', []):
+                for genre in genres.get(artist_id, []):
+                    tags.update(normalize_terms(genre))
+            feature = features.get(track['spotify_id'], {})
+            tracks.append({
+                "id": track['spotify_id'],
+                "name": track['name'],
+                "artists": track['artists'],
+                "tempo": feature.get('tempo'),
+                "energy": feature.get('energy'),
+                "duration_ms": track.get('duration_ms') or feature.get('duration_ms'),
+                "tags": tags
+            })
+        self.add(tracks)
+        self.save_if_due()
+
+
+def assemble_playlist(catalog: TrackCatalog, request: Dict, min_tag_share: float = 0.5,
+                      allow_partial: bool = False, rng=None) -> Optional[Dict]:
+    """Build a full generate-playlist response from the catalog alone
+
+    Each section is filled with tracks in its BPM range that share at least
+    min_tag_share of the request's preference terms, until the section's
+    minutes are covered. Returns None when any section can't be filled, so
+    the caller can fall back to the LLM for less common tastes. With
+    min_tag_share=0 matching tracks only rank first, and allow_partial
+    accepts sections that are short of their minutes (degraded mode).
+    """
+    terms = normalize_terms(request['music_preferences'])
+    min_overlap = max(1, int(np.ceil(len(terms) * min_tag_share))) if terms and min_tag_share > 0 else 0
+    used = set()
+    sections = []
+
+    for profile in SECTION_PROFILES:
+        minutes = max(1, int(request['duration'] * profile['share']))
+        candidates = catalog.select(profile['bpm'], profile['energy'], tags=terms,
+                                    min_tag_overlap=min_overlap, exclude=used, rng=rng)
+        picked = []
+        filled_ms = 0
+        for track in candidates:
+            if filled_ms >= minutes * 60000:
+                break
+            picked.append(track)
+            # Assume a typical 4 minute track when the length is unknown
+            filled_ms += track['duration_ms'] or 240000
+        if not picked or (filled_ms < minutes * 60000 and not allow_partial):
+            return None
+
+        used.update(track['id'] for track in picked)
+        sections.append((profile, minutes, picked))
+
+    lines = []
+    found_tracks = []
+    for profile, minutes, picked in sections:
+        low, high = profile['bpm']
+        lines.append(f"**{profile['name']} ({minutes} minutes)**")
+        lines.append(f"BPM: {low}-{high} | Energy: {profile['description']}")
+        for track in picked:
+            query = f"{', '.join(track['artists'])} - {track['name']}"
+            lines.append(f"- {query}")
+            found_tracks.append({
+                'original_query': query,
+                'spotify_data': {
+                    'spotify_id': track['id'],
+                    'name': track['name'],
+                    'artists': track['artists'],
+                    'uri': f"spotify:track:{track['id']}"
+                }
+            })
+        lines.append("")
+
+    return {
+        "success": True,
+        "playlist": "\n".join(lines).strip(),
+        "spotify_integration": {
+            "search_results": {
+                "found_count": len(found_tracks),
+                "total_tracks": len(found_tracks),
+                "successful_tracks": found_tracks
+            },
+            "track_ids": [track['spotify_data']['spotify_id'] for track in found_tracks]
+        },
+        "ready_for_export": True,
+        "source": "track_catalog"
+    }
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_track_catalog() -> Optional[TrackCatalog]:
+    """Shared catalog for this process, loaded from TRACK_CATALOG_PATH
+
+    None when NumPy is missing or TRACK_CATALOG=off.
+    """
+    global _catalog
+    if np is None or os.getenv("TRACK_CATALOG", "on") == "off":
+        return None
+    if _catalog is not None:
+        return _catalog
+
+    with _catalog_lock:
+        if _catalog is None:
+            path = os.getenv("TRACK_CATALOG_PATH") or DEFAULT_CATALOG_PATH
+            try:
+                _catalog = TrackCatalog.load(path)
+            except Exception as e:
+                log.warning("Could not load track catalog", extra={"path": path, "error": str(e)})
+                _catalog = TrackCatalog(path)
+    return _catalog
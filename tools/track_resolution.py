@@ -0,0 +1,160 @@
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Search results kept per query; the ones after the first are backfill candidates
+RESOLVE_CANDIDATES = int(os.getenv("RESOLVE_CANDIDATES", 5))
+# Tracks allowed per (primary) artist in one playlist; 0 (the default) for no cap
+ARTIST_CAP = int(os.getenv("ARTIST_CAP", 0))
+
+# "Juicy - 2005 Remaster", "Holocene (Live)" -> the song itself
+VERSION_SUFFIX = re.compile(r'\s*(\(.*\)|\[.*\]|\s-\s.*)$')
+
+
+def spotify_track_data(track: Dict) -> Dict:
+    """spotify_data for a track from a Spotify search"""
+    return {
+        'spotify_id': track['id'],
+        'name': track['name'],
+        'artists': [artist['name'] for artist in track['artists']],
+        'artist_ids': [artist['id'] for artist in track['artists']],
+        'duration_ms': track.get('duration_ms'),
+        'isrc': (track.get('external_ids') or {}).get('isrc'),
+        'uri': track['uri']
+    }
+
+
+def _artist_key(data: Dict) -> str:
+    if data.get('artist_ids'):
+        return data['artist_ids'][0]
+    return (data.get('artists') or [''])[0].lower()
+
+
+def _song_key(data: Dict) -> str:
+    # Title only, so a cover by another artist counts as the same song
+    return VERSION_SUFFIX.sub('', data.get('name') or '').lower().strip()
+
+
+class _Picked:
+    """Tracks accepted so far, keyed every way a repeat can show up"""
+
+    def __init__(self, artist_cap: int):
+        self.artist_cap = artist_cap
+        self.ids = set()
+        self.isrcs = set()
+        self.songs = set()
+        self.artists = Counter()
+
+    def rejects(self, data: Dict) -> Optional[str]:
+        """Why data can't join the playlist ("duplicate" or "capped"), or None"""
+        if data['spotify_id'] in self.ids or (data.get('isrc') and data['isrc'] in self.isrcs) \
+                or _song_key(data) in self.songs:
+            return "duplicate"
+        if self.artist_cap and self.artists[_artist_key(data)] >= self.artist_cap:
+            return "capped"
+        return None
+
+    def add(self, data: Dict):
+        self.ids.add(data['spotify_id'])
+        if data.get('isrc'):
+            self.isrcs.add(data['isrc'])
+        self.songs.add(_song_key(data))
+        self.artists[_artist_key(data)] += 1
+
+
+def track_query(data: Dict) -> str:
+    """"Artist, Artist - Title" for a resolved track"""
+    return f"{', '.join(data.get('artists') or [])} - {data.get('name') or ''}"
+
+
+def dedupe_resolved(slots: List[Dict], artist_cap: int = ARTIST_CAP) -> Tuple[List[Dict], List[Dict], Dict]:
+    """Drop repeated recordings and over-cap artists, backfilling from search candidates
+
+    slots are {"original_query", "spotify_data", "candidates", "section"} in
+    playlist order, candidates being the query's other search results and
+    section the index of the playlist section the line is in. A slot is
+    removed when its track repeats an earlier one (same Spotify ID, ISRC or
+    song title, covers included) or its artist already has artist_cap tracks.
+    Removed slots are refilled in place from their own candidates first,
+    then from those of the other queries in the same section, so no extra
+    searches are made and refills keep to the section's tempo. A refill
+    gets its own query ("Artist - Title") and "replaces" names the line it
+    took over, so no two entries share a query unless the lines did. Slots
+    nothing fits are left out.
+
+    Returns the successful_tracks list, the dropped slots ({"original_query",
+    "reason"}) and counts of what was changed.
+    """
+    picked = _Picked(artist_cap)
+    chosen: List[Optional[Dict]] = [None] * len(slots)
+    reasons: List[Optional[str]] = [None] * len(slots)
+    stats = {"duplicates": 0, "capped": 0, "backfilled": 0}
+
+    # Every search's first result gets its slot before any candidate does
+    for index, slot in enumerate(slots):
+        reason = picked.rejects(slot['spotify_data'])
+        if reason:
+            reasons[index] = reason
+            stats["duplicates" if reason == "duplicate" else "capped"] += 1
+            continue
+        picked.add(slot['spotify_data'])
+        chosen[index] = {'original_query': slot['original_query'], 'spotify_data': slot['spotify_data']}
+
+    pools: Dict[Optional[int], List[Dict]] = {}
+    for slot in slots:
+        pools.setdefault(slot.get('section'), []).extend(slot.get('candidates', []))
+    for index, slot in enumerate(slots):
+        if chosen[index] is not None:
+            continue
+        # A cover of the song the slot lost is no replacement for it
+        song = _song_key(slot['spotify_data'])
+        for candidate in slot.get('candidates', []) + pools[slot.get('section')]:
+            if _song_key(candidate) != song and picked.rejects(candidate) is None:
+                picked.add(candidate)
+                chosen[index] = {'original_query': track_query(candidate), 'spotify_data': candidate,
+                                 'replaces': slot['original_query']}
+                stats["backfilled"] += 1
+                break
+
+    dropped = [{'original_query': slot['original_query'], 'reason': reasons[index]}
+               for index, slot in enumerate(slots) if chosen[index] is None]
+    return [track for track in chosen if track is not None], dropped, stats
+
+
+def resolved_queries(queries: List[str], search_results: Dict) -> List[Optional[str]]:
+    """The playlist's track queries as resolved, aligned with queries
+
+    A line whose track was refilled becomes the refill's query and a line
+    dropped without a refill becomes None. Lines that matched nothing on
+    Spotify stay as they are.
+    """
+    tracks = search_results.get('successful_tracks') or []
+    kept = Counter(track['original_query'] for track in tracks if not track.get('replaces'))
+    replacements: Dict[str, List[Optional[str]]] = {}
+    for track in tracks:
+        if track.get('replaces'):
+            replacements.setdefault(track['replaces'], []).append(track['original_query'])
+    for slot in search_results.get('dropped_tracks') or []:
+        replacements.setdefault(slot['original_query'], []).append(None)
+
+    seen = Counter()
+    result = []
+    for query in queries:
+        seen[query] += 1
+        if seen[query] <= kept[query] or not replacements.get(query):
+            result.append(query)
+        else:
+            result.append(replacements[query].pop(0))
+    return result
+
+
+def rewrite_playlist_text(playlist_text: str, search_results: Dict) -> str:
+    """Playlist text with refilled lines replaced and dropped lines removed (see resolved_queries)"""
+    lines = playlist_text.split('\n')
+    track_lines = [index for index, line in enumerate(lines)
+                   if (line.strip().startswith('-') or line.strip().startswith('•')) and ' - ' in line]
+    queries = resolved_queries([lines[index].strip()[1:].strip() for index in track_lines], search_results)
+    for index, query in zip(track_lines, queries):
+        lines[index] = None if query is None else f"- {query}"
+    return '\n'.join(line for line in lines if line is not None)
@@ -0,0 +1,80 @@
+import os
+import threading
+from functools import lru_cache
+from typing import Optional
+
+# Shared upstream clients, created once per warm process.
+# When every endpoint runs behind the single router (api/index.py) these are
+# reused across all routes instead of being rebuilt on every request.
+
+_lock = threading.Lock()
+_spotify_client = None
+
+
+def get_spotify_client():
+    """Get a shared Spotify client using the Client Credentials flow
+
+    Returns None when credentials are not configured. The client caches its
+    app token internally, so reusing it also skips repeated token requests.
+    """
+    global _spotify_client
+
+    if _spotify_client is not None:
+        return _spotify_client
+
+    client_id = os.getenv("SPOTIFY_CLIENT_ID")
+    client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
+    if not client_id or not client_secret:
+        return None
+
+    with _lock:
+        if _spotify_client is None:
+            import spotipy
+            from spotipy.oauth2 import SpotifyClientCredentials
+
+            client_credentials_manager = SpotifyClientCredentials(
+                client_id=client_id,
+                client_secret=client_secret
+            )
+            _spotify_client = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
+
+    return _spotify_client
+
+
+@lru_cache(maxsize=16)
+def get_chat_model(model: str = "gpt-3.5-turbo", temperature: float = 0.7, base_url: Optional[str] = None,
+                   api_key: Optional[str] = None, timeout: Optional[float] = None, provider: Optional[str] = None):
+    """Get a shared ChatOpenAI client for a model/temperature/endpoint combination
+
+    With a provider, the client's calls are counted in the LLM metrics and
+    that provider's health, as gateway calls are.
+    """
+    from langchain_openai import ChatOpenAI
+
+    callbacks = None
+    if provider:
+        from agents.tracing import LLMMetricsHandler
+        callbacks = [LLMMetricsHandler(model, provider)]
+
+    return ChatOpenAI(
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        base_url=base_url or None,
+        model=model,
+        temperature=temperature,
+        timeout=timeout,
+        # The gateway fails over to the next target instead of retrying
+        max_retries=0 if timeout else 2,
+        callbacks=callbacks
+    )
+
+
+def reset_clients():
+    """Drop cached clients (used by tests and after credential changes)"""
+    global _spotify_client
+
+    with _lock:
+        _spotify_client = None
+    get_chat_model.cache_clear()
+
+    from utils import llm
+    llm.get_agent_model.cache_clear()
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import threading
+from typing import List
+
+import numpy as np
+
+from utils.text import normalize_terms
+
+
+class HashingEmbedder:
+    """Deterministic local embeddings from hashed word and character n-gram features
+
+    Needs no network or model download, so it is the default and what the
+    tests use. Words match exactly; character trigrams let spelling variants
+    ("hiphop" / "hip hop") land close to each other.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _features(self, text: str):
+        for word in normalize_terms(text):
+            yield "w:" + word, 1.0
+            padded = f"<{word}>"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3], 0.5
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                # Signed hashing keeps collisions from adding up to false similarity
+                sign = 1.0 if value & 1 else -1.0
+                vectors[row, (value >> 1) % self.dim] += sign * weight
+        return _normalize_rows(vectors)
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API (one batched call per embed)"""
+
+    name = "openai"
+
+    def __init__(self, model: str = "text-embedding-3-small"):
+        from langchain_openai import OpenAIEmbeddings
+
+        self.model = model
+        self._client = OpenAIEmbeddings(api_key=os.getenv("OPENAI_API_KEY"), model=model)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(self._client.embed_documents(texts), dtype=np.float32)
+        return _normalize_rows(vectors)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """Shared embedder chosen by EMBEDDING_MODEL ("hashing" by default, "openai" or an OpenAI model name)"""
+    global _embedder
+    if _embedder is not None:
+        return _embedder
+
+    with _embedder_lock:
+        if _embedder is None:
+            choice = os.getenv("EMBEDDING_MODEL", "hashing")
+            if choice == "hashing":
+                _embedder = HashingEmbedder()
+            elif choice == "openai":
+                _embedder = OpenAIEmbedder()
+            else:
+                _embedder = OpenAIEmbedder(model=choice)
+    return _embedder
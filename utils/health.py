@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from utils.log import get_logger
+from utils.metrics import UPSTREAM_SECONDS
+
+log = get_logger("health")
+
+# Outcomes older than this don't count towards an upstream's status
+WINDOW_SECONDS = 300
+WINDOW_CALLS = 200
+# An upstream without real traffic for this long is probed in the background
+PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", 300))
+# Readiness summaries are rebuilt at most this often
+SUMMARY_TTL = 1.0
+
+UP_SUCCESS_RATE = 0.9
+DEGRADED_SUCCESS_RATE = 0.5
+
+# allows(): an upstream is skipped only when down over at least this many recent calls,
+# and even then one trial call goes through every BREAKER_TRIAL_SECONDS
+BREAKER_MIN_CALLS = int(os.getenv("HEALTH_BREAKER_MIN_CALLS", 5))
+BREAKER_TRIAL_SECONDS = float(os.getenv("HEALTH_BREAKER_TRIAL", 30))
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class UpstreamHealth:
+    """Passive status of upstream services from the calls the app makes anyway
+
+    Call sites wrap upstream calls in track(name); each outcome is kept in a
+    small rolling window. readiness() turns the windows into a summary that
+    is cached for SUMMARY_TTL, so status endpoints cost a dict copy instead
+    of an upstream request. Upstreams that have gone quiet are probed in a
+    background thread at most once per PROBE_INTERVAL, independent of how
+    many status requests come in.
+    """
+
+    def __init__(self, probe_interval: float = PROBE_INTERVAL, window_seconds: float = WINDOW_SECONDS,
+                 breaker_min_calls: int = BREAKER_MIN_CALLS, breaker_trial_seconds: float = BREAKER_TRIAL_SECONDS):
+        self.probe_interval = probe_interval
+        self.window_seconds = window_seconds
+        self.breaker_min_calls = breaker_min_calls
+        self.breaker_trial_seconds = breaker_trial_seconds
+        self.started_at = time.time()
+        self._calls: Dict[str, deque] = {}
+        self._last_error: Dict[str, Dict] = {}
+        self._last_success: Dict[str, float] = {}
+        self._probes: Dict[str, Callable[[], None]] = {}
+        self._probing: Dict[str, float] = {}
+        self._trials: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._summary = None
+        self._summary_at = 0.0
+
+    def register_probe(self, name: str, probe: Callable[[], None]):
+        """Cheap call that raises when the upstream is unavailable"""
+        self._probes[name] = probe
+        self._calls.setdefault(name, deque(maxlen=WINDOW_CALLS))
+
+    def record(self, name: str, ok: bool, latency: float, error: Optional[str] = None):
+        UPSTREAM_SECONDS.labels(upstream=name, outcome="ok" if ok else "error").observe(latency)
+        now = time.time()
+        with self._lock:
+            self._calls.setdefault(name, deque(maxlen=WINDOW_CALLS)).append((now, ok, latency))
+            if ok:
+                self._last_success[name] = now
+            else:
+                self._last_error[name] = {"message": (error or "")[:200], "at": _iso(now)}
+
+    @contextmanager
+    def track(self, name: str):
+        """Record the latency and outcome of the wrapped upstream call"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(name, False, time.perf_counter() - started, str(e))
+            raise
+        self.record(name, True, time.perf_counter() - started)
+
+    def status(self, name: str) -> Dict:
+        """Summary for one upstream: up / degraded / down / unknown plus recent numbers"""
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            calls = [call for call in self._calls.get(name, ()) if call[0] >= cutoff]
+            last_error = self._last_error.get(name)
+            last_success = self._last_success.get(name)
+
+        if not calls:
+            state = "unknown"
+            success_rate = None
+            latencies = []
+        else:
+            success_rate = sum(1 for _, ok, _ in calls if ok) / len(calls)
+            latencies = sorted(latency for _, _, latency in calls)
+            if success_rate >= UP_SUCCESS_RATE:
+                state = "up"
+            elif success_rate >= DEGRADED_SUCCESS_RATE:
+                state = "degraded"
+            else:
+                state = "down"
+
+        def percentile(share):
+            return round(latencies[min(len(latencies) - 1, int(share * len(latencies)))] * 1000, 1) if latencies else None
+
+        return {
+            "status": state,
+            "calls": len(calls),
+            "success_rate": round(success_rate, 3) if success_rate is not None else None,
+            "latency_p50_ms": percentile(0.5),
+            "latency_p95_ms": percentile(0.95),
+            "last_success_at": _iso(last_success),
+            "last_error": last_error
+        }
+
+    def allows(self, name: str) -> bool:
+        """Whether a request should call the upstream now (a circuit breaker over the status)
+
+        Calls are skipped only while the upstream is down over at least
+        breaker_min_calls recent calls and the latest of them failed. Even
+        then one trial call is let through every breaker_trial_seconds, so an
+        upstream that only gets real traffic (no probe) is seen to recover;
+        one success closes the breaker again.
+        """
+        current = self.status(name)
+        if current['status'] != "down" or current['calls'] < self.breaker_min_calls:
+            return True
+        with self._lock:
+            calls = self._calls.get(name)
+            if calls and calls[-1][1]:
+                return True
+            now = time.time()
+            if now - self._trials.get(name, 0.0) < self.breaker_trial_seconds:
+                return False
+            self._trials[name] = now
+        log.info("Letting a trial call through to a down upstream", extra={"upstream": name})
+        return True
+
+    def readiness(self) -> Dict:
+        """Cached summary of every known upstream; schedules probes for quiet ones"""
+        now = time.time()
+        if self._summary is not None and now - self._summary_at < SUMMARY_TTL:
+            return self._summary
+
+        upstreams = {name: self.status(name) for name in sorted(self._calls)}
+        self._schedule_probes(upstreams)
+        states = {upstream['status'] for upstream in upstreams.values()}
+        self._summary = {
+            "status": "degraded" if states & {"down", "degraded"} else "healthy",
+            "upstreams": upstreams,
+            "uptime_seconds": int(now - self.started_at),
+            "timestamp": _iso(now)
+        }
+        self._summary_at = now
+        return self._summary
+
+    def _quiet_since(self, name: str) -> float:
+        calls = self._calls.get(name)
+        return calls[-1][0] if calls else 0.0
+
+    def _schedule_probes(self, upstreams: Dict):
+        now = time.time()
+        for name, probe in self._probes.items():
+            with self._lock:
+                if now - max(self._quiet_since(name), self._probing.get(name, 0.0)) < self.probe_interval:
+                    continue
+                self._probing[name] = now
+            threading.Thread(target=self.probe, args=(name,), name=f"health-probe-{name}", daemon=True).start()
+
+    def probe(self, name: str) -> Dict:
+        """Run one upstream's probe now (its outcome is recorded like any call)"""
+        try:
+            with self.track(name):
+                self._probes[name]()
+        except Exception as e:
+            log.warning("Health probe failed", extra={"upstream": name, "error": str(e)})
+        self._summary = None
+        return self.status(name)
+
+    def ensure_known(self, name: str) -> Dict:
+        """Status of one upstream, probing synchronously if nothing is known yet
+
+        Only the first status request on a cold instance waits; after that
+        probes run in the background at most once per probe interval.
+        """
+        current = self.status(name)
+        if current['status'] != "unknown" or name not in self._probes:
+            return current
+        with self._lock:
+            if time.time() - self._probing.get(name, 0.0) < self.probe_interval:
+                return current
+            self._probing[name] = time.time()
+        return self.probe(name)
+
+
+def _probe_spotify():
+    from utils.clients import get_spotify_client
+
+    sp = get_spotify_client()
+    if sp is None:
+        raise RuntimeError("Spotify credentials not configured")
+    sp.search(q="yoga", type='track', limit=1)
+
+
+def _probe_supabase():
+    from config.database import get_supabase_client
+
+    get_supabase_client().table("yoga_class_types").select("id").limit(1).execute()
+
+
+_health = None
+_health_lock = threading.Lock()
+
+
+def get_health() -> UpstreamHealth:
+    """Process-wide tracker; Spotify and Supabase get background probes (OpenAI is passive only, probes cost tokens)"""
+    global _health
+    if _health is not None:
+        return _health
+
+    with _health_lock:
+        if _health is None:
+            health = UpstreamHealth()
+            health.register_probe("spotify", _probe_spotify)
+            health.register_probe("supabase", _probe_supabase)
+            _health = health
+    return _health
+
+
+def track(name: str):
+    """Shorthand for get_health().track(name)"""
+    return get_health().track(name)
@@ -0,0 +1,368 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from utils.log import get_logger, request_context
+
+log = get_logger("jobs")
+
+DEFAULT_QUEUE_PATH = os.path.join(tempfile.gettempdir(), "yoga-playlist-jobs.sqlite3")
+# A running job whose worker stops renewing its lease is handed to another worker
+LEASE_SECONDS = 300
+# Running jobs renew their lease this many times per lease period
+LEASE_RENEWALS = 3
+MAX_ATTEMPTS = 3
+# Finished jobs are kept this long so clients can still poll the result
+RESULT_TTL_SECONDS = 24 * 3600
+# Longest a worker thread waits after repeated queue errors before trying again
+MAX_ERROR_BACKOFF = 30.0
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    lease_owner TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, created_at);
+"""
+
+# kind -> function(payload, progress) returning the job result
+_job_handlers: Dict[str, Callable] = {}
+
+
+def register_job(kind: str):
+    """Decorator registering the function that runs jobs of a given kind"""
+    def decorator(func):
+        _job_handlers[kind] = func
+        return func
+    return decorator
+
+
+def get_job_handler(kind: str) -> Optional[Callable]:
+    return _job_handlers.get(kind)
+
+
+class JobQueue:
+    """Persistent job queue in a local SQLite file
+
+    API handlers enqueue and return the job ID immediately; worker threads
+    (in a separate worker process, or inside the API process) claim jobs with
+    a lease so a crashed worker's job is picked up again.
+    """
+
+    def __init__(self, path: Optional[str] = None, lease_seconds: int = LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.path = path or os.getenv("JOB_QUEUE_PATH") or DEFAULT_QUEUE_PATH
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Queue files created before leases had owners
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "lease_owner" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_owner TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets pollers read while workers write
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def enqueue(self, kind: str, payload: Dict) -> str:
+        """Add a job and return its ID"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(payload), QUEUED, now, now)
+        )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Public view of a job (no payload - it may hold access tokens)"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": json.loads(row["progress"]) if row["progress"] else None,
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+        if row["status"] == SUCCEEDED:
+            job["result"] = json.loads(row["result"])
+        elif row["status"] == FAILED:
+            job["error"] = row["error"]
+        elif row["status"] == QUEUED:
+            job["position"] = self._position(row["created_at"])
+        return job
+
+    def _position(self, created_at: float) -> int:
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?", (QUEUED, created_at)
+        ).fetchone()
+        return row[0]
+
+    def claim(self) -> Optional[Dict]:
+        """Take the oldest runnable job (queued, or running with an expired lease)
+
+        An expired job that has already used max_attempts is failed instead
+        of being run again. The returned "lease" must be passed back to
+        renew, complete and fail.
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(error, 'Job lease expired'), payload = '{}', "
+                "lease_until = NULL, lease_owner = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, now, RUNNING, now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease_until < ? AND attempts < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now, self.max_attempts)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            lease = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, lease_owner = ?, "
+                "updated_at = ? WHERE id = ?",
+                (RUNNING, now + self.lease_seconds, lease, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "payload": json.loads(row["payload"]),
+            "attempts": row["attempts"] + 1,
+            "lease": lease
+        }
+
+    def _update_leased(self, job_id: str, lease: str, assignments: str, values: tuple) -> bool:
+        # Only the worker holding an unexpired lease may touch a running job
+        now = time.time()
+        cursor = self._connect().execute(
+            f"UPDATE jobs SET {assignments}, updated_at = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ? AND lease_until >= ?",
+            values + (now, job_id, RUNNING, lease, now)
+        )
+        return cursor.rowcount == 1
+
+    def renew(self, job_id: str, lease: str) -> bool:
+        """Extend the lease; False once it has been lost"""
+        return self._update_leased(job_id, lease, "lease_until = ?", (time.time() + self.lease_seconds,))
+
+    def update_progress(self, job_id: str, lease: str, progress: Dict) -> bool:
+        """Record progress and renew the lease"""
+        return self._update_leased(job_id, lease, "progress = ?, lease_until = ?",
+                                   (json.dumps(progress), time.time() + self.lease_seconds))
+
+    def complete(self, job_id: str, lease: str, result: Dict) -> bool:
+        """Store the result; False if the lease was lost and the result discarded"""
+        return self._update_leased(
+            job_id, lease, "status = ?, result = ?, payload = '{}', lease_until = NULL, lease_owner = NULL",
+            (SUCCEEDED, json.dumps(result))
+        )
+
+    def fail(self, job_id: str, lease: str, error: str, attempts: int) -> bool:
+        """Requeue a failed job until it has used max_attempts
+
+        A job that has failed for good drops its payload (which can hold
+        an access token) just like a completed one. Returns False if the
+        lease was lost, leaving the job to whoever holds it now.
+        """
+        if attempts < self.max_attempts:
+            return self._update_leased(
+                job_id, lease, "status = ?, error = ?, lease_until = NULL, lease_owner = NULL", (QUEUED, error)
+            )
+        return self._update_leased(
+            job_id, lease, "status = ?, error = ?, payload = '{}', lease_until = NULL, lease_owner = NULL",
+            (FAILED, error)
+        )
+
+    def purge(self, older_than: float = RESULT_TTL_SECONDS) -> int:
+        """Delete finished jobs older than the given age in seconds"""
+        cursor = self._connect().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (SUCCEEDED, FAILED, time.time() - older_than)
+        )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+def _keep_lease(queue: JobQueue, job: Dict, done: threading.Event):
+    """Renew a running job's lease until done is set or the lease is lost"""
+    try:
+        while not done.wait(queue.lease_seconds / LEASE_RENEWALS):
+            try:
+                if not queue.renew(job["id"], job["lease"]):
+                    log.warning("Job lease lost", extra={"job_id": job["id"]})
+                    return
+            except Exception as e:
+                # Try again next period; the lease only lapses if every renewal fails
+                log.warning("Job lease renewal failed", extra={"job_id": job["id"], "error": str(e)})
+    finally:
+        queue.close()
+
+
+def run_job(queue: JobQueue, job: Dict) -> bool:
+    """Run one claimed job; returns True when it succeeded"""
+    handler = get_job_handler(job["kind"])
+    if handler is None:
+        queue.fail(job["id"], job["lease"], f"Unknown job kind: {job['kind']}", queue.max_attempts)
+        return False
+
+    def progress(stage, details=None):
+        queue.update_progress(job["id"], job["lease"], dict(details or {}, stage=stage))
+
+    # Long steps report no progress, so the lease is renewed on a timer as well
+    done = threading.Event()
+    keeper = threading.Thread(target=_keep_lease, args=(queue, job, done), name="job-lease", daemon=True)
+    keeper.start()
+    # The job ID doubles as the request ID for everything the job logs
+    error = None
+    try:
+        with request_context(job["id"]):
+            result = handler(job["payload"], progress)
+    except Exception as e:
+        error = e
+    finally:
+        done.set()
+        keeper.join()
+
+    if error is not None:
+        log.error("Job failed", extra={"job_id": job["id"], "kind": job["kind"], "error": str(error)})
+        queue.fail(job["id"], job["lease"], str(error), job["attempts"])
+        return False
+    if not queue.complete(job["id"], job["lease"], result):
+        log.warning("Job result discarded, lease lost", extra={"job_id": job["id"], "kind": job["kind"]})
+        return False
+    return True
+
+
+class Worker:
+    """Runs queued jobs on a pool of threads until stopped"""
+
+    def __init__(self, queue: JobQueue, concurrency: int = 2, poll_interval: float = 0.5):
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+
+    def _loop(self):
+        errors = 0
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim()
+                if job is None:
+                    self._stop.wait(self.poll_interval)
+                    continue
+                run_job(self.queue, job)
+                errors = 0
+            except Exception as e:
+                # A queue error (locked or unreachable database) must not end
+                # this worker thread; the job's lease lets it be claimed again
+                errors += 1
+                log.error("Job worker error", extra={"error": str(e), "consecutive": errors})
+                self._stop.wait(min(MAX_ERROR_BACKOFF, self.poll_interval * 2 ** errors))
+
+    def run(self):
+        """Block, processing jobs until stop() is called"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for _ in range(self.concurrency):
+                pool.submit(self._loop)
+
+    def start(self) -> threading.Thread:
+        """Process jobs on a background daemon thread"""
+        thread = threading.Thread(target=self.run, name="job-worker", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+
+_queue = None
+_inline_worker = None
+_queue_lock = threading.Lock()
+
+
+def jobs_enabled() -> bool:
+    """Background jobs are used when JOB_WORKERS is set
+
+    JOB_WORKERS=0 only enqueues (a separate `python worker.py` runs them);
+    JOB_WORKERS=N also starts N worker threads inside the API process.
+    """
+    return os.getenv("JOB_WORKERS") is not None
+
+
+def get_job_queue() -> JobQueue:
+    """Shared queue for this process, starting inline workers if configured"""
+    global _queue, _inline_worker
+    if _queue is not None:
+        return _queue
+
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+            try:
+                inline_workers = int(os.getenv("JOB_WORKERS") or 0)
+            except ValueError:
+                inline_workers = 0
+            if inline_workers > 0:
+                # Job kinds must be registered in the process that runs them
+                import tools.jobs  # noqa: F401
+                _inline_worker = Worker(_queue, concurrency=inline_workers)
+                _inline_worker.start()
+        return _queue
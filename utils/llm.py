@@ -0,0 +1,264 @@
+"""LLM gateway: per-call deadlines, hedged requests, failover and model routing
+
+Every call names a task, and each task routes to an ordered list of targets
+("provider:model"). The first target is asked first. If it fails, the next
+target is tried straight away. If it is merely slow (past the p95 latency
+of its recent calls), one duplicate request goes to the next target and
+the first answer wins. Nothing runs past the call's deadline:
+LLMTimeoutError is raised instead, so callers can degrade rather than
+hang until the platform kills the request.
+
+Targets speak the OpenAI chat completions API, so any compatible server
+(another provider, a local model, a fake in tests) can be configured:
+
+    LLM_ROUTE_PLAYLIST=openai:gpt-3.5-turbo,openai:gpt-4o-mini
+    LLM_ROUTE_CHEAP=openai:gpt-4o-mini
+    LLM_LOCAL_BASE_URL=http://localhost:8080/v1     # provider "local"
+    LLM_LOCAL_API_KEY=...
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+from utils.health import track
+from utils.log import get_logger
+from utils.metrics import LLM_CALLS, LLM_TOKENS
+
+log = get_logger("llm")
+
+# Task -> targets, best first. Cheap tasks (class lookups, replacement
+# suggestions) go to the smaller model first.
+DEFAULT_ROUTES = {
+    "playlist": "openai:gpt-3.5-turbo,openai:gpt-4o-mini",
+    "cheap": "openai:gpt-4o-mini,openai:gpt-3.5-turbo",
+}
+DEFAULT_TASK = "playlist"
+
+# Seconds a whole call (every attempt included) may take
+DEFAULT_DEADLINE = float(os.getenv("LLM_DEADLINE", 25))
+# Hedge after this long until a target has enough latency samples for a p95
+HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_AFTER", 8))
+HEDGE_MIN_DELAY = 1.0
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 100
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+
+class LLMError(Exception):
+    """Every target failed"""
+
+
+class LLMTimeoutError(LLMError, TimeoutError):
+    """No target answered before the call's deadline"""
+
+
+def parse_route(spec: str) -> List[Dict]:
+    """"openai:gpt-4o-mini,local:llama3" -> target dicts (provider defaults to openai)"""
+    targets = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        provider, _, model = part.rpartition(":")
+        provider = provider or "openai"
+        if provider == "openai":
+            base_url = os.getenv("OPENAI_BASE_URL") or OPENAI_BASE_URL
+            api_key = os.getenv("OPENAI_API_KEY")
+        else:
+            prefix = f"LLM_{provider.upper()}_"
+            base_url = os.getenv(prefix + "BASE_URL")
+            api_key = os.getenv(prefix + "API_KEY")
+        targets.append({
+            "provider": provider,
+            "model": model,
+            "base_url": (base_url or "").rstrip("/"),
+            "api_key": api_key
+        })
+    return targets
+
+
+def load_routes() -> Dict[str, List[Dict]]:
+    """Routes from DEFAULT_ROUTES, overridden per task by LLM_ROUTE_<TASK>"""
+    routes = {}
+    for task, spec in DEFAULT_ROUTES.items():
+        routes[task] = parse_route(os.getenv(f"LLM_ROUTE_{task.upper()}") or spec)
+    return routes
+
+
+_http_client = None
+_http_lock = threading.Lock()
+
+
+def http_send(target: Dict, payload: Dict, timeout: float) -> Dict:
+    """POST a chat completion to an OpenAI-compatible server"""
+    global _http_client
+    import httpx
+
+    if _http_client is None:
+        with _http_lock:
+            if _http_client is None:
+                _http_client = httpx.Client()
+    response = _http_client.post(
+        f"{target['base_url']}/chat/completions",
+        json=payload,
+        headers={"Authorization": f"Bearer {target['api_key'] or ''}"},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+class LLMGateway:
+    """Routes chat completions to targets with deadlines, hedging and failover"""
+
+    def __init__(self, routes: Optional[Dict[str, List[Dict]]] = None, deadline: float = DEFAULT_DEADLINE,
+                 send: Optional[Callable[[Dict, Dict, float], Dict]] = None, hedging: bool = True):
+        self.routes = routes if routes is not None else load_routes()
+        self.deadline = deadline
+        self.hedging = hedging
+        self._send = send or http_send
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        # Attempts outlive a call that has already returned (a lost hedge), so
+        # they run on a shared pool instead of the caller's thread
+        self._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm")
+
+    def targets(self, task: str) -> List[Dict]:
+        targets = self.routes.get(task) or self.routes.get(DEFAULT_TASK) or []
+        if not targets:
+            raise LLMError(f"No LLM targets configured for task '{task}'")
+        return targets
+
+    def hedge_delay(self, target: Dict) -> float:
+        """Seconds to wait on a target before hedging: its recent p95 latency"""
+        with self._lock:
+            latencies = sorted(self._latencies.get(_target_key(target), ()))
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))])
+
+    def _attempt(self, target: Dict, payload: Dict, timeout: float) -> Dict:
+        started = time.perf_counter()
+        try:
+            with track(target['provider']):
+                body = self._send(target, dict(payload, model=target['model']), timeout)
+            text = body['choices'][0]['message']['content'] or ""
+        except Exception:
+            LLM_CALLS.labels(model=target['model'], outcome="error").inc()
+            raise
+        elapsed = time.perf_counter() - started
+        LLM_CALLS.labels(model=target['model'], outcome="ok").inc()
+        with self._lock:
+            self._latencies.setdefault(_target_key(target), deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+        usage = body.get('usage') or {}
+        for kind, key in (("prompt", "prompt_tokens"), ("completion", "completion_tokens")):
+            if usage.get(key) is not None:
+                LLM_TOKENS.labels(model=target['model'], kind=kind).observe(usage[key])
+        return {"text": text.strip(), "model": target['model'], "provider": target['provider'],
+                "usage": usage, "seconds": round(elapsed, 3)}
+
+    def complete(self, messages: List[Dict], task: str = DEFAULT_TASK, temperature: float = 0.7,
+                 deadline: Optional[float] = None, max_tokens: Optional[int] = None) -> Dict:
+        """Chat completion for a task; returns text, model, provider, usage and whether a hedge won
+
+        Raises LLMTimeoutError past the deadline and LLMError when every
+        target failed.
+        """
+        targets = self.targets(task)
+        # A single target is hedged (and failed over) against itself
+        queue = list(targets) if len(targets) > 1 else targets * 2
+        payload = {"messages": messages, "temperature": temperature}
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+
+        started = time.monotonic()
+        deadline_at = started + (deadline or self.deadline)
+        pending = {}
+        errors = []
+        hedged = False
+        launched = []
+
+        def launch(is_hedge):
+            target = queue.pop(0)
+            launched.append(target)
+            timeout = max(0.1, deadline_at - time.monotonic())
+            pending[self._pool.submit(self._attempt, target, payload, timeout)] = (target, is_hedge)
+
+        launch(False)
+        hedge_at = started + self.hedge_delay(targets[0])
+
+        while pending:
+            can_hedge = self.hedging and not hedged and queue
+            wait_until = min(hedge_at, deadline_at) if can_hedge else deadline_at
+            done, _ = wait(list(pending), timeout=max(0.0, wait_until - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                target, is_hedge = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{target['provider']}:{target['model']}: {e}")
+                    log.warning("LLM attempt failed", extra={"model": target['model'], "provider": target['provider'], "error": str(e)})
+                    if queue and time.monotonic() < deadline_at:
+                        launch(is_hedge)
+                    continue
+                if is_hedge:
+                    log.info("Hedged LLM request won", extra={"model": target['model'], "task": task})
+                return dict(result, hedged=is_hedge, attempts=len(launched))
+
+            now = time.monotonic()
+            if now >= deadline_at:
+                break
+            if not done and can_hedge and now >= hedge_at:
+                hedged = True
+                launch(True)
+
+        # Attempts cut off by the deadline count as a timeout, not as failures
+        if pending or not errors or time.monotonic() >= deadline_at:
+            raise LLMTimeoutError(f"No LLM answer within {deadline or self.deadline:.0f}s for task '{task}'")
+        raise LLMError("All LLM targets failed: " + "; ".join(errors))
+
+
+def _target_key(target: Dict) -> str:
+    return f"{target['provider']}:{target['model']}"
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Process-wide gateway configured from the environment"""
+    global _gateway
+    if _gateway is not None:
+        return _gateway
+
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(hedging=os.getenv("LLM_HEDGING", "on") == "on")
+    return _gateway
+
+
+@lru_cache(maxsize=8)
+def get_agent_model(task: str = DEFAULT_TASK, temperature: float = 0.7):
+    """LangChain chat model for agents: the task's first target with the rest as fallbacks
+
+    Agent executors drive the model themselves, so there is no hedging here,
+    but every target gets the gateway deadline as its timeout and a failing
+    target falls through to the next. Calls are still counted in the LLM
+    metrics and the provider's health (agents.tracing.LLMMetricsHandler).
+    """
+    from utils.clients import get_chat_model
+
+    models = [
+        get_chat_model(model=target['model'], temperature=temperature, base_url=target['base_url'],
+                       api_key=target['api_key'], timeout=DEFAULT_DEADLINE, provider=target['provider'])
+        for target in get_gateway().targets(task)
+    ]
+    return models[0].with_fallbacks(models[1:]) if len(models) > 1 else models[0]
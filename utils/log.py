@@ -0,0 +1,209 @@
+"""Structured logging for the API, tools and agents
+
+Log records go through a bounded in-memory queue to a background thread
+that formats and writes them, so request threads never block on stdout.
+Every record carries the current request ID; records below WARNING can be
+sampled per category (LOG_SAMPLE="spotify=0.1,agents=0.2"), and sampling
+is decided per request so a kept request keeps all of its lines.
+
+Configuration (environment):
+    LOG_LEVEL=INFO          DEBUG for the old [DEBUG] detail
+    LOG_FORMAT=json         or "text" for local development
+    LOG_SAMPLE=             category=rate pairs, rates between 0 and 1
+    AGENT_TRACE=off         "on" to trace every agent run; otherwise per
+                            request with the X-Debug-Trace: 1 header
+"""
+import atexit
+import contextvars
+import copy
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+ROOT_LOGGER = "yoga"
+QUEUE_SIZE = 10000
+REQUEST_ID_HEADER = "X-Request-ID"
+TRACE_HEADER = "X-Debug-Trace"
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_trace = contextvars.ContextVar("trace", default=False)
+
+# Attributes every LogRecord has; anything else was passed via extra= and is logged as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def trace_enabled() -> bool:
+    """Whether agent runs in this request should log their full trace"""
+    return _trace.get() or os.getenv("AGENT_TRACE", "off") == "on"
+
+
+@contextmanager
+def request_context(request_id: Optional[str] = None, trace: bool = False):
+    """Tag every log record made inside the block with a request ID"""
+    id_token = _request_id.set(request_id or uuid.uuid4().hex[:16])
+    trace_token = _trace.set(trace)
+    try:
+        yield _request_id.get()
+    finally:
+        _request_id.reset(id_token)
+        _trace.reset(trace_token)
+
+
+def context_from_headers(headers) -> "contextmanager":
+    """request_context for an incoming request, honouring X-Request-ID and X-Debug-Trace"""
+    request_id = (headers.get(REQUEST_ID_HEADER) or "").strip()[:64] or None
+    trace = (headers.get(TRACE_HEADER) or "").strip().lower() in ("1", "true", "on")
+    return request_context(request_id, trace)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            category, rate = part.split("=", 1)
+            try:
+                rates[category.strip()] = min(1.0, max(0.0, float(rate)))
+            except ValueError:
+                continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a share of each category's sub-WARNING records, chosen per request"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        category = record.name.split(".", 1)[-1].split(".")[0]
+        rate = self.rates.get(category)
+        if rate is None or rate >= 1.0:
+            return True
+        key = getattr(record, "request_id", None) or f"{record.thread}:{record.created}"
+        bucket = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=4).digest(), "big")
+        return bucket / 0xFFFFFFFF < rate
+
+
+class ContextFilter(logging.Filter):
+    """Attach the current request ID (runs on the logging thread's caller)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "category": record.name.split(".", 1)[-1],
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != "request_id":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s", "%H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, "request_id", None) or "-"
+        fields = " ".join(f"{key}={value}" for key, value in vars(record).items()
+                          if key not in _RECORD_ATTRS and key != "request_id")
+        text = super().format(record)
+        return f"{text} {fields}" if fields else text
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking or raising when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like QueueHandler.prepare, but the traceback stays a separate field
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      sample: Optional[str] = None, stream=None) -> logging.Logger:
+    """Set up the "yoga" logger tree once per process (later calls are no-ops)"""
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    with _configure_lock:
+        if _listener is not None:
+            return root
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(TextFormatter() if (fmt or os.getenv("LOG_FORMAT", "json")) == "text" else JsonFormatter())
+
+        handler = DroppingQueueHandler(queue.Queue(maxsize=QUEUE_SIZE))
+        handler.addFilter(ContextFilter())
+        handler.addFilter(SamplingFilter(parse_sample_rates(sample if sample is not None else os.getenv("LOG_SAMPLE", ""))))
+
+        root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+        root.addHandler(handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=False)
+        _listener.start()
+        # Drain what is still queued when a CLI or worker exits
+        atexit.register(flush_logging)
+    return root
+
+
+def flush_logging():
+    """Write out everything queued so far (CLI exits, tests)"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+
+def get_logger(category: str) -> logging.Logger:
+    """Logger for a category (api, generator, spotify, agents, jobs, ...)"""
+    configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{category}")
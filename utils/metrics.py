@@ -0,0 +1,234 @@
+"""Process-wide metrics in the Prometheus text format
+
+Counters and histograms are sharded per thread: each thread updates only
+its own cell, so the hot path takes no lock and threads never contend.
+Shards are summed when /api/metrics is scraped. Each serverless instance
+keeps its own numbers, so aggregate with sum() across instances.
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds: from cache hits (ms) to full LLM generations (tens of seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000)
+CHUNK_BUCKETS = (1, 2, 3, 5, 10, 20)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        # thread id -> [value]; a thread only ever writes its own cell
+        self._shards: Dict[int, List[float]] = {}
+
+    def inc(self, amount: float = 1):
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            shard = self._shards.setdefault(threading.get_ident(), [0])
+        shard[0] += amount
+
+    def value(self) -> float:
+        return sum(shard[0] for shard in list(self._shards.values()))
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._started)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_shards")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # thread id -> [count per bucket..., +Inf count, sum]
+        self._shards: Dict[int, List[float]] = {}
+
+    def observe(self, value: float):
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            shard = self._shards.setdefault(threading.get_ident(), [0] * (len(self._buckets) + 2))
+        shard[bisect_left(self._buckets, value)] += 1
+        shard[-1] += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the wrapped block's duration in seconds"""
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[float], float, int]:
+        """(cumulative bucket counts, sum, count)"""
+        totals = [0] * (len(self._buckets) + 2)
+        for shard in list(self._shards.values()):
+            for index, value in enumerate(shard):
+                totals[index] += value
+        cumulative = []
+        running = 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[-1], running
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._child(())
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _child(self, values: Tuple[str, ...]):
+        child = self._children.get(values)
+        if child is None:
+            # Only the first use of a label combination takes the lock
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def labels(self, *values, **labels):
+        if labels:
+            values = tuple(str(labels[name]) for name in self.labelnames)
+        return self._child(tuple(str(value) for value in values))
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    @property
+    def family(self) -> str:
+        return self.name
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.family} {self.documentation}", f"# TYPE {self.family} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    @property
+    def family(self) -> str:
+        # The text format names counter families after their _total samples
+        return self.name + "_total"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def samples(self):
+        for values, child in sorted(self._children.items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value())}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+    def samples(self):
+        for values, child in sorted(self._children.items()):
+            cumulative, total, count = child.snapshot()
+            for bound, bucket_count in zip(self.buckets + (math.inf,), cumulative):
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {bucket_count}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, values)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, values)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# --- application metrics ----------------------------------------------------
+
+GENERATION_SECONDS = REGISTRY.register(Histogram(
+    "yoga_generation_seconds", "End-to-end playlist generation time by response source", ["source"]))
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "yoga_upstream_request_seconds", "Latency of calls to OpenAI, Spotify and Supabase", ["upstream", "outcome"]))
+LLM_CALLS = REGISTRY.register(Counter(
+    "yoga_llm_calls", "LLM requests by model and outcome (hedges and failovers count separately)", ["model", "outcome"]))
+LLM_TOKENS = REGISTRY.register(Histogram(
+    "yoga_llm_tokens", "Tokens per LLM call", ["model", "kind"], buckets=TOKEN_BUCKETS))
+SPOTIFY_SEARCHES = REGISTRY.register(Counter(
+    "yoga_spotify_searches", "Track searches by result (hit = a track was found)", ["result"]))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "yoga_cache_lookups", "Lookups in the playlist caches by result", ["cache", "result"]))
+HISTORY_ROWS = REGISTRY.register(Counter(
+    "yoga_history_rows", "Playlist history rows by outcome (unflushed = still queued when a serverless request ended)",
+    ["outcome"]))
+EXPORT_CHUNKS = REGISTRY.register(Histogram(
+    "yoga_export_chunks", "Spotify add-items calls per playlist export", buckets=CHUNK_BUCKETS))
+EXPORT_CHUNK_WRITES = REGISTRY.register(Counter(
+    "yoga_export_chunk_writes", "Chunks written to Spotify playlists by outcome", ["outcome"]))
@@ -0,0 +1,53 @@
+import base64
+import json
+from typing import Dict, Optional
+
+
+def encode_cursor(position: Dict) -> str:
+    """Encode a keyset position as an opaque URL-safe cursor"""
+    raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict]:
+    """Decode a cursor produced by encode_cursor (None if missing or malformed)"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return position if isinstance(position, dict) else None
+
+
+def parse_limit(value: Optional[str], default: int, maximum: int) -> int:
+    """Parse a page size query parameter, clamped to 1..maximum"""
+    try:
+        limit = int(value) if value else default
+    except ValueError:
+        limit = default
+    return max(1, min(limit, maximum))
+
+
+def escape_like(text: str) -> str:
+    """Escape LIKE wildcards so user input only matches literally"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def quote_filter_value(value) -> str:
+    """Quote a value for a PostgREST or=(...) filter (timestamps contain ':' and '+')"""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_after(column: str, value, id_value) -> str:
+    """PostgREST or-filter selecting rows strictly after (value, id) in ascending order"""
+    quoted = quote_filter_value(value)
+    return f"{column}.gt.{quoted},and({column}.eq.{quoted},id.gt.{quote_filter_value(id_value)})"
+
+
+def keyset_before(column: str, value, id_value) -> str:
+    """PostgREST or-filter selecting rows strictly after (value, id) in descending order"""
+    quoted = quote_filter_value(value)
+    return f"{column}.lt.{quoted},and({column}.eq.{quoted},id.lt.{quote_filter_value(id_value)})"
@@ -0,0 +1,297 @@
+"""Record and replay upstream HTTP traffic (OpenAI, Spotify, Supabase)
+
+All three clients talk HTTP through either requests (spotipy) or httpx
+(openai, supabase), so the recorder hooks the transport of both libraries
+instead of each client: every agent, tool and endpoint is covered without
+changes. A recording ("cassette") is a gzipped JSON Lines file with one
+exchange per line and its original latency; replay serves the exchanges
+with that latency scaled by a speed factor, with no network at all.
+
+Usage:
+    with recording("runs/generate.jsonl.gz"):
+        generate_playlist(request)
+
+    with replaying("runs/generate.jsonl.gz", speed=0.5):
+        generate_playlist(request)   # same responses, half the latency
+"""
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Only headers that change client behaviour are kept; bodies are stored decoded
+KEPT_HEADERS = ("content-type", "retry-after", "location")
+
+
+class ReplayMissError(ConnectionError):
+    """No recorded exchange matches a request made during replay"""
+
+
+def request_key(method: str, url: str, body: Optional[bytes]) -> str:
+    """Match key for a request: method, path, sorted query and body hash
+
+    The host is left out so a recording replays against placeholder
+    credentials (e.g. a different SUPABASE_URL). JSON bodies are hashed in
+    canonical form, so key order in the client's payload doesn't matter.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':')).encode('utf-8')
+        except (ValueError, UnicodeDecodeError):
+            pass
+    digest = hashlib.sha256(body or b"").hexdigest()[:16]
+    return f"{method.upper()} {parts.path}?{query} {digest}"
+
+
+def _encode_body(content: bytes, content_type: str) -> Dict:
+    if "json" in content_type:
+        try:
+            # Spotify pretty-prints its JSON; stored compact
+            return {"json": json.loads(content)}
+        except (ValueError, UnicodeDecodeError):
+            pass
+    try:
+        return {"text": content.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode('ascii')}
+
+
+def _decode_body(exchange: Dict) -> bytes:
+    if "json" in exchange:
+        return json.dumps(exchange["json"], separators=(',', ':')).encode('utf-8')
+    if "text" in exchange:
+        return exchange["text"].encode('utf-8')
+    return base64.b64decode(exchange.get("base64", ""))
+
+
+class Cassette:
+    """Recorded exchanges keyed by request_key, replayed in recorded order
+
+    A request made more often than it was recorded gets the last recorded
+    response again, so warm-up and steady-state runs of a benchmark both
+    replay. Thread-safe: concurrent requests each take their own exchange.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self._exchanges: Dict[str, List[Dict]] = defaultdict(list)
+        self._served: Dict[str, int] = defaultdict(int)
+        self._recorded: List[Dict] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> "Cassette":
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    exchange = json.loads(line)
+                    self._exchanges[exchange['key']].append(exchange)
+        return self
+
+    def save(self):
+        with gzip.open(self.path, 'wt', encoding='utf-8') as f:
+            for exchange in self._recorded:
+                f.write(json.dumps(exchange, separators=(',', ':')) + "\n")
+
+    def __len__(self):
+        return sum(len(exchanges) for exchanges in self._exchanges.values())
+
+    def record(self, method: str, url: str, body: Optional[bytes], status: int,
+               headers: Dict[str, str], content: bytes, elapsed: float):
+        headers = {name.lower(): value for name, value in headers.items()}
+        exchange = {
+            "key": request_key(method, url, body),
+            "method": method.upper(),
+            "url": url,
+            "status": status,
+            "headers": {name: headers[name] for name in KEPT_HEADERS if name in headers},
+            "elapsed": round(elapsed, 4),
+            **_encode_body(content, headers.get("content-type", ""))
+        }
+        with self._lock:
+            self._recorded.append(exchange)
+            self._exchanges[exchange['key']].append(exchange)
+
+    def replay(self, method: str, url: str, body: Optional[bytes]) -> Tuple[int, Dict[str, str], bytes]:
+        """(status, headers, content) of the next matching exchange, after its scaled latency"""
+        key = request_key(method, url, body)
+        with self._lock:
+            exchanges = self._exchanges.get(key)
+            if not exchanges:
+                self.misses += 1
+                raise ReplayMissError(f"No recorded response for {method.upper()} {url}")
+            exchange = exchanges[min(self._served[key], len(exchanges) - 1)]
+            self._served[key] += 1
+            self.hits += 1
+
+        if self.speed > 0:
+            time.sleep(exchange['elapsed'] * self.speed)
+        return exchange['status'], dict(exchange['headers']), _decode_body(exchange)
+
+    def stats(self) -> Dict:
+        return {"exchanges": len(self), "recorded": len(self._recorded), "hits": self.hits, "misses": self.misses}
+
+
+# --- transport hooks --------------------------------------------------------
+
+_active: Optional[Tuple[str, Cassette]] = None
+_originals: Dict[str, object] = {}
+_install_lock = threading.Lock()
+
+
+def _body_bytes(body) -> Optional[bytes]:
+    if body is None or isinstance(body, bytes):
+        return body
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    # Generators / file objects (uploads) are not matched on content
+    return None
+
+
+def _patch_requests():
+    try:
+        from requests.adapters import HTTPAdapter
+        from requests.models import Response
+        from requests.structures import CaseInsensitiveDict
+    except ImportError:
+        return
+
+    original = HTTPAdapter.send
+    _originals['requests'] = original
+
+    def send(adapter, request, **kwargs):
+        mode, cassette = _active
+        body = _body_bytes(request.body)
+        if mode == "replay":
+            status, headers, content = cassette.replay(request.method, request.url, body)
+            response = Response()
+            response.status_code = status
+            response.headers = CaseInsensitiveDict(headers)
+            response._content = content
+            response.url = request.url
+            response.request = request
+            response.encoding = 'utf-8'
+            response.reason = "Replayed"
+            return response
+
+        started = time.perf_counter()
+        response = original(adapter, request, **kwargs)
+        content = response.content
+        cassette.record(request.method, request.url, body, response.status_code,
+                        dict(response.headers), content, time.perf_counter() - started)
+        return response
+
+    HTTPAdapter.send = send
+
+
+def _patch_httpx():
+    try:
+        import httpx
+    except ImportError:
+        return
+
+    sync_original = httpx.HTTPTransport.handle_request
+    async_original = httpx.AsyncHTTPTransport.handle_async_request
+    _originals['httpx'] = (sync_original, async_original)
+
+    def replayed(cassette, request):
+        status, headers, content = cassette.replay(request.method, str(request.url), request.content)
+        return httpx.Response(status, headers=headers, content=content, request=request)
+
+    def handle_request(transport, request):
+        mode, cassette = _active
+        request.read()
+        if mode == "replay":
+            return replayed(cassette, request)
+        started = time.perf_counter()
+        response = sync_original(transport, request)
+        content = response.read()
+        cassette.record(request.method, str(request.url), request.content, response.status_code,
+                        dict(response.headers), content, time.perf_counter() - started)
+        return httpx.Response(response.status_code, headers=_replayable(response.headers),
+                              content=content, request=request)
+
+    async def handle_async_request(transport, request):
+        mode, cassette = _active
+        await request.aread()
+        if mode == "replay":
+            return replayed(cassette, request)
+        started = time.perf_counter()
+        response = await async_original(transport, request)
+        content = await response.aread()
+        cassette.record(request.method, str(request.url), request.content, response.status_code,
+                        dict(response.headers), content, time.perf_counter() - started)
+        return httpx.Response(response.status_code, headers=_replayable(response.headers),
+                              content=content, request=request)
+
+    httpx.HTTPTransport.handle_request = handle_request
+    httpx.AsyncHTTPTransport.handle_async_request = handle_async_request
+
+
+def _replayable(headers) -> Dict[str, str]:
+    # The body handed back is already decoded, so drop the encoding headers
+    return {name: value for name, value in headers.items()
+            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+
+
+def install(mode: str, cassette: Cassette):
+    """Route all requests/httpx traffic through the cassette ("record" or "replay")"""
+    global _active
+    if mode not in ("record", "replay"):
+        raise ValueError(f"Unknown recorder mode: {mode}")
+    with _install_lock:
+        if _active is not None:
+            raise RuntimeError("A recorder is already installed")
+        _active = (mode, cassette)
+        _patch_requests()
+        _patch_httpx()
+
+
+def uninstall():
+    """Restore the original transports"""
+    global _active
+    with _install_lock:
+        if 'requests' in _originals:
+            from requests.adapters import HTTPAdapter
+            HTTPAdapter.send = _originals.pop('requests')
+        if 'httpx' in _originals:
+            import httpx
+            httpx.HTTPTransport.handle_request, httpx.AsyncHTTPTransport.handle_async_request = _originals.pop('httpx')
+        _active = None
+
+
+@contextmanager
+def recording(path: str):
+    """Record every upstream exchange made inside the block to path"""
+    cassette = Cassette(path)
+    install("record", cassette)
+    try:
+        yield cassette
+    finally:
+        uninstall()
+        cassette.save()
+
+
+@contextmanager
+def replaying(path: str, speed: float = 1.0):
+    """Serve upstream requests made inside the block from the recording at path
+
+    speed scales the recorded latencies: 1.0 replays them as recorded,
+    0.5 at half, 0 instantly.
+    """
+    cassette = Cassette(path, speed=speed).load()
+    install("replay", cassette)
+    try:
+        yield cassette
+    finally:
+        uninstall()
@@ -0,0 +1,147 @@
+import gzip
+import json
+import os
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+from utils.log import REQUEST_ID_HEADER, current_request_id
+
+# Optional fast JSON backend - falls back to the stdlib encoder when missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional brotli support - gzip is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Set JSON_ENCODER=stdlib to force the standard library encoder
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")
+
+# Bodies smaller than this are not worth the compression overhead
+MIN_COMPRESS_BYTES = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def encode_json(data: Any) -> bytes:
+    """Serialize data to UTF-8 JSON bytes using the fastest available backend"""
+    if orjson is not None and JSON_ENCODER != "stdlib":
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # orjson is stricter (e.g. non-str dict keys) - let stdlib handle it
+            pass
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best content coding the client accepts ('br', 'gzip' or None)"""
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        pieces = part.strip().split(";")
+        coding = pieces[0].strip().lower()
+        quality = 1.0
+        for param in pieces[1:]:
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding] = quality
+
+    def q(coding):
+        return accepted.get(coding, accepted.get("*", 0.0))
+
+    if brotli is not None and q("br") > 0 and q("br") >= q("gzip"):
+        return "br"
+    if q("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    """Compress body with the given content coding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def wants_compact(handler, data: Optional[Dict] = None) -> bool:
+    """Check whether the client asked for a compact payload
+
+    Clients opt in with a `compact` field in the JSON body or a `?compact=1`
+    query parameter.
+    """
+    if data and data.get("compact"):
+        return True
+    query_params = parse_qs(urlparse(handler.path).query)
+    return query_params.get("compact", [""])[0] in ("1", "true")
+
+
+def compact_playlist_response(response: Dict) -> Dict:
+    """Drop fields that duplicate information already in the response
+
+    The per-track objects in `successful_tracks` repeat the playlist text
+    (`original_query`) and the IDs in `track_ids`. Compact clients only need
+    the playlist text, the track IDs, the found/total counts and `resolved`,
+    a query -> Spotify ID map so a later section edit needn't search again.
+    """
+    integration = response.get("spotify_integration")
+    if not isinstance(integration, dict):
+        return response
+
+    search_results = integration.get("search_results")
+    if isinstance(search_results, dict):
+        search_results = dict(search_results)
+        tracks = search_results.pop("successful_tracks", None)
+        if tracks:
+            search_results["resolved"] = {track["original_query"]: track["spotify_data"]["spotify_id"]
+                                          for track in tracks}
+        integration = dict(integration, search_results=search_results)
+
+    return dict(response, spotify_integration=integration)
+
+
+def send_json(handler, data: Any, status_code: int = 200,
+              headers: Optional[Dict[str, str]] = None) -> None:
+    """Write a JSON response with compression and an exact Content-Length"""
+    body = encode_json(data)
+
+    encoding = None
+    if len(body) >= MIN_COMPRESS_BYTES:
+        encoding = negotiate_encoding(handler.headers.get("Accept-Encoding"))
+        body = compress(body, encoding)
+
+    handler.send_response(status_code)
+    handler.send_header('Content-type', 'application/json')
+    handler.send_header('Access-Control-Allow-Origin', '*')
+    handler.send_header('Vary', 'Accept-Encoding')
+    if encoding:
+        handler.send_header('Content-Encoding', encoding)
+    handler.send_header('Content-Length', str(len(body)))
+    if current_request_id():
+        handler.send_header(REQUEST_ID_HEADER, current_request_id())
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
+    handler.end_headers()
+
+    handler.wfile.write(body)
+
+
+def send_error(handler, message: str, status_code: int = 500) -> None:
+    """Write a standard error response"""
+    send_json(handler, {
+        "success": False,
+        "error": message
+    }, status_code)
@@ -0,0 +1,90 @@
+import base64
+import hashlib
+import json
+import os
+import time
+from http.cookies import SimpleCookie
+from typing import Dict, Optional
+
+# Optional dependency - sessions are disabled when it's missing
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None
+    InvalidToken = Exception
+
+SESSION_COOKIE = "yp_spotify_session"
+SESSION_MAX_AGE = 30 * 24 * 3600
+# Refresh access tokens this many seconds before they expire
+REFRESH_MARGIN = 60
+
+
+class SessionStore:
+    """Encrypted cookie sessions holding a user's Spotify tokens
+
+    The cookie is a Fernet token (AES + HMAC) keyed from SESSION_SECRET, so
+    tokens are neither readable nor forgeable client-side and any serverless
+    instance can read them without shared storage.
+    """
+
+    def __init__(self, secret: Optional[str] = None, max_age: int = SESSION_MAX_AGE,
+                 cookie_name: str = SESSION_COOKIE, cookie_path: str = "/api"):
+        secret = secret if secret is not None else os.getenv("SESSION_SECRET")
+        self.max_age = max_age
+        self.cookie_name = cookie_name
+        self.cookie_path = cookie_path
+        self._fernet = None
+        if secret and Fernet is not None:
+            key = base64.urlsafe_b64encode(hashlib.sha256(secret.encode("utf-8")).digest())
+            self._fernet = Fernet(key)
+
+    @property
+    def enabled(self) -> bool:
+        return self._fernet is not None
+
+    def load(self, cookie_header: Optional[str]) -> Optional[Dict]:
+        """Read the session from a Cookie header (None if absent, expired or tampered)"""
+        if not self.enabled or not cookie_header:
+            return None
+
+        cookie = SimpleCookie()
+        try:
+            cookie.load(cookie_header)
+        except Exception:
+            return None
+        morsel = cookie.get(self.cookie_name)
+        if morsel is None:
+            return None
+
+        try:
+            raw = self._fernet.decrypt(morsel.value.encode("ascii"), ttl=self.max_age)
+            session = json.loads(raw)
+        except (InvalidToken, ValueError):
+            return None
+        return session if isinstance(session, dict) else None
+
+    def dump(self, session: Dict) -> str:
+        """Encrypt a session into a Set-Cookie header value"""
+        token = self._fernet.encrypt(json.dumps(session, separators=(",", ":")).encode("utf-8"))
+        return (f"{self.cookie_name}={token.decode('ascii')}; Max-Age={self.max_age}; "
+                f"Path={self.cookie_path}; HttpOnly; Secure; SameSite=Lax")
+
+    def clear(self) -> str:
+        """Set-Cookie header value that removes the session"""
+        return f"{self.cookie_name}=; Max-Age=0; Path={self.cookie_path}; HttpOnly; Secure; SameSite=Lax"
+
+
+def session_from_token(token_info: Dict, user_id: str) -> Dict:
+    """Build the stored session from a Spotify token response"""
+    return {
+        "access_token": token_info["access_token"],
+        "refresh_token": token_info.get("refresh_token"),
+        "expires_at": token_info.get("expires_at") or int(time.time()) + token_info.get("expires_in", 3600),
+        "user_id": user_id
+    }
+
+
+def needs_refresh(session: Dict, now: Optional[float] = None) -> bool:
+    """True when the access token expires within REFRESH_MARGIN seconds"""
+    now = time.time() if now is None else now
+    return session.get("expires_at", 0) - now < REFRESH_MARGIN
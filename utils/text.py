@@ -0,0 +1,11 @@
+import re
+from typing import List
+
+# Words that carry no musical meaning in free-text preferences
+STOPWORDS = {"a", "an", "and", "the", "of", "with", "like", "some", "music", "songs", "style", "please", "for", "in", "to", "or"}
+
+
+def normalize_terms(text: str) -> List[str]:
+    """Lowercase word tokens with apostrophes dropped ("90's" -> "90s") and stopwords removed"""
+    text = re.sub(r"['’`]", "", (text or "").lower())
+    return [word for word in re.split(r"[^a-z0-9]+", text) if word and word not in STOPWORDS]
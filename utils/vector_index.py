@@ -0,0 +1,100 @@
+import threading
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+# Optional approximate index - brute force is used when it's missing
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Below this many vectors a brute-force dot product beats any ANN index
+ANN_MIN_SIZE = 20000
+
+
+class VectorIndex:
+    """In-memory nearest-neighbour index over unit vectors (cosine similarity)
+
+    Vectors live in one contiguous float32 matrix and queries are a single
+    matrix-vector product. With ann=True (or "auto" and hnswlib installed)
+    an HNSW index takes over once the index grows past ann_min_size.
+    When max_size is reached the oldest entries are dropped.
+    """
+
+    def __init__(self, dim: int, max_size: int = 10000, ann="auto",
+                 ann_min_size: int = ANN_MIN_SIZE):
+        self.dim = dim
+        self.max_size = max_size
+        self.ann_min_size = ann_min_size
+        self.use_ann = hnswlib is not None if ann == "auto" else bool(ann)
+        if self.use_ann and hnswlib is None:
+            raise ImportError("hnswlib is required for ann=True")
+
+        self._vectors = np.zeros((64, dim), dtype=np.float32)
+        self._items: List[Any] = []
+        self._ann = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, vector: np.ndarray, item: Any):
+        with self._lock:
+            if len(self._items) >= self.max_size:
+                self._evict(max(1, self.max_size // 10))
+
+            count = len(self._items)
+            if count == len(self._vectors):
+                grown = np.zeros((count * 2, self.dim), dtype=np.float32)
+                grown[:count] = self._vectors
+                self._vectors = grown
+            self._vectors[count] = vector
+            self._items.append(item)
+
+            if self._ann is not None:
+                self._ann.add_items(vector[np.newaxis, :], [count])
+            elif self.use_ann and count + 1 >= self.ann_min_size:
+                self._build_ann()
+
+    def _evict(self, count: int):
+        """Drop the oldest entries (labels are positions, so the ANN index is rebuilt)"""
+        remaining = len(self._items) - count
+        self._vectors[:remaining] = self._vectors[count:len(self._items)]
+        self._items = self._items[count:]
+        self._ann = None
+        if self.use_ann and remaining >= self.ann_min_size:
+            self._build_ann()
+
+    def _build_ann(self):
+        count = len(self._items)
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=self.max_size, ef_construction=200, M=16)
+        index.set_ef(64)
+        index.add_items(self._vectors[:count], np.arange(count))
+        self._ann = index
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[float, Any]]:
+        """The k most similar items as (similarity, item), best first"""
+        with self._lock:
+            count = len(self._items)
+            if count == 0:
+                return []
+            k = min(k, count)
+
+            if self._ann is not None:
+                labels, distances = self._ann.knn_query(vector[np.newaxis, :], k=k)
+                # hnswlib's "ip" distance is 1 - dot product
+                return [(1.0 - float(d), self._items[int(label)]) for label, d in zip(labels[0], distances[0])]
+
+            scores = self._vectors[:count] @ vector
+            if k == 1:
+                best = [int(np.argmax(scores))]
+            else:
+                best = np.argpartition(-scores, k - 1)[:k]
+                best = best[np.argsort(-scores[best])]
+            return [(float(scores[i]), self._items[i]) for i in best]
+
+    def best(self, vector: np.ndarray) -> Optional[Tuple[float, Any]]:
+        results = self.search(vector, k=1)
+        return results[0] if results else None
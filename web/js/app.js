@@ -42,6 +42,11 @@ let posthogCheckInterval = setInterval(() => {
 
 // Configuration
 const API_BASE_URL = '/api';
+// Background job polling (generation and export run as jobs when the server queues them)
+const JOB_POLL_INITIAL_MS = 800;
+const JOB_POLL_MAX_MS = 4000;
+// Alternatives per playlist section requested with each generation
+const PLAYLIST_VARIANTS = 3;
 
 // DOM Elements
 const backendStatus = document.getElementById('backend-status');
@@ -74,6 +79,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Setup event listeners
     setupEventListeners();
     
+    // Serve catalog and status from the browser cache on return visits
+    registerServiceWorker();
+    
     // Check system status
     checkSystemStatus();
     
@@ -91,16 +99,70 @@ document.addEventListener('DOMContentLoaded', function() {
             const playlistData = JSON.parse(pendingPlaylist);
             // Small delay to ensure page is ready
             setTimeout(() => {
-                createSpotifyPlaylist(playlistData.playlistName, playlistData.trackIds, authCode);
+                createSpotifyPlaylist(playlistData.playlistName, playlistData.trackIds, authCode, playlistData.playlistId);
             }, 1000);
         } catch (error) {
             console.error('Error processing playlist data:', error);
             showSuccessMessage('❌ Error creating playlist. Please try again.', true);
             localStorage.removeItem('pendingPlaylist');
         }
+    } else {
+        restoreRecentPlaylist();
     }
 });
 
+function registerServiceWorker() {
+    if (!('serviceWorker' in navigator)) {
+        return;
+    }
+    
+    navigator.serviceWorker.register('/sw.js').catch(error => {
+        console.log('Service worker not registered:', error);
+    });
+    
+    // A cached response was shown first - re-render when the API had something newer
+    navigator.serviceWorker.addEventListener('message', event => {
+        if (event.data?.type !== 'api-updated') {
+            return;
+        }
+        try {
+            const data = JSON.parse(event.data.body);
+            if (event.data.path === '/api/health') {
+                applyHealthStatus(data);
+            } else if (event.data.path === '/api/test-spotify') {
+                applySpotifyStatus(data);
+            } else if (event.data.path === '/api/classes' && data.success && !classCatalog.query) {
+                populateClassSelect(data.classes);
+                updateClassPaging(data);
+            }
+        } catch (error) {
+            console.error('Error applying cache update:', error);
+        }
+    });
+}
+
+// Show the last playlist generated in this browser (kept in IndexedDB) until a new one is made
+async function restoreRecentPlaylist() {
+    if (typeof getRecentPlaylists === 'undefined') {
+        return;
+    }
+    
+    try {
+        const [recent] = await getRecentPlaylists();
+        // Only while the page still shows its placeholder
+        if (!recent || currentPlaylistData || !outputContent.querySelector('.placeholder')) {
+            return;
+        }
+        
+        currentPlaylistData = recent.response;
+        displayPlaylistResult(recent.response);
+        showExportAndShareSections();
+        console.log('📦 Restored playlist from', new Date(recent.savedAt).toISOString());
+    } catch (error) {
+        console.log('No recent playlists available:', error);
+    }
+}
+
 function setupEventListeners() {
     // Duration slider
     durationSlider.addEventListener('input', function() {
@@ -381,7 +443,12 @@ async function saveNewClass() {
             
             // Auto-select the newly added class after cards load
             setTimeout(() => {
-                const newCard = document.querySelector(`[data-class-name="${name}"]`);
+                let newCard = document.querySelector(`[data-class-name="${CSS.escape(name)}"]`);
+                if (!newCard) {
+                    // Custom classes come last, so it may not be on the first page yet
+                    appendClassCards([{ name: name, description: description, is_custom: true }]);
+                    newCard = document.querySelector(`[data-class-name="${CSS.escape(name)}"]`);
+                }
                 if (newCard) {
                     selectClassCard(newCard);
                 }
@@ -422,34 +489,47 @@ function cancelNewClass() {
 }
 
 async function checkSystemStatus() {
-    // Check backend health
+    // Health reports Spotify's status from recent real calls, so one cheap request covers both
+    let health = null;
     try {
         const response = await fetch(`${API_BASE_URL}/health`);
-        const data = await response.json();
-        
-        if (data.status === 'healthy') {
-            updateStatus('backend-status', 'Online', 'online');
-        } else {
-            updateStatus('backend-status', 'Issues', 'offline');
-        }
+        health = await response.json();
+        applyHealthStatus(health);
     } catch (error) {
         console.error('Backend health check failed:', error);
         updateStatus('backend-status', 'Offline', 'offline');
     }
     
-    // Check Spotify connection
-    try {
-        const response = await fetch(`${API_BASE_URL}/test-spotify`);
-        const data = await response.json();
-        
-        if (data.success && data.connected) {
-            updateStatus('spotify-status', 'Connected', 'online');
-        } else {
-            updateStatus('spotify-status', 'Not Connected', 'offline');
+    // Nothing known about Spotify yet (fresh server) - ask for a probe
+    if (!health || !health.upstreams?.spotify || health.upstreams.spotify.status === 'unknown') {
+        try {
+            const response = await fetch(`${API_BASE_URL}/test-spotify`);
+            applySpotifyStatus(await response.json());
+        } catch (error) {
+            console.error('Spotify check failed:', error);
+            updateStatus('spotify-status', 'Error', 'offline');
         }
-    } catch (error) {
-        console.error('Spotify check failed:', error);
-        updateStatus('spotify-status', 'Error', 'offline');
+    }
+}
+
+function applyHealthStatus(data) {
+    if (data.status === 'healthy') {
+        updateStatus('backend-status', 'Online', 'online');
+    } else {
+        updateStatus('backend-status', 'Issues', 'offline');
+    }
+    
+    const spotify = data.upstreams?.spotify;
+    if (spotify && spotify.status !== 'unknown') {
+        applySpotifyStatus({ success: true, connected: spotify.status === 'up' || spotify.status === 'degraded' });
+    }
+}
+
+function applySpotifyStatus(data) {
+    if (data.success && data.connected) {
+        updateStatus('spotify-status', 'Connected', 'online');
+    } else {
+        updateStatus('spotify-status', 'Not Connected', 'offline');
     }
 }
 
@@ -463,19 +543,38 @@ function updateStatus(elementId, text, statusClass) {
     }
 }
 
+// Class catalog paging state - cards are fetched a page at a time
+const CLASS_PAGE_SIZE = 24;
+let classCatalog = {
+    cursor: null,
+    hasMore: false,
+    loading: false,
+    query: '',
+    observer: null
+};
+
+function buildClassesUrl(cursor, query) {
+    const params = new URLSearchParams({ limit: CLASS_PAGE_SIZE });
+    const userId = getFairydustUserId();
+    if (userId) params.set('user_id', userId);
+    if (cursor) params.set('cursor', cursor);
+    if (query) params.set('q', query);
+    return `${API_BASE_URL}/classes?${params}`;
+}
+
 async function loadYogaClasses() {
     try {
         // Get fairydust user ID if available
         const userId = getFairydustUserId();
-        const url = userId ? `${API_BASE_URL}/classes?user_id=${encodeURIComponent(userId)}` : `${API_BASE_URL}/classes`;
-        
         console.log('🔍 Loading classes for user:', userId || 'anonymous');
         
-        const response = await fetch(url);
+        classCatalog.query = '';
+        const response = await fetch(buildClassesUrl(null, ''));
         const data = await response.json();
         
         if (data.success) {
             populateClassSelect(data.classes);
+            updateClassPaging(data);
         } else {
             console.error('Failed to load classes:', data.error);
             // Show error in the loading area
@@ -495,6 +594,100 @@ async function loadYogaClasses() {
     }
 }
 
+async function loadMoreClasses() {
+    if (classCatalog.loading || !classCatalog.hasMore) {
+        return;
+    }
+    
+    classCatalog.loading = true;
+    try {
+        const response = await fetch(buildClassesUrl(classCatalog.cursor, classCatalog.query));
+        const data = await response.json();
+        
+        if (data.success) {
+            appendClassCards(data.classes);
+            updateClassPaging(data);
+        }
+    } catch (error) {
+        console.error('Error loading more classes:', error);
+    } finally {
+        classCatalog.loading = false;
+    }
+}
+
+async function searchClasses(query) {
+    classCatalog.query = query;
+    classCatalog.loading = true;
+    try {
+        const response = await fetch(buildClassesUrl(null, query));
+        const data = await response.json();
+        
+        // Ignore responses for a query the user has already typed past
+        if (data.success && classCatalog.query === query) {
+            document.querySelectorAll('.class-card:not(.add-custom-card)').forEach(card => card.remove());
+            appendClassCards(data.classes);
+            updateClassPaging(data);
+        }
+    } catch (error) {
+        console.error('Error searching classes:', error);
+    } finally {
+        classCatalog.loading = false;
+    }
+}
+
+function updateClassPaging(data) {
+    classCatalog.cursor = data.next_cursor || null;
+    classCatalog.hasMore = !!data.has_more;
+    
+    const loadMoreBtn = document.getElementById('class-load-more');
+    if (loadMoreBtn) {
+        loadMoreBtn.style.display = classCatalog.hasMore ? 'block' : 'none';
+    }
+    
+    // Only offer search once the catalog is bigger than one page
+    const searchInput = document.getElementById('class-search');
+    if (searchInput && (classCatalog.hasMore || classCatalog.query)) {
+        searchInput.style.display = 'block';
+    }
+}
+
+function watchClassLoadMore() {
+    const loadMoreBtn = document.getElementById('class-load-more');
+    if (!loadMoreBtn) {
+        return;
+    }
+    
+    loadMoreBtn.addEventListener('click', loadMoreClasses);
+    
+    if (classCatalog.observer) {
+        classCatalog.observer.disconnect();
+    }
+    
+    // Fetch the next page as the end of the grid scrolls into view
+    if ('IntersectionObserver' in window) {
+        classCatalog.observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadMoreClasses();
+            }
+        }, { rootMargin: '200px' });
+        classCatalog.observer.observe(loadMoreBtn);
+    }
+}
+
+function watchClassSearch() {
+    const searchInput = document.getElementById('class-search');
+    if (!searchInput) {
+        return;
+    }
+    
+    let searchTimer = null;
+    searchInput.addEventListener('input', function() {
+        clearTimeout(searchTimer);
+        const query = this.value.trim();
+        searchTimer = setTimeout(() => searchClasses(query), 250);
+    });
+}
+
 // Helper function to get fairydust user ID
 function getFairydustUserId() {
     // Try to get user ID from the fairydust SDK
@@ -523,6 +716,60 @@ function getFairydustUserId() {
     return null;
 }
 
+function escapeAttribute(value) {
+    return String(value || '')
+        .replace(/&/g, '&amp;')
+        .replace(/"/g, '&quot;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;');
+}
+
+function renderClassCard(yogaClass) {
+    const customClass = yogaClass.is_custom ? ' custom-class' : '';
+    const customBadge = yogaClass.is_custom
+        ? '<div style="position: absolute; top: 5px; right: 5px; font-size: 0.7rem; opacity: 0.8;">✨</div>'
+        : '';
+    
+    return `
+        <div 
+            class="class-card${customClass}" 
+            data-class-name="${escapeAttribute(yogaClass.name)}"
+            data-description="${escapeAttribute(yogaClass.description)}"
+            onclick="selectClassCard(this)"
+            style="
+                padding: 20px 15px;
+                background: rgba(255, 255, 255, 0.1);
+                border: 2px solid rgba(255, 255, 255, 0.2);
+                border-radius: 12px;
+                text-align: center;
+                cursor: pointer;
+                transition: all 0.2s ease;
+                font-weight: 500;
+                backdrop-filter: blur(10px);
+                position: relative;
+            "
+            onmouseover="this.style.background='rgba(255, 255, 255, 0.15)'; this.style.transform='translateY(-2px)'"
+            onmouseout="this.style.background='rgba(255, 255, 255, 0.1)'; this.style.transform='translateY(0)'"
+        >
+            ${escapeAttribute(yogaClass.name)}
+            ${customBadge}
+        </div>
+    `;
+}
+
+function appendClassCards(classes) {
+    // New cards go before the "+ Custom" card, which stays last
+    const addCustomCard = document.querySelector('.add-custom-card');
+    if (!addCustomCard) {
+        return;
+    }
+    // Skip cards already shown (e.g. a just-added custom class reached by paging)
+    const newClasses = classes.filter(
+        yogaClass => !document.querySelector(`.class-card[data-class-name="${CSS.escape(yogaClass.name)}"]`)
+    );
+    addCustomCard.insertAdjacentHTML('beforebegin', newClasses.map(renderClassCard).join(''));
+}
+
 function populateClassSelect(classes) {
     // Save the currently selected class name before rebuilding
     const currentSelection = document.getElementById('class-type')?.value;
@@ -551,70 +798,20 @@ function populateClassSelect(classes) {
         musicPreferencesFormGroup.style.display = 'block';
     }
     
-    // Separate public and custom classes
-    const publicClasses = classes.filter(c => !c.is_custom);
-    const customClasses = classes.filter(c => c.is_custom);
-    
-    console.log('📋 Showing classes - Public:', publicClasses.length, 'Custom:', customClasses.length);
+    // The API returns public classes first, then custom ones
+    console.log('📋 Showing classes - Public:', classes.filter(c => !c.is_custom).length, 'Custom:', classes.filter(c => c.is_custom).length);
     
     // Replace select with card grid
     formGroup.innerHTML = `
         <label>Choose Your Class Type</label>
+        <input type="search" id="class-search" class="class-search" placeholder="Search classes..." style="display: none;">
         <div class="class-cards-grid" style="
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(140px, 1fr));
             gap: 12px;
             margin-top: 10px;
         ">
-            ${publicClasses.map(yogaClass => `
-                <div 
-                    class="class-card" 
-                    data-class-name="${yogaClass.name}"
-                    data-description="${yogaClass.description}"
-                    onclick="selectClassCard(this)"
-                    style="
-                        padding: 20px 15px;
-                        background: rgba(255, 255, 255, 0.1);
-                        border: 2px solid rgba(255, 255, 255, 0.2);
-                        border-radius: 12px;
-                        text-align: center;
-                        cursor: pointer;
-                        transition: all 0.2s ease;
-                        font-weight: 500;
-                        backdrop-filter: blur(10px);
-                    "
-                    onmouseover="this.style.background='rgba(255, 255, 255, 0.15)'; this.style.transform='translateY(-2px)'"
-                    onmouseout="this.style.background='rgba(255, 255, 255, 0.1)'; this.style.transform='translateY(0)'"
-                >
-                    ${yogaClass.name}
-                </div>
-            `).join('')}
-            
-            ${customClasses.map(yogaClass => `
-                <div 
-                    class="class-card custom-class" 
-                    data-class-name="${yogaClass.name}"
-                    data-description="${yogaClass.description}"
-                    onclick="selectClassCard(this)"
-                    style="
-                        padding: 20px 15px;
-                        background: rgba(255, 255, 255, 0.1);
-                        border: 2px solid rgba(255, 255, 255, 0.2);
-                        border-radius: 12px;
-                        text-align: center;
-                        cursor: pointer;
-                        transition: all 0.2s ease;
-                        font-weight: 500;
-                        backdrop-filter: blur(10px);
-                        position: relative;
-                    "
-                    onmouseover="this.style.background='rgba(255, 255, 255, 0.15)'; this.style.transform='translateY(-2px)'"
-                    onmouseout="this.style.background='rgba(255, 255, 255, 0.1)'; this.style.transform='translateY(0)'"
-                >
-                    ${yogaClass.name}
-                    <div style="position: absolute; top: 5px; right: 5px; font-size: 0.7rem; opacity: 0.8;">✨</div>
-                </div>
-            `).join('')}
+            ${classes.map(renderClassCard).join('')}
             
             <div 
                 class="class-card add-custom-card" 
@@ -639,16 +836,20 @@ function populateClassSelect(classes) {
                 <span style="font-size: 1.2rem;">+</span> Custom
             </div>
         </div>
+        <button type="button" id="class-load-more" class="class-load-more" style="display: none;">Show more classes</button>
         <input type="hidden" id="class-type" required>
     `;
     
     // Re-assign the global reference to the hidden input
     window.classTypeSelect = document.getElementById('class-type');
     
+    watchClassLoadMore();
+    watchClassSearch();
+    
     // Restore the previous selection if it exists
     if (currentSelection) {
         console.log('🔄 Restoring class selection:', currentSelection);
-        const cardToSelect = document.querySelector(`[data-class-name="${currentSelection}"]`);
+        const cardToSelect = document.querySelector(`[data-class-name="${CSS.escape(currentSelection)}"]`);
         if (cardToSelect) {
             // Use setTimeout to ensure DOM is fully rendered
             setTimeout(() => {
@@ -713,10 +914,23 @@ async function handlePlaylistGeneration(event) {
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify(formData)
+            // compact: skip per-track objects the UI never reads
+            // async: run as a background job when the server has a job queue
+            // variants: alternatives per section, swapped locally instead of regenerating
+            // user_id: files the playlist under the user's history
+            body: JSON.stringify({
+                ...formData,
+                compact: true,
+                async: true,
+                variants: PLAYLIST_VARIANTS,
+                user_id: getFairydustUserId() || undefined
+            })
         });
         
-        const data = await response.json();
+        let data = await response.json();
+        if (data.job_id) {
+            data = await waitForJob(data.job_id, showGenerationProgress);
+        }
         
         if (data.success) {
             const generationTime = Date.now() - startTime;
@@ -734,6 +948,9 @@ async function handlePlaylistGeneration(event) {
             
             // Store the data for later reveal
             currentPlaylistData = data;
+            if (typeof saveRecentPlaylist !== 'undefined') {
+                saveRecentPlaylist(formData, data).catch(error => console.log('Playlist not cached:', error));
+            }
             
             // Show celebration screen first!
             showPlaylistReadyScreen(data, formData.class_name);
@@ -793,8 +1010,58 @@ function setGeneratingState(isGenerating) {
     }
 }
 
+// Poll a background job until it finishes; resolves with the job's result
+async function waitForJob(jobId, onProgress) {
+    let delay = JOB_POLL_INITIAL_MS;
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, delay));
+        
+        const response = await fetch(`${API_BASE_URL}/jobs?id=${encodeURIComponent(jobId)}`);
+        const job = await response.json();
+        
+        if (!job.success) {
+            return { success: false, error: job.error || 'Lost track of background job' };
+        }
+        if (job.status === 'succeeded') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            return { success: false, error: job.error || 'Background job failed' };
+        }
+        
+        if (onProgress) {
+            onProgress(job.progress || { stage: job.status, position: job.position });
+        }
+        // Back off gently so long jobs don't flood the API with polls
+        delay = Math.min(delay * 1.5, JOB_POLL_MAX_MS);
+    }
+}
+
+// Update the loading animation with a generation job's progress
+function showGenerationProgress(progress) {
+    const loadingText = outputContent.querySelector('.loading-text');
+    const loadingSubtext = outputContent.querySelector('.loading-subtext');
+    if (!loadingText || !loadingSubtext) {
+        return;
+    }
+    
+    if (progress.stage === 'queued') {
+        loadingText.textContent = '⏳ Waiting for a free playlist maker...';
+        loadingSubtext.textContent = progress.position ? `${progress.position} ahead of you` : 'Starting shortly';
+    } else if (progress.stage === 'generating') {
+        loadingText.textContent = '🎵 Generating your playlist...';
+        loadingSubtext.textContent = 'Picking tracks for each part of your class';
+    } else if (progress.stage === 'resolving') {
+        loadingText.textContent = '🎧 Finding tracks on Spotify...';
+        loadingSubtext.textContent = progress.total ? `${progress.done} of ${progress.total} tracks` : 'Searching Spotify';
+    } else if (progress.stage === 'degraded') {
+        loadingText.textContent = '⚡ Building a quick playlist...';
+        loadingSubtext.textContent = 'Using tracks we have already matched';
+    }
+}
+
 // Simple function to create Spotify playlist
-async function createSpotifyPlaylist(playlistName, trackIds, authCode) {
+async function createSpotifyPlaylist(playlistName, trackIds, authCode, playlistId = null) {
     try {
         showSuccessMessage('🔄 Creating your Spotify playlist...');
         
@@ -803,15 +1070,27 @@ async function createSpotifyPlaylist(playlistName, trackIds, authCode) {
             headers: {
                 'Content-Type': 'application/json',
             },
+            // Send the session cookie that lets repeat exports skip Spotify auth
+            credentials: 'same-origin',
             body: JSON.stringify({
                 action: 'create_playlist',
                 playlist_name: playlistName,
                 track_ids: trackIds,
-                auth_code: authCode
+                auth_code: authCode,
+                // Set when resuming a playlist a previous export only partly wrote
+                playlist_id: playlistId,
+                async: true
             })
         });
         
-        const data = await response.json();
+        let data = await response.json();
+        if (data.job_id) {
+            data = await waitForJob(data.job_id, (progress) => {
+                if (progress.stage === 'exporting' && progress.total) {
+                    showSuccessMessage(`🔄 Adding tracks to Spotify... ${progress.done}/${progress.total}`);
+                }
+            });
+        }
         
         if (data.success) {
             showSuccessMessage(`🎉 Success! Created playlist "${playlistName}". <a href="${data.playlist_url}" target="_blank">Open in Spotify</a>`);
@@ -834,8 +1113,18 @@ async function createSpotifyPlaylist(playlistName, trackIds, authCode) {
                 `;
             }
         } else if (data.needs_auth) {
-            // This shouldn't happen if we have an auth code, but just in case
+            // No auth code and no stored session - authorize with Spotify first
             await initiateSpotifyAuth(playlistName, trackIds);
+        } else if (data.resumable) {
+            // Keep the partly written playlist so the next export resumes it
+            localStorage.setItem('pendingPlaylist', JSON.stringify({
+                playlistName: playlistName,
+                // The server writes each track once - resume with its list
+                trackIds: data.track_ids || trackIds,
+                playlistId: data.playlist_id,
+                timestamp: Date.now()
+            }));
+            showSuccessMessage(`⚠️ Added ${data.added} of ${trackIds.length} tracks before Spotify failed. Click "Create Spotify Playlist" again to finish it.`, true);
         } else {
             showSuccessMessage(`❌ Error: ${data.error || 'Failed to create playlist'}`, true);
             localStorage.removeItem('pendingPlaylist');
@@ -866,9 +1155,15 @@ function displayPlaylistResult(data) {
         .replace(/BPM:/g, '<em>BPM:</em>')  // Style BPM info
         .replace(/Energy:/g, '<em>Energy:</em>');  // Style Energy info
     
+    // Served from already-matched tracks because the AI curator was slow or unavailable
+    const degradedNote = data.degraded ? `
+            <p class="playlist-degraded-note" style="color: #8a6d3b; background: #fcf8e3; padding: 10px; border-radius: 6px;">
+                ⚡ Our AI curator was busy, so this is a quick playlist built from tracks we've already matched. Try again in a minute for a fully personalized one.
+            </p>` : '';
+    
     const resultHtml = `
         <div class="playlist-result">
-            <h3>🎵 Your Personalized Playlist</h3>
+            <h3>🎵 Your Personalized Playlist</h3>${degradedNote}${renderVariantPicker(data)}
             <div class="playlist-content">
                 ${formattedPlaylist}
             </div>
@@ -878,6 +1173,79 @@ function displayPlaylistResult(data) {
     outputContent.innerHTML = resultHtml;
 }
 
+function selectedVariantChoice(data) {
+    return data.variantChoice || data.variants.sections.map(() => 0);
+}
+
+// Rebuild the playlist text, track IDs and counts for one option per section
+function applyVariantChoice(data, choice) {
+    const lines = [];
+    const trackIds = [];
+    const resolved = {};
+    let total = 0;
+    data.variants.sections.forEach((section, index) => {
+        const option = section.options[choice[index]] || section.options[0];
+        if (section.heading) {
+            lines.push(section.heading);
+        }
+        lines.push(...section.details);
+        option.tracks.forEach(track => {
+            lines.push(`- ${track.query}`);
+            total++;
+            if (track.spotify_id && !trackIds.includes(track.spotify_id)) {
+                trackIds.push(track.spotify_id);
+            }
+            if (track.spotify_id) {
+                resolved[track.query] = track.spotify_id;
+            }
+        });
+        lines.push('');
+    });
+
+    data.variantChoice = choice;
+    data.playlist = lines.join('\n').trim();
+    data.spotify_integration = {
+        ...data.spotify_integration,
+        track_ids: trackIds,
+        // resolved (query -> ID) lets a section edit skip searching kept tracks again
+        search_results: { ...(data.spotify_integration?.search_results || {}), found_count: trackIds.length, total_tracks: total, resolved }
+    };
+    delete data.spotify_integration.search_results.successful_tracks;
+    data.ready_for_export = trackIds.length > 0;
+}
+
+function renderVariantPicker(data) {
+    if (!data.variants || data.variants.count < 2) {
+        return '';
+    }
+    const choice = selectedVariantChoice(data);
+    const rows = data.variants.sections.map((section, index) => `
+                <div class="variant-section">
+                    <span class="variant-section-name">${escapeAttribute(section.name)}</span>
+                    ${section.options.map((option, optionIndex) => `
+                    <button type="button" class="variant-option${optionIndex === choice[index] ? ' active' : ''}" onclick="selectVariant(${index}, ${optionIndex})">Option ${escapeAttribute(option.label)}</button>`).join('')}
+                </div>`).join('');
+    return `
+            <div class="variant-picker">${rows}
+            </div>`;
+}
+
+// Swap one section to another alternative - no request needed
+window.selectVariant = function(sectionIndex, optionIndex) {
+    if (!currentPlaylistData || !currentPlaylistData.variants) {
+        return;
+    }
+    const choice = [...selectedVariantChoice(currentPlaylistData)];
+    choice[sectionIndex] = optionIndex;
+    applyVariantChoice(currentPlaylistData, choice);
+    displayPlaylistResult(currentPlaylistData);
+
+    captureEvent('playlist_variant_selected', {
+        section: currentPlaylistData.variants.sections[sectionIndex].name,
+        option: optionIndex
+    });
+};
+
 function displayError(message) {
     outputContent.innerHTML = `
         <div class="error-message" style="color: #d32f2f; text-align: center; padding: 20px;">
@@ -974,13 +1342,20 @@ async function handleSpotifyExport() {
     // Check if we have an auth code from URL (user returning from Spotify)
     const authCode = getSpotifyAuthCodeFromURL();
     
-    if (authCode) {
-        // User has returned from Spotify authorization - create playlist
-        await createSpotifyPlaylist(playlistName, trackIds, authCode);
-    } else {
-        // No auth code - need to get Spotify authorization first
-        await initiateSpotifyAuth(playlistName, trackIds);
-    }
+    // Finish a partly written playlist instead of starting another one,
+    // using the exact track order the server was writing
+    const pending = JSON.parse(localStorage.getItem('pendingPlaylist') || 'null');
+    const resume = pending && pending.playlistId && pending.playlistName === playlistName ? pending : null;
+    
+    // With an auth code the user has just returned from Spotify. Without one
+    // the server may still hold a session from an earlier export; if not it
+    // answers needs_auth and createSpotifyPlaylist starts the auth flow.
+    await createSpotifyPlaylist(
+        playlistName,
+        resume ? resume.trackIds : trackIds,
+        authCode,
+        resume ? resume.playlistId : null
+    );
 }
 
 async function initiateSpotifyAuth(playlistName, trackIds) {
@@ -991,10 +1366,13 @@ async function initiateSpotifyAuth(playlistName, trackIds) {
         currentExportBtn.disabled = true;
         currentExportBtn.textContent = '🔄 Getting Spotify Authorization...';
         
-        // Store playlist data in localStorage for when user returns
+        // Store playlist data in localStorage for when user returns,
+        // keeping the ID of a partly exported playlist so it gets resumed
+        const previous = JSON.parse(localStorage.getItem('pendingPlaylist') || 'null');
         const pendingData = {
             playlistName: playlistName,
             trackIds: trackIds,
+            playlistId: previous && previous.playlistName === playlistName ? previous.playlistId : null,
             timestamp: Date.now()
         };
         console.log('💾 Storing pending playlist data:', pendingData);
@@ -0,0 +1,73 @@
+// IndexedDB storage shared by the page (app.js) and the service worker (sw.js)
+//   responses: API GET responses served stale-while-revalidate by the service worker
+//   playlists: recently generated playlists, restored on return visits
+const CACHE_DB_NAME = 'yoga-playlist-cache';
+const CACHE_DB_VERSION = 1;
+const RECENT_PLAYLIST_LIMIT = 10;
+
+let cacheDbPromise = null;
+
+function openCacheDb() {
+    if (!cacheDbPromise) {
+        cacheDbPromise = new Promise((resolve, reject) => {
+            if (typeof indexedDB === 'undefined') {
+                reject(new Error('IndexedDB not available'));
+                return;
+            }
+            const request = indexedDB.open(CACHE_DB_NAME, CACHE_DB_VERSION);
+            request.onupgradeneeded = () => {
+                const db = request.result;
+                if (!db.objectStoreNames.contains('responses')) {
+                    db.createObjectStore('responses', { keyPath: 'url' });
+                }
+                if (!db.objectStoreNames.contains('playlists')) {
+                    db.createObjectStore('playlists', { keyPath: 'id' }).createIndex('savedAt', 'savedAt');
+                }
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+        // Let a later call retry (e.g. private browsing refused the first open)
+        cacheDbPromise.catch(() => { cacheDbPromise = null; });
+    }
+    return cacheDbPromise;
+}
+
+async function cacheDbRequest(storeName, mode, operation) {
+    const db = await openCacheDb();
+    return new Promise((resolve, reject) => {
+        const request = operation(db.transaction(storeName, mode).objectStore(storeName));
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function cacheDbGet(storeName, key) {
+    return cacheDbRequest(storeName, 'readonly', store => store.get(key));
+}
+
+function cacheDbPut(storeName, value) {
+    return cacheDbRequest(storeName, 'readwrite', store => store.put(value));
+}
+
+function cacheDbDelete(storeName, key) {
+    return cacheDbRequest(storeName, 'readwrite', store => store.delete(key));
+}
+
+function cacheDbGetAll(storeName) {
+    return cacheDbRequest(storeName, 'readonly', store => store.getAll());
+}
+
+// Newest first
+async function getRecentPlaylists() {
+    const playlists = await cacheDbGetAll('playlists');
+    return playlists.sort((a, b) => b.savedAt - a.savedAt);
+}
+
+async function saveRecentPlaylist(request, response) {
+    const savedAt = Date.now();
+    await cacheDbPut('playlists', { id: `${savedAt}-${Math.random().toString(36).slice(2, 8)}`, savedAt, request, response });
+
+    const stale = (await getRecentPlaylists()).slice(RECENT_PLAYLIST_LIMIT);
+    await Promise.all(stale.map(playlist => cacheDbDelete('playlists', playlist.id)));
+}
@@ -0,0 +1,101 @@
+// Service worker: stale-while-revalidate cache for the API calls every page view makes
+//
+// Responses are kept in IndexedDB (js/cache-db.js). A cached response is
+// served straight away; if it is older than the route's revalidate window
+// the API is fetched in the background, the cache updated and open pages
+// told about the change (message type 'api-updated').
+importScripts('/js/cache-db.js');
+
+// Path -> milliseconds a cached response is served without asking the API again
+const REVALIDATE_AFTER_MS = {
+    '/api/classes': 5 * 60 * 1000,
+    '/api/health': 60 * 1000,
+    '/api/test-spotify': 5 * 60 * 1000
+};
+// Older responses are not served at all
+const MAX_STALE_MS = 7 * 24 * 60 * 60 * 1000;
+
+self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', event => event.waitUntil(self.clients.claim()));
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (url.origin !== self.location.origin || !(url.pathname in REVALIDATE_AFTER_MS)) {
+        return;
+    }
+
+    if (event.request.method !== 'GET') {
+        // Creating a class changes the catalog - drop it once the API has answered
+        if (url.pathname === '/api/classes') {
+            event.respondWith(fetch(event.request).then(async response => {
+                await forgetResponses('/api/classes').catch(() => {});
+                return response;
+            }));
+        }
+        return;
+    }
+
+    // Only the first page of the catalog is rendered on load; searches and paging go to the API
+    if (url.searchParams.has('cursor') || url.searchParams.has('q')) {
+        return;
+    }
+
+    event.respondWith(staleWhileRevalidate(event, url));
+});
+
+async function staleWhileRevalidate(event, url) {
+    const cached = await cacheDbGet('responses', url.href).catch(() => null);
+    const age = cached ? Date.now() - cached.storedAt : Infinity;
+
+    if (age < REVALIDATE_AFTER_MS[url.pathname]) {
+        return cachedResponse(cached);
+    }
+
+    const refresh = refreshResponse(event.request, url, cached);
+    if (age < MAX_STALE_MS) {
+        event.waitUntil(refresh.catch(() => {}));
+        return cachedResponse(cached);
+    }
+    // Too old to show first, but still better than nothing when offline
+    return refresh.catch(error => {
+        if (cached) {
+            return cachedResponse(cached);
+        }
+        throw error;
+    });
+}
+
+async function refreshResponse(request, url, cached) {
+    const response = await fetch(request);
+    if (!response.ok) {
+        return response;
+    }
+
+    const body = await response.clone().text();
+    await cacheDbPut('responses', {
+        url: url.href,
+        body,
+        contentType: response.headers.get('Content-Type') || 'application/json',
+        storedAt: Date.now()
+    }).catch(() => {});
+
+    if (cached && cached.body !== body) {
+        const clients = await self.clients.matchAll({ type: 'window' });
+        clients.forEach(client => client.postMessage({ type: 'api-updated', path: url.pathname, url: url.href, body }));
+    }
+    return response;
+}
+
+function cachedResponse(cached) {
+    return new Response(cached.body, {
+        status: 200,
+        headers: { 'Content-Type': cached.contentType, 'X-Client-Cache': 'hit' }
+    });
+}
+
+async function forgetResponses(path) {
+    const responses = await cacheDbGetAll('responses');
+    await Promise.all(responses
+        .filter(entry => new URL(entry.url).pathname === path)
+        .map(entry => cacheDbDelete('responses', entry.url)));
+}
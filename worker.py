@@ -0,0 +1,40 @@
+"""Background job worker
+
+Runs queued playlist generation and export jobs from the shared SQLite queue
+(JOB_QUEUE_PATH). Start the API with JOB_WORKERS=0 so it only enqueues.
+
+Usage:
+    python worker.py --concurrency 4
+"""
+import argparse
+import signal
+
+from utils.jobs import JobQueue, Worker
+import tools.jobs  # noqa: F401 - registers the job kinds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background playlist jobs")
+    parser.add_argument('--concurrency', type=int, default=4, help='jobs processed in parallel')
+    parser.add_argument('--poll-interval', type=float, default=0.5, help='seconds between polls when idle')
+    parser.add_argument('--queue', default=None, help='SQLite queue path (default: JOB_QUEUE_PATH)')
+    args = parser.parse_args()
+
+    queue = JobQueue(args.queue)
+    removed = queue.purge()
+    worker = Worker(queue, concurrency=args.concurrency, poll_interval=args.poll_interval)
+
+    def stop(signum, frame):
+        print("🛑 Stopping worker after current jobs...")
+        worker.stop()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"🚀 Worker started on {queue.path} with concurrency {worker.concurrency} (purged {removed} old jobs)")
+    print(f"📊 Queue: {queue.stats()}")
+    worker.run()
+
+
+if __name__ == '__main__':
+    main()